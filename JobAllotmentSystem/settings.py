@@ -10,7 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
+from joballotment.sqlite import DEFAULT_PRAGMAS as DEFAULT_SQLITE_PRAGMAS
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -77,7 +79,30 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'OPTIONS': {
+            # Take the write lock when a transaction begins. With the default
+            # deferred BEGIN, a transaction that read first fails with
+            # "database is locked" instead of waiting for concurrent writers.
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # Keep connections open between requests (seconds; 0 closes them
+        # after each request), checking them before reuse
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        # A file rather than the shared in-memory database, so tests see
+        # SQLite's real locking between connections
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+    },
+    # The same file opened read-only, for the dashboard sections
+    # (joballotment/routers.py). Under WAL its reads do not block on writers.
+    'readonly': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'{(BASE_DIR / "db.sqlite3").as_uri()}?mode=ro',
+        'OPTIONS': {'uri': True},
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
 
@@ -123,3 +148,89 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'joballotment.CustomUser'
+
+# Cache the user loaded for every authenticated request (joballotment/auth_backends.py)
+AUTHENTICATION_BACKENDS = ['joballotment.auth_backends.CachedModelBackend']
+
+# Rows per page of the admin jobs/reports/users tables (?page_size= overrides, up to the max)
+ADMIN_TABLE_PAGE_SIZE = 50
+ADMIN_TABLE_MAX_PAGE_SIZE = 500
+
+# Dashboard section fragments (joballotment.fragment_cache), sessions and the
+# authenticated-user cache. The local-memory default is per process: the
+# fragment generation bump and the cached user dropped on save only reach the
+# process that made the write, so it is only correct with a single server
+# process. Run several workers only with a shared backend, e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# CACHE_LOCATION=redis://127.0.0.1:6379 (or memcached / FileBasedCache).
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+SECTION_CACHE_ALIAS = 'default'
+SECTION_CACHE_TIMEOUT = 300
+
+# Processes the import_csv command hashes user passwords in (1 hashes
+# in-process); uploads through the admin dashboard always hash in-process
+IMPORT_HASH_WORKERS = 4
+
+# Warn once fewer than this many 5-digit user IDs are left to allocate
+USER_ID_LOW_WATERMARK = 5000
+
+# Results per page of the full-text search section (?page_size= up to 100)
+SEARCH_PAGE_SIZE = 20
+
+# Entries kept in the in-process LRU of user typeahead lookups (read per
+# lookup; each distinct size gets its own LRU)
+USER_LOOKUP_CACHE_SIZE = 1024
+
+# Live dashboard updates (Server-Sent Events, ASGI only): keepalive interval
+# and events buffered per connection before it is asked to reload
+EVENT_HEARTBEAT_SECONDS = 15
+EVENT_QUEUE_SIZE = 100
+
+# Serve the dashboard sections with the async views (async_views.py); only
+# worth it under an ASGI server (JobAllotmentSystem/asgi.py)
+ASYNC_SECTION_VIEWS = False
+
+# Auto-allotment (allotment.py): open jobs a candidate may carry extra and
+# still be preferred for having handled the title / sharing the department
+ALLOTMENT_TITLE_BONUS = 2
+ALLOTMENT_DEPARTMENT_BONUS = 1
+
+# Bulk job actions (bulk_actions.py): jobs written per transaction
+BULK_ACTION_CHUNK_SIZE = 500
+
+# Pending user reports per page of the supervisor review inbox
+REVIEW_INBOX_PAGE_SIZE = 250
+
+# Pragmas run on every new SQLite connection; the defaults live in
+# joballotment/sqlite.py and each can be overridden with an SQLITE_<NAME>
+# environment variable.
+# journal_mode=WAL is persistent: the first connection rewrites the header of
+# the checked-in db.sqlite3 (so git shows it modified) and creates
+# db.sqlite3-wal / db.sqlite3-shm next to it (ignored). SQLITE_JOURNAL_MODE=DELETE
+# keeps the old rollback journal, e.g. to commit a fixture database.
+SQLITE_PRAGMAS = {
+    name: os.environ.get(f'SQLITE_{name.upper()}', default)
+    for name, default in DEFAULT_SQLITE_PRAGMAS.items()
+}
+
+# Database router: dashboard section reads go to READ_ONLY_DATABASE (an
+# alias of DATABASES); empty reads everything from default
+DATABASE_ROUTERS = ['joballotment.routers.ReadOnlyRouter']
+READ_ONLY_DATABASE = os.environ.get('READ_ONLY_DATABASE', 'readonly') or None
+
+# Sessions are read from the cache and written through to django_session,
+# which is the fallback when the cache loses them. 'cached_db' may be
+# swapped for 'db' or 'cache' per environment.
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + os.environ.get('SESSION_BACKEND', 'cached_db')
+SESSION_CACHE_ALIAS = 'default'
+
+# Cache of the authenticated user (seconds); dropped when the user is saved.
+# Kept short since, with the per-process cache above, other processes only
+# see a deactivated or changed user once their copy expires.
+AUTH_USER_CACHE_ALIAS = 'default'
+AUTH_USER_CACHE_TIMEOUT = 60
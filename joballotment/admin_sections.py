@@ -0,0 +1,193 @@
+from django.contrib import messages
+from django.http import HttpResponse
+from django.shortcuts import redirect, render
+from django.utils.functional import cached_property
+from .filters import JobFilter
+from .bulk_import import import_jobs, import_users
+from .events import publish_job_event
+from .forms import JobForm, CustomUserCreationForm, NewTitleForm, BulkImportForm, BulkJobActionForm
+from .models import Job, CustomUser
+from .rollups import analytics_context, get_range_days
+from .pagination import JOB_SORT_FIELDS, USER_SORT_FIELDS, InvalidCursor, keyset_paginate, page_url, sort_links
+from .search import render_search_section
+from .workflow import build_job_workflow
+
+# section name -> provider(request, data) returning the section's response
+ADMIN_SECTIONS = {}
+
+
+def admin_section_provider(*sections):
+    def register(provider):
+        for section in sections:
+            ADMIN_SECTIONS[section] = provider
+        return provider
+    return register
+
+
+class AdminSectionData:
+    """
+    Data shared between admin sections. Every attribute is computed on first
+    access, so a section only pays for the lookups its template uses.
+    """
+
+    def __init__(self, request, section):
+        self.request = request
+        self.section = section
+
+    @cached_property
+    def job_filter(self):
+        return JobFilter(self.request.GET)
+
+    @cached_property
+    def jobs(self):
+        # ?status=, ?title=, ?assigned_to=, ?supervisor= and the report date window
+        return self.job_filter.apply(Job.objects.all())
+
+    @cached_property
+    def searched_user_id(self):
+        return self.request.GET.get('search_user_id')
+
+    @cached_property
+    def searched_user(self):
+        query = self.searched_user_id
+        if not query:
+            return None
+        # Try user_id (5-digit code), then username, then numeric PK
+        user = CustomUser.objects.filter(user_id=query).first()
+        if user is None:
+            user = CustomUser.objects.filter(username=query).first()
+        if user is None and query.isdigit():
+            user = CustomUser.objects.filter(id=int(query)).first()
+        return user
+
+    @cached_property
+    def searched_user_name(self):
+        if not self.searched_user_id:
+            return ''
+        if self.searched_user is None:
+            return 'User not found'
+        return self.searched_user.get_full_name() or self.searched_user.username
+
+
+def render_table_page(request, template, context, page, sort_fields):
+    # One keyset page per request; ?cursor= requests return only the rows
+    context.update({
+        'page': page,
+        'next_page_url': page_url(request, cursor=page.next_cursor) if page.has_next else '',
+        'sort_links': sort_links(request, page, sort_fields),
+    })
+    if 'cursor' in request.GET:
+        template = template.replace('.html', '_rows.html')
+    return render(request, template, context)
+
+
+@admin_section_provider('user_search')
+def user_search_section(request, data):
+    return render(request, 'joballotment/admin_section_user_search.html', {
+        'searched_user_id': data.searched_user_id,
+        'searched_user_name': data.searched_user_name,
+    })
+
+
+@admin_section_provider('create_actions')
+def create_actions_section(request, data):
+    return render(request, 'joballotment/admin_section_create_actions.html')
+
+
+@admin_section_provider('jobs_table', 'reports_table')
+def job_table_section(request, data):
+    try:
+        page = keyset_paginate(request, data.jobs.select_related('assigned_to', 'supervisor'), JOB_SORT_FIELDS, 'created_at')
+    except InvalidCursor:
+        return HttpResponse('Invalid cursor', status=400)
+    context = build_job_workflow(page.object_list)
+    if data.section == 'jobs_table':
+        context['bulk_form'] = BulkJobActionForm()
+    template = f'joballotment/admin_section_{data.section}.html'
+    return render_table_page(request, template, context, page, JOB_SORT_FIELDS)
+
+
+@admin_section_provider('users_table')
+def users_table_section(request, data):
+    try:
+        page = keyset_paginate(request, CustomUser.objects.all(), USER_SORT_FIELDS, 'username')
+    except InvalidCursor:
+        return HttpResponse('Invalid cursor', status=400)
+    context = {'users': page.object_list}
+    return render_table_page(request, 'joballotment/admin_section_users_table.html', context, page, USER_SORT_FIELDS)
+
+
+@admin_section_provider('change_password')
+def change_password_section(request, data):
+    return render(request, 'joballotment/change_password.html')
+
+
+@admin_section_provider('create_job')
+def create_job_section(request, data):
+    if request.method == 'POST':
+        form = JobForm(request.POST)
+        if form.is_valid():
+            job = form.save()
+            publish_job_event('job_allotted', job)
+            return HttpResponse('<div class="alert alert-success">Job created successfully!</div>')
+    else:
+        form = JobForm()
+    return render(request, 'joballotment/job_form.html', {'form': form})
+
+
+@admin_section_provider('create_user')
+def create_user_section(request, data):
+    if request.method == 'POST':
+        form = CustomUserCreationForm(request.POST)
+        if form.is_valid():
+            form.save()
+            return HttpResponse('<div class="alert alert-success">User created successfully!</div>')
+    else:
+        form = CustomUserCreationForm()
+    return render(request, 'joballotment/user_form.html', {'form': form})
+
+
+@admin_section_provider('new_title')
+def new_title_section(request, data):
+    form = NewTitleForm(request.POST or None)
+    if request.method == 'POST':
+        if form.is_valid():
+            new_title_name = form.cleaned_data['title_name'].strip()
+            new_title_code = form.cleaned_data['title_code'].strip()
+            from .forms import JOB_TITLE_CHOICES
+            codes = [t[0].lower() for t in JOB_TITLE_CHOICES]
+            if new_title_code.lower() not in codes and new_title_name:
+                idx = next((i for i, t in enumerate(JOB_TITLE_CHOICES) if t[0] == 'Other'), len(JOB_TITLE_CHOICES))
+                JOB_TITLE_CHOICES.insert(idx, (new_title_code, new_title_name))
+                if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+                    return HttpResponse('<div class="alert alert-success">Title added successfully!</div>')
+                else:
+                    messages.success(request, 'Title added successfully!')
+                    return redirect(request.path)
+            else:
+                form.add_error('title_code', 'Title code already exists or is invalid.')
+    return render(request, 'joballotment/new_title.html', {'form': form})
+
+
+@admin_section_provider('bulk_import')
+def bulk_import_section(request, data):
+    form = BulkImportForm(request.POST or None, request.FILES or None)
+    context = {'form': form}
+    if request.method == 'POST' and form.is_valid():
+        importer = import_users if form.cleaned_data['kind'] == 'users' else import_jobs
+        context['result'] = importer(form.cleaned_data['file'])
+        context['kind'] = form.cleaned_data['kind']
+    return render(request, 'joballotment/admin_section_bulk_import.html', context)
+
+
+@admin_section_provider('search')
+def search_section(request, data):
+    return render_search_section(request)
+
+
+@admin_section_provider('analytics')
+def analytics_section(request, data):
+    # Reads only the rollup tables; see update_rollups
+    context = analytics_context(get_range_days(request))
+    context['range_urls'] = [(days, page_url(request, days=days)) for days in context['ranges']]
+    return render(request, 'joballotment/admin_section_analytics.html', context)
@@ -0,0 +1,220 @@
+import heapq
+from collections import defaultdict
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from .events import publish_job_event
+from .fragment_cache import bump_generation
+from .models import CustomUser, Job, VersionConflict
+from .work_stats import refresh_work_stats
+
+DEFAULT_CHUNK_SIZE = 1000
+# Open jobs a candidate may carry extra and still win for having handled
+# the job's title before / being in the job's department
+DEFAULT_TITLE_BONUS = 2
+DEFAULT_DEPARTMENT_BONUS = 1
+
+
+def unallotted_jobs():
+    # Open jobs still missing an assignee or a supervisor
+    return Job.objects.filter(Q(assigned_to__isnull=True) | Q(supervisor__isnull=True), status='pending')
+
+
+class LoadHeap:
+    """
+    Min-heap of (open jobs, pk) over some candidates, reading loads from a
+    dict shared by every heap of a pool. Loads only grow while allotting, so
+    a stale entry is simply re-keyed when it reaches the top.
+    """
+
+    def __init__(self, loads, user_ids=()):
+        self.loads = loads
+        self.heap = [(loads[user_id], user_id) for user_id in user_ids]
+        heapq.heapify(self.heap)
+
+    def push(self, user_id):
+        heapq.heappush(self.heap, (self.loads[user_id], user_id))
+
+    def peek(self):
+        while self.heap:
+            load, user_id = self.heap[0]
+            if load == self.loads[user_id]:
+                return user_id
+            heapq.heapreplace(self.heap, (self.loads[user_id], user_id))
+        return None
+
+
+class CandidatePool:
+    """
+    Active users of one role with their open-job counts, departments and
+    the titles they have handled, loaded with three queries. choose() picks
+    the candidate with the lowest open jobs minus bonuses in O(log n).
+    """
+
+    def __init__(self, role):
+        self.role = role
+        self.job_field = 'assigned_to' if role == 'user' else 'supervisor'
+        self.title_bonus = getattr(settings, 'ALLOTMENT_TITLE_BONUS', DEFAULT_TITLE_BONUS)
+        self.department_bonus = getattr(settings, 'ALLOTMENT_DEPARTMENT_BONUS', DEFAULT_DEPARTMENT_BONUS)
+        people = CustomUser.objects.filter(role=role, is_active=True).values_list('pk', 'department_code')
+        self.departments = {pk: department or '' for pk, department in people}
+        self.loads = dict.fromkeys(self.departments, 0)
+        jobs = Job.objects.filter(**{f'{self.job_field}__in': list(self.departments)})
+        rows = jobs.filter(status='pending').values(self.job_field).order_by().annotate(n=Count('pk'))
+        for row in rows:
+            self.loads[row[self.job_field]] = row['n']
+        self.titles = defaultdict(set)
+        for user_id, title in jobs.values_list(self.job_field, 'title').distinct().order_by():
+            self.titles[user_id].add(title)
+        # Every user is in the global heap, their department's heap, and the
+        # heaps of each title they handled alone and within their department
+        self.heaps = defaultdict(lambda: LoadHeap(self.loads))
+        self.heaps[None] = LoadHeap(self.loads, self.loads)
+        for user_id, department in self.departments.items():
+            self.heaps['department', department].push(user_id)
+            for title in self.titles[user_id]:
+                self.heaps['title', title].push(user_id)
+                self.heaps['title', title, department].push(user_id)
+
+    def cost(self, user_id, title, department):
+        cost = self.loads[user_id]
+        if title in self.titles[user_id]:
+            cost -= self.title_bonus
+        if department and self.departments[user_id] == department:
+            cost -= self.department_bonus
+        return cost
+
+    def choose(self, title, department=''):
+        """
+        Pick and charge one candidate for a job, or return None when the
+        pool is empty. The cheapest candidate is at the top of one of four
+        heaps (everyone, the department, the title, title and department),
+        so only those four are compared.
+        """
+        keys = [None, ('title', title)]
+        if department:
+            keys += [('department', department), ('title', title, department)]
+        candidates = {self.heaps[key].peek() for key in keys if key in self.heaps} - {None}
+        if not candidates:
+            return None
+        user_id = min(candidates, key=lambda pk: (self.cost(pk, title, department), self.loads[pk], pk))
+        self.loads[user_id] += 1
+        if title not in self.titles[user_id]:
+            self.titles[user_id].add(title)
+            self.heaps['title', title].push(user_id)
+            self.heaps['title', title, self.departments[user_id]].push(user_id)
+        return user_id
+
+
+class Allotter:
+    """Fills in missing assignees and supervisors from two candidate pools."""
+
+    def __init__(self):
+        self.users = CandidatePool('user')
+        self.supervisors = CandidatePool('supervisor')
+
+    def allot(self, job):
+        """
+        Set the missing assigned_to / supervisor of ``job`` in memory.
+        The supervisor is chosen first; the assignee then prefers the
+        supervisor's department. Returns True if anything was set.
+        """
+        changed = False
+        if job.supervisor_id is None:
+            department = self.users.departments.get(job.assigned_to_id, '')
+            job.supervisor_id = self.supervisors.choose(job.title, department)
+            changed |= job.supervisor_id is not None
+        if job.assigned_to_id is None:
+            department = self.supervisors.departments.get(job.supervisor_id, '')
+            job.assigned_to_id = self.users.choose(job.title, department)
+            changed |= job.assigned_to_id is not None
+        return changed
+
+
+def auto_allot_job(job):
+    """
+    Allot one job and save it like job_allotment does. Returns True if it
+    changed; raises VersionConflict if the job was written since it was read.
+    """
+    if not Allotter().allot(job):
+        return False
+    with transaction.atomic():
+        job.save(update_fields=['assigned_to', 'supervisor', 'allotted_at', 'updated_at'])
+        publish_job_event('job_allotted', job)
+    return True
+
+
+def save_allotments(jobs):
+    """
+    Write assigned_to, supervisor and the timestamps Job.save() would set,
+    and bump the row versions, with one executemany. bulk_update() builds a
+    CASE per field and row, which costs more to compile than the allotment
+    itself. Call inside a transaction. Jobs written since they were read (a
+    manual allotment, a claim) are skipped rather than overwritten; returns
+    the jobs that were saved.
+    """
+    # The rows stay locked until commit: on SQLite by the write transaction,
+    # elsewhere by FOR UPDATE. The version check in the UPDATE is a backstop.
+    current = dict(Job.objects.select_for_update().filter(pk__in=[job.pk for job in jobs]).values_list('pk', 'version'))
+    jobs = [job for job in jobs if current.get(job.pk) == job.version]
+    if not jobs:
+        return jobs
+    now = timezone.now()
+    for job in jobs:
+        job.updated_at = now
+        if job.assigned_to_id and job.allotted_at is None:
+            job.allotted_at = now
+    meta = Job._meta
+    fields = [meta.get_field(name) for name in ('assigned_to', 'supervisor', 'allotted_at', 'updated_at')]
+    version = connection.ops.quote_name(meta.get_field('version').column)
+    sql = 'UPDATE {} SET {}, {} = {} + 1 WHERE {} = %s AND {} = %s'.format(
+        connection.ops.quote_name(meta.db_table),
+        ', '.join(f'{connection.ops.quote_name(field.column)} = %s' for field in fields),
+        version, version,
+        connection.ops.quote_name(meta.pk.column),
+        version,
+    )
+    params = [
+        [field.get_db_prep_save(getattr(job, field.attname), connection) for field in fields] + [job.pk, job.version]
+        for job in jobs
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+        if cursor.rowcount != len(jobs):
+            raise VersionConflict(f'{len(jobs) - cursor.rowcount} allotted jobs changed while being saved')
+    for job in jobs:
+        job.version += 1
+    return jobs
+
+
+def auto_allot_pending(chunk_size=DEFAULT_CHUNK_SIZE, limit=None):
+    """
+    Allot every unallotted job (up to ``limit``) in pk order. Jobs are
+    allotted in memory against one Allotter, then written by
+    save_allotments() in one transaction per chunk; jobs written by someone
+    else meanwhile are skipped and left to the next run. Returns the
+    number of jobs changed.
+    """
+    allotter = Allotter()
+    last_id = 0
+    allotted = 0
+    while limit is None or allotted < limit:
+        size = chunk_size if limit is None else min(chunk_size, limit - allotted)
+        jobs = list(unallotted_jobs().filter(pk__gt=last_id).order_by('pk')[:size])
+        if not jobs:
+            break
+        last_id = jobs[-1].pk
+        changed = [job for job in jobs if allotter.allot(job)]
+        if not changed:
+            continue
+        with transaction.atomic():
+            changed = save_allotments(changed)
+            # No post_save is sent; recount and notify here
+            refresh_work_stats({pk for job in changed for pk in (job.assigned_to_id, job.supervisor_id)})
+            for job in changed:
+                publish_job_event('job_allotted', job)
+        allotted += len(changed)
+    if allotted:
+        bump_generation()
+    return allotted
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class JoballotmentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'joballotment'
+
+    def ready(self):
+        from . import signals, sqlite  # noqa: F401
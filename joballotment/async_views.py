@@ -0,0 +1,150 @@
+import asyncio
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import HttpResponse
+from django.shortcuts import render
+from .admin_sections import AdminSectionData, render_table_page
+from .conditional import conditional_section
+from .routers import read_only_view
+from .filters import JobFilter
+from .fragment_cache import cache_section
+from .models import CustomUser, Job, Report
+from .pagination import JOB_SORT_FIELDS, REVIEW_SORT_FIELDS, InvalidCursor, keyset_paginate
+from .review_inbox import review_page
+from .search import render_search_section
+from .views import is_admin, render_admin_section
+from .work_stats import get_work_stats, job_counters, work_summary_context
+from .workflow import supervisor_report_statuses, user_report_statuses
+
+# Async versions of admin_section, user_section and supervisor_section for
+# ASGI deployments (settings.ASYNC_SECTION_VIEWS). Independent queries are
+# awaited together; templates are rendered in a worker thread, since they
+# may still touch lazy relations such as request.user.
+
+
+async def _list(queryset):
+    return [obj async for obj in queryset]
+
+
+async def _render(request, template, context):
+    return await sync_to_async(render)(request, template, context)
+
+
+@login_required
+@read_only_view
+@conditional_section('user')
+@cache_section('user')
+async def user_section(request, section):
+    user = await request.auser()
+    jobs = Job.objects.filter(assigned_to=user)
+    reports = Report.objects.filter(submitted_by=user).select_related('job')
+    if section == 'search':
+        return await sync_to_async(render_search_section)(request)
+    elif section == 'assigned_jobs':
+        jobs, reports = await asyncio.gather(_list(jobs), _list(reports))
+        context = {'jobs': jobs, 'reports': reports, 'job_report_statuses': user_report_statuses(jobs, reports)}
+        return await _render(request, 'joballotment/user_section_assigned_jobs.html', context)
+    elif section == 'your_reports':
+        context = {'reports': await _list(reports)}
+        return await _render(request, 'joballotment/user_section_your_reports.html', context)
+    elif section == 'dashboard_summary':
+        context = work_summary_context(user, await sync_to_async(get_work_stats)(user))
+        return await _render(request, 'joballotment/user_section_dashboard_summary.html', context)
+    elif section == 'job_status':
+        job_filter = JobFilter(request.GET, 'user', user)
+        paginate = sync_to_async(keyset_paginate)(request, job_filter.apply(jobs), JOB_SORT_FIELDS, 'id')
+        try:
+            page, counters = await asyncio.gather(paginate, sync_to_async(job_counters)(jobs.filter(job_filter.q(status=False))))
+        except InvalidCursor:
+            return HttpResponse('Invalid cursor', status=400)
+        context = {'jobs': page.object_list, **counters, **job_filter.context()}
+        return await sync_to_async(render_table_page)(request, 'joballotment/user_section_job_status.html', context, page, JOB_SORT_FIELDS)
+    else:
+        return HttpResponse('Section not found', status=404)
+
+
+@login_required
+@read_only_view
+@conditional_section('supervisor')
+@cache_section('supervisor')
+async def supervisor_section(request, section):
+    if section == 'search':
+        return await sync_to_async(render_search_section)(request)
+    user = await request.auser()
+    jobs = Job.objects.filter(supervisor=user)
+    user_reports = Report.objects.filter(job__in=jobs.values('pk'), report_type='user')
+    supervisor_reports = Report.objects.filter(job__in=jobs.values('pk'), report_type='supervisor', submitted_by=user).select_related('job')
+    if section == 'dashboard_summary':
+        context = work_summary_context(user, await sync_to_async(get_work_stats)(user), supervisor=True)
+        return await _render(request, 'joballotment/supervisor_section_dashboard_summary.html', context)
+    elif section == 'jobs_to_supervise':
+        job_list, report_list, verified_job_ids = await asyncio.gather(
+            _list(jobs.select_related('assigned_to')),
+            _list(supervisor_reports),
+            _list(user_reports.filter(status='verified').values_list('job_id', flat=True)),
+        )
+        context = {
+            'jobs': job_list,
+            'jobs_with_verified_user_report': verified_job_ids,
+            'job_supervisor_report_statuses': supervisor_report_statuses(job_list, report_list),
+            'supervisor_reports': report_list,
+        }
+        return await _render(request, 'joballotment/supervisor_section_jobs_to_supervise.html', context)
+    elif section == 'user_reports_to_review':
+        try:
+            page, stats = await asyncio.gather(sync_to_async(review_page)(request, user), sync_to_async(get_work_stats)(user))
+        except InvalidCursor:
+            return HttpResponse('Invalid cursor', status=400)
+        context = {'user_reports_to_review': page.object_list, 'awaiting_review': stats.awaiting_review}
+        return await sync_to_async(render_table_page)(request, 'joballotment/supervisor_section_user_reports_to_review.html', context, page, REVIEW_SORT_FIELDS)
+    elif section == 'supervisor_job_status':
+        job_filter = JobFilter(request.GET, 'supervisor', user)
+        paginate = sync_to_async(keyset_paginate)(request, job_filter.apply(jobs).select_related('assigned_to'), JOB_SORT_FIELDS, 'id')
+        try:
+            page, counters = await asyncio.gather(paginate, sync_to_async(job_counters)(jobs.filter(job_filter.q(status=False))))
+        except InvalidCursor:
+            return HttpResponse('Invalid cursor', status=400)
+        context = {'jobs': page.object_list, **counters, **job_filter.context()}
+        return await sync_to_async(render_table_page)(request, 'joballotment/supervisor_section_job_status.html', context, page, JOB_SORT_FIELDS)
+    elif section == 'supervisor_reports':
+        context = {'supervisor_reports': await _list(supervisor_reports)}
+        return await _render(request, 'joballotment/supervisor_section_supervisor_reports.html', context)
+    else:
+        return HttpResponse('Section not found', status=404)
+
+
+async def user_search_section(request, data):
+    # The three candidate lookups of AdminSectionData.searched_user, at once
+    query = data.searched_user_id
+    name = ''
+    if query:
+        by_user_id, by_username, by_pk = await asyncio.gather(
+            CustomUser.objects.filter(user_id=query).afirst(),
+            CustomUser.objects.filter(username=query).afirst(),
+            CustomUser.objects.filter(id=int(query)).afirst() if query.isdigit() else asyncio.sleep(0),
+        )
+        user = by_user_id or by_username or by_pk
+        name = (user.get_full_name() or user.username) if user else 'User not found'
+    return await _render(request, 'joballotment/admin_section_user_search.html', {
+        'searched_user_id': query,
+        'searched_user_name': name,
+    })
+
+
+# Admin sections with a native async implementation; the rest run the sync
+# provider in a worker thread
+ASYNC_ADMIN_SECTIONS = {
+    'user_search': user_search_section,
+}
+
+
+@login_required
+@user_passes_test(is_admin)
+@read_only_view
+@conditional_section('admin')
+@cache_section('admin')
+async def admin_section(request, section):
+    provider = ASYNC_ADMIN_SECTIONS.get(section)
+    if provider is None or request.method != 'GET':
+        return await sync_to_async(render_admin_section)(request, section)
+    return await provider(request, AdminSectionData(request, section))
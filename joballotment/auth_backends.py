@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import transaction
+
+DEFAULT_TIMEOUT = 60
+
+
+def get_cache():
+    return caches[getattr(settings, 'AUTH_USER_CACHE_ALIAS', 'default')]
+
+
+def user_cache_key(user_id):
+    return f'joballotment:auth_user:{user_id}'
+
+
+def forget_user(user_id):
+    """Drop the cached user; on commit too, in case a request re-cached the old row meanwhile."""
+    get_cache().delete(user_cache_key(user_id))
+    transaction.on_commit(lambda: get_cache().delete(user_cache_key(user_id)))
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend whose get_user(), run by AuthenticationMiddleware on every
+    authenticated request, reads the user from the cache. Entries are
+    dropped whenever the user is saved or deleted (see signals.py), so a
+    role change takes effect and a password change ends the user's other
+    sessions on their next request.
+    """
+
+    def get_user(self, user_id):
+        cache = get_cache()
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+        return user
@@ -0,0 +1,410 @@
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.contrib.auth.hashers import make_password
+from django.db import OperationalError, connection, transaction
+from django.test import AsyncClient, Client
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+from .admin_sections import ADMIN_SECTIONS
+from .forms import JOB_TITLE_CHOICES, DEPARTMENT_CODE_CHOICES
+from .models import CustomUser, Job, Report
+from .workflow import WORKFLOW_STATE_FIELDS, apply_workflow_state, refresh_job_workflow
+
+USER_SECTIONS = ['assigned_jobs', 'your_reports', 'dashboard_summary', 'job_status']
+SUPERVISOR_SECTIONS = ['dashboard_summary', 'jobs_to_supervise', 'user_reports_to_review', 'supervisor_job_status', 'supervisor_reports']
+SECTIONS_BY_VIEW = {
+    'admin_section': [section for section in ADMIN_SECTIONS if section != 'create_actions'],
+    'user_section': USER_SECTIONS,
+    'supervisor_section': SUPERVISOR_SECTIONS,
+}
+# Not worth measuring: logging out ends the session the run relies on
+SKIPPED_URLS = {'logout'}
+ROLES = ['admin', 'user', 'supervisor']
+
+NUM_USERS = 50
+NUM_SUPERVISORS = 10
+BATCH_SIZE = 1000
+
+TIMING_RUNS = 3
+MIN_MS_BUDGET = 50
+MIN_PEAK_KB_BUDGET = 256
+
+
+def seed_dataset(num_jobs, seed=0):
+    """
+    Create one admin, NUM_USERS users, NUM_SUPERVISORS supervisors and
+    ``num_jobs`` jobs with user/supervisor reports in every workflow state.
+    The same seed always produces the same rows. The number of users is
+    fixed, so each user's share of the jobs grows with ``num_jobs``.
+    Returns {'admin': user, 'user': user, 'supervisor': user}.
+    """
+    rng = random.Random(seed)
+    password = make_password('bench@1234')
+    departments = [code for code, _ in DEPARTMENT_CODE_CHOICES if code]
+    titles = [code for code, _ in JOB_TITLE_CHOICES if code]
+    people = [CustomUser(username='bench_admin', role='admin', user_id='10000', password=password)]
+    for i in range(NUM_USERS + NUM_SUPERVISORS):
+        role = 'user' if i < NUM_USERS else 'supervisor'
+        people.append(CustomUser(
+            username=f'bench_{role}_{i}', role=role, user_id=str(10001 + i), password=password,
+            first_name=f'First{i}', last_name=f'Last{i}', email=f'bench{i}@example.com',
+            department_code=rng.choice(departments),
+        ))
+    CustomUser.objects.bulk_create(people)
+    users = list(CustomUser.objects.filter(role='user').order_by('pk'))
+    supervisors = list(CustomUser.objects.filter(role='supervisor').order_by('pk'))
+
+    start = timezone.now() - timedelta(days=365)
+    for offset in range(0, num_jobs, BATCH_SIZE):
+        jobs = []
+        for i in range(offset, min(offset + BATCH_SIZE, num_jobs)):
+            jobs.append(Job(
+                title=rng.choice(titles),
+                description=f'Benchmark job {i}',
+                assigned_to=rng.choice(users) if rng.random() < 0.9 else None,
+                supervisor=rng.choice(supervisors) if rng.random() < 0.9 else None,
+            ))
+        jobs = Job.objects.bulk_create(jobs)
+        reports = []
+        for job in jobs:
+            if not job.assigned_to or rng.random() < 0.3:
+                continue
+            user_verified = rng.random() < 0.6
+            reports.append(Report(
+                job=job, submitted_by=job.assigned_to, content=f'User report for job {job.pk}',
+                report_type='user', status='verified' if user_verified else 'pending',
+            ))
+            if user_verified and job.supervisor and rng.random() < 0.5:
+                supervisor_verified = rng.random() < 0.5
+                reports.append(Report(
+                    job=job, submitted_by=job.supervisor, content=f'Supervisor report for job {job.pk}',
+                    report_type='supervisor', status='verified' if supervisor_verified else 'pending',
+                ))
+                if supervisor_verified:
+                    job.status = 'completed'
+        Report.objects.bulk_create(reports)
+        by_job = {job.pk: {'user': None, 'supervisor': None} for job in jobs}
+        for report in reports:
+            by_job[report.job_id][report.report_type] = report
+        for job in jobs:
+            apply_workflow_state(job, by_job[job.pk]['user'], by_job[job.pk]['supervisor'])
+        # auto_now_add ignores explicit values, so spread created_at afterwards
+        for job in jobs:
+            job.created_at = start + timedelta(minutes=rng.randrange(365 * 24 * 60))
+        Job.objects.bulk_update(jobs, WORKFLOW_STATE_FIELDS + ['status', 'created_at'])
+    return {
+        'admin': CustomUser.objects.get(username='bench_admin'),
+        'user': users[0],
+        'supervisor': supervisors[0],
+    }
+
+
+def benchmark_urls(actor):
+    """
+    (label, url) for every GET route in joballotment/urls.py, with section
+    routes expanded to each section and ids taken from ``actor``'s data.
+    """
+    from . import urls
+
+    job = Job.objects.filter(assigned_to=actor).first() or Job.objects.first()
+    report = Report.objects.filter(submitted_by=actor).first() or Report.objects.first()
+    ids = {'job_id': job.pk, 'report_id': report.pk}
+    result = []
+    for pattern in urls.urlpatterns:
+        if not isinstance(pattern, URLPattern) or pattern.name in SKIPPED_URLS:
+            continue
+        converters = pattern.pattern.converters
+        if 'section' in converters:
+            for section in SECTIONS_BY_VIEW[pattern.name]:
+                result.append((f'{pattern.name}[{section}]', reverse(pattern.name, kwargs={'section': section})))
+        else:
+            result.append((pattern.name, reverse(pattern.name, kwargs={name: ids[name] for name in converters})))
+    return result
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(client, url):
+    """Query count, wall time (ms) and peak traced memory (KB) of one GET."""
+    client.get(url)  # warm template and URL caches
+    counter = QueryCounter()
+    # Unlike connection.queries, this is not capped at 9000 entries
+    with connection.execute_wrapper(counter):
+        started = time.perf_counter()
+        response = client.get(url)
+        elapsed = (time.perf_counter() - started) * 1000
+    # Best of a few runs for fast views, so one GC pause does not fail a budget
+    for _ in range(TIMING_RUNS - 1):
+        if elapsed > 1000:
+            break
+        started = time.perf_counter()
+        client.get(url)
+        elapsed = min(elapsed, (time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    try:
+        client.get(url)
+        peak = tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+    return {'status': response.status_code, 'queries': counter.count, 'ms': elapsed, 'peak_kb': peak}
+
+
+def run_benchmarks(actors):
+    """Measure every URL once per role. Returns {(role, label): measurement}."""
+    results = {}
+    for role in ROLES:
+        client = Client()
+        client.force_login(actors[role])
+        for label, url in benchmark_urls(actors[role]):
+            results[(role, label)] = measure(client, url)
+    return results
+
+
+def budget_key(role, label):
+    return f'{role}:{label}'
+
+
+def load_budgets(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def check_results(results_by_size, budgets):
+    """
+    Compare a run against the budgets. ``results_by_size`` maps dataset size
+    to run_benchmarks() output. Returns (rows, failures): one table row per
+    role/view/size and a list of failure messages. A view fails when it
+    exceeds its budget, or when its query count at a larger size is higher
+    than at the smallest one.
+    """
+    sizes = sorted(results_by_size)
+    rows = []
+    failures = []
+    for key in results_by_size[sizes[0]]:
+        name = budget_key(*key)
+        budget = budgets.get(name, {})
+        base_queries = results_by_size[sizes[0]][key]['queries']
+        for size in sizes:
+            result = results_by_size[size].get(key)
+            if result is None:
+                continue
+            problems = []
+            if result['queries'] > base_queries:
+                problems.append(f'queries grow with data ({base_queries} -> {result["queries"]})')
+            if 'queries' in budget and result['queries'] > budget['queries']:
+                problems.append(f'{result["queries"]} queries > budget {budget["queries"]}')
+            for metric in ('ms', 'peak_kb'):
+                limit = budget.get(metric, {}).get(str(size))
+                if limit is not None and result[metric] > limit:
+                    problems.append(f'{result[metric]:.0f} {metric} > budget {limit:.0f}')
+            rows.append((name, size, result, budget, problems))
+            failures.extend(f'{name} @ {size}: {problem}' for problem in problems)
+    return rows, failures
+
+
+def make_budgets(results_by_size, headroom=2.0):
+    """
+    Budgets from a run: exact query counts, ``headroom`` x time and memory,
+    with a floor so that sub-millisecond views do not fail on noise.
+    """
+    budgets = {}
+    for size, results in sorted(results_by_size.items()):
+        for key, result in results.items():
+            budget = budgets.setdefault(budget_key(*key), {'queries': result['queries'], 'ms': {}, 'peak_kb': {}})
+            budget['queries'] = min(budget['queries'], result['queries'])
+            budget['ms'][str(size)] = round(max(result['ms'] * headroom, MIN_MS_BUDGET), 1)
+            budget['peak_kb'][str(size)] = round(max(result['peak_kb'] * headroom, MIN_PEAK_KB_BUDGET), 1)
+    return budgets
+
+
+# Sections hit by the sync-vs-async load test, per role
+LOAD_SECTIONS = {
+    'admin': ['user_search', 'users_table', 'jobs_table'],
+    'user': USER_SECTIONS,
+    'supervisor': SUPERVISOR_SECTIONS,
+}
+SECTION_URL_NAMES = {'admin': 'admin_section', 'user': 'user_section', 'supervisor': 'supervisor_section'}
+
+
+class URLConf:
+    # ROOT_URLCONF stand-in; must be hashable for Django's resolver cache
+    def __init__(self, urlpatterns):
+        self.urlpatterns = urlpatterns
+
+
+def section_urlconf(section_views):
+    """
+    A ROOT_URLCONF with the dashboard sections served by ``section_views``
+    (views or async_views) and every other route as in joballotment/urls.py.
+    """
+    from . import urls
+
+    names = set(SECTION_URL_NAMES.values())
+    patterns = [pattern for pattern in urls.urlpatterns if getattr(pattern, 'name', None) not in names]
+    return URLConf(patterns + urls.section_urlpatterns(section_views))
+
+
+def load_requests(actors, total):
+    """``total`` (role, url) pairs cycling through LOAD_SECTIONS."""
+    urls = [
+        (role, reverse(SECTION_URL_NAMES[role], kwargs={'section': section}) + ('?search_user_id=10001' if section == 'user_search' else ''))
+        for role in ROLES
+        for section in LOAD_SECTIONS[role]
+    ]
+    return [urls[i % len(urls)] for i in range(total)]
+
+
+def login_cookies(actors):
+    cookies = {}
+    for role in ROLES:
+        client = Client()
+        client.force_login(actors[role])
+        cookies[role] = client.cookies
+    return cookies
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(latencies, wall):
+    return {
+        'requests': len(latencies),
+        'p50': percentile(latencies, 50),
+        'p99': percentile(latencies, 99),
+        'rps': len(latencies) / wall if wall else 0.0,
+    }
+
+
+def run_sync_load(cookies, requests, concurrency):
+    """Requests through the WSGI handler from ``concurrency`` threads."""
+    local = threading.local()
+
+    def get(role, url):
+        clients = getattr(local, 'clients', None)
+        if clients is None:
+            clients = local.clients = {}
+        if role not in clients:
+            clients[role] = Client()
+            clients[role].cookies.update(cookies[role])
+        started = time.perf_counter()
+        response = clients[role].get(url)
+        elapsed = (time.perf_counter() - started) * 1000
+        assert response.status_code == 200, (url, response.status_code)
+        return elapsed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(lambda request: get(*request), requests))
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def run_async_load(cookies, requests, concurrency):
+    """Requests through the ASGI handler, at most ``concurrency`` at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def get(role, url):
+        client = AsyncClient()
+        client.cookies.update(cookies[role])
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(url)
+            elapsed = (time.perf_counter() - started) * 1000
+        assert response.status_code == 200, (url, response.status_code)
+        return elapsed
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(get(role, url) for role, url in requests))
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def submit_report(job_id, author_id):
+    # What report_submit does for one report
+    with transaction.atomic():
+        job = Job.objects.get(pk=job_id)
+        Report.objects.create(job=job, submitted_by_id=author_id, content='Load test report', report_type='user')
+        refresh_job_workflow(job)
+
+
+def run_read_write_load(cookies, readers, writers, duration):
+    """
+    ``readers`` threads GET the user and supervisor sections while
+    ``writers`` threads submit reports, for ``duration`` seconds. Returns
+    the reads and writes completed per second and the operations that
+    failed with "database is locked".
+    """
+    urls = [
+        (role, reverse(SECTION_URL_NAMES[role], kwargs={'section': section}))
+        for role in ('user', 'supervisor')
+        for section in LOAD_SECTIONS[role]
+        if section != 'job_status'
+    ]
+    jobs = list(Job.objects.filter(assigned_to__isnull=False).values_list('pk', 'assigned_to_id')[:writers * 1000])
+    counts = {'reads': 0, 'writes': 0, 'locked': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def count(key):
+        with lock:
+            counts[key] += 1
+
+    def attempt(operation, key):
+        try:
+            operation()
+        except OperationalError as error:
+            if 'locked' not in str(error):
+                raise
+            count('locked')
+        else:
+            count(key)
+
+    def read(index):
+        clients = {}
+        for role in cookies:
+            clients[role] = Client()
+            clients[role].cookies.update(cookies[role])
+        try:
+            i = index
+            while time.perf_counter() < deadline:
+                role, url = urls[i % len(urls)]
+                attempt(lambda: clients[role].get(url), 'reads')
+                i += 1
+        finally:
+            connection.close()
+
+    def write(index):
+        # Each writer has its own jobs, so writes only contend for the lock
+        mine = jobs[index::writers]
+        try:
+            i = 0
+            while time.perf_counter() < deadline:
+                attempt(lambda: submit_report(*mine[i % len(mine)]), 'writes')
+                i += 1
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=readers + writers) as pool:
+        futures = [pool.submit(read, i) for i in range(readers)] + [pool.submit(write, i) for i in range(writers)]
+        for future in futures:
+            future.result()
+    wall = time.perf_counter() - started
+    return {'reads/s': counts['reads'] / wall, 'writes/s': counts['writes'] / wall, 'locked': counts['locked']}
@@ -0,0 +1,117 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .events import publish_job_event
+from .fragment_cache import bump_generation
+from .models import Job, Report
+from .work_stats import deferred_refresh, refresh_work_stats
+from .workflow import report_state_expression
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def _people(jobs):
+    return {pk for job in jobs for pk in (job.assigned_to_id, job.supervisor_id)}
+
+
+def allot_jobs(jobs, assigned_to=None, supervisor=None):
+    """Set the given assignee and/or supervisor on every job with one UPDATE."""
+    now = timezone.now()
+    values = {'updated_at': now, 'version': F('version') + 1}
+    if assigned_to:
+        values.update(assigned_to=assigned_to, allotted_at=Coalesce('allotted_at', Value(now)))
+    if supervisor:
+        values['supervisor'] = supervisor
+    previous = {job.pk: (job.assigned_to_id, job.supervisor_id) for job in jobs}
+    Job.objects.filter(pk__in=previous).update(**values)
+    for job in jobs:
+        if assigned_to:
+            job.assigned_to = assigned_to
+        if supervisor:
+            job.supervisor = supervisor
+    refresh_work_stats(_people(jobs) | {pk for pair in previous.values() for pk in pair})
+    for job in jobs:
+        publish_job_event('job_allotted', job, previous_recipients=previous[job.pk])
+    return dict.fromkeys(previous, (True, 'allotted'))
+
+
+def delete_jobs(jobs):
+    # The Job/Report delete receivers keep running; their work stats
+    # recounts are merged into one
+    with deferred_refresh():
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).delete()
+    return {job.pk: (True, 'deleted') for job in jobs}
+
+
+def complete_jobs(jobs, kind='job_completed'):
+    """
+    Mark the jobs completed (approved) and recompute their report status
+    columns in the same UPDATE, as report_verify and refresh_job_workflow
+    would one job at a time.
+    """
+    job_ids = [job.pk for job in jobs]
+    now = timezone.now()
+    Job.objects.filter(pk__in=job_ids).update(
+        status='completed',
+        completed_at=Coalesce('completed_at', Value(now)),
+        final_status='approved',
+        user_report_status=report_state_expression('user'),
+        supervisor_report_status=report_state_expression('supervisor'),
+        updated_at=now,
+        version=F('version') + 1,
+    )
+    jobs = list(Job.objects.filter(pk__in=job_ids))
+    refresh_work_stats(_people(jobs))
+    for job in jobs:
+        publish_job_event(kind, job)
+    return {job.pk: (True, 'completed') for job in jobs}
+
+
+def verify_jobs(jobs):
+    """Verify every pending report of the jobs; jobs without reports are left alone."""
+    job_ids = [job.pk for job in jobs]
+    reported = set(Report.objects.filter(job_id__in=job_ids).values_list('job_id', flat=True).distinct())
+    pending = Report.objects.filter(job_id__in=reported, status='pending')
+    with deferred_refresh():
+        refresh_work_stats(set(pending.values_list('submitted_by_id', flat=True)))
+        pending.update(status='verified', version=F('version') + 1)
+        results = complete_jobs([job for job in jobs if job.pk in reported], kind='report_verified')
+    results = {pk: (True, 'verified') for pk in results}
+    results.update({job.pk: (False, 'No report to verify') for job in jobs if job.pk not in reported})
+    return results
+
+
+BULK_ACTIONS = {
+    'allot': allot_jobs,
+    'delete': delete_jobs,
+    'verify': verify_jobs,
+    'complete': complete_jobs,
+}
+
+
+def run_bulk_action(action, job_ids, assigned_to=None, supervisor=None, chunk_size=None):
+    """
+    Apply ``action`` to ``job_ids`` in chunks, one transaction per chunk.
+    Returns one {'job_id', 'ok', 'result' or 'error'} per requested id, in
+    request order; ids of jobs that do not exist fail with 'Job not found'.
+    """
+    chunk_size = chunk_size or getattr(settings, 'BULK_ACTION_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    handler = BULK_ACTIONS[action]
+    kwargs = {'assigned_to': assigned_to, 'supervisor': supervisor} if action == 'allot' else {}
+    job_ids = list(dict.fromkeys(job_ids))
+    outcomes = {}
+    for start in range(0, len(job_ids), chunk_size):
+        chunk = job_ids[start:start + chunk_size]
+        with transaction.atomic():
+            jobs = list(Job.objects.filter(pk__in=chunk))
+            if jobs:
+                outcomes.update(handler(jobs, **kwargs))
+    if outcomes:
+        bump_generation()
+    results = []
+    for job_id in job_ids:
+        ok, message = outcomes.get(job_id, (False, 'Job not found'))
+        results.append({'job_id': job_id, 'ok': ok, 'result' if ok else 'error': message})
+    return results
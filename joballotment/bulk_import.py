@@ -0,0 +1,187 @@
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from .forms import JobImportForm, UserImportForm
+from .fragment_cache import bump_generation
+from .models import CustomUser, Job
+from .user_ids import reserve_user_ids
+from .user_lookup import bump_users_generation
+from .work_stats import refresh_work_stats
+
+USER_COLUMNS = ['username', 'password', 'email', 'role', 'first_name', 'last_name', 'department_code', 'department_name', 'designation']
+# assigned_to / supervisor hold a user_id or a username
+JOB_COLUMNS = ['title', 'description', 'assigned_to', 'supervisor', 'remark']
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        # (line number, {field: [messages]})
+        self.errors = []
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+    def write_error_report(self, out):
+        writer = csv.writer(out)
+        writer.writerow(['line', 'field', 'error'])
+        for line, errors in self.errors:
+            for field, messages in errors.items():
+                for message in messages:
+                    writer.writerow([line, field, message])
+
+
+def _init_worker():
+    # Spawned workers (macOS/Windows) start without a configured Django
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def hash_passwords(passwords, executor=None):
+    if executor is None:
+        return [make_password(password) for password in passwords]
+    return list(executor.map(make_password, passwords, chunksize=max(1, len(passwords) // (os.cpu_count() or 1))))
+
+
+def iter_batches(rows, batch_size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def read_csv(file):
+    """DictReader over an uploaded or opened file, binary or text."""
+    if isinstance(file, io.TextIOBase):
+        text = file
+    else:
+        text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    # Data starts on line 2, after the header
+    return enumerate(csv.DictReader(text), start=2)
+
+
+def form_errors(form):
+    return {field: [error['message'] for error in errors] for field, errors in form.errors.get_json_data().items()}
+
+
+def _clean(row, columns):
+    return {column: (row.get(column) or '').strip() for column in columns}
+
+
+def import_users(file, batch_size=DEFAULT_BATCH_SIZE, workers=1):
+    """
+    Stream users from a CSV with USER_COLUMNS. Each batch is validated with
+    UserImportForm, duplicate usernames are found with one query per batch,
+    passwords are hashed in a pool of ``workers`` processes (in-process by
+    default; the web upload must not fork its server) and the valid rows
+    are inserted with bulk_create in one transaction per batch.
+    """
+    result = ImportResult()
+    seen = set()
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) if workers > 1 else None
+    try:
+        for batch in iter_batches(read_csv(file), batch_size):
+            valid = []
+            for line, row in batch:
+                data = _clean(row, USER_COLUMNS)
+                data['password1'] = data['password2'] = data.pop('password')
+                form = UserImportForm(data)
+                if not form.is_valid():
+                    result.errors.append((line, form_errors(form)))
+                    continue
+                username = form.cleaned_data['username'].lower()
+                if username in seen:
+                    result.errors.append((line, {'username': ['Duplicate username in file.']}))
+                    continue
+                seen.add(username)
+                valid.append((line, form))
+            taken = set(
+                CustomUser.objects.annotate(username_lower=Lower('username'))
+                .filter(username_lower__in=[form.cleaned_data['username'].lower() for _, form in valid])
+                .values_list('username_lower', flat=True)
+            )
+            users = []
+            passwords = []
+            for line, form in valid:
+                if form.cleaned_data['username'].lower() in taken:
+                    result.errors.append((line, {'username': ['A user with that username already exists.']}))
+                    continue
+                users.append(form.instance)
+                passwords.append(form.cleaned_data['password1'])
+            if not users:
+                continue
+            for user, hashed in zip(users, hash_passwords(passwords, executor)):
+                user.password = hashed
+            with transaction.atomic():
+                for user, user_id in zip(users, reserve_user_ids(len(users))):
+                    user.user_id = user_id
+                CustomUser.objects.bulk_create(users)
+            result.created += len(users)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    # Rows rejected by the batch username check are appended after the form errors
+    result.errors.sort(key=lambda error: error[0])
+    if result.created:
+        # bulk_create sends no post_save
+        bump_generation()
+        bump_users_generation()
+    return result
+
+
+def import_jobs(file, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Stream jobs from a CSV with JOB_COLUMNS. Rows are validated with
+    JobImportForm; assignees and supervisors of a batch are looked up in one
+    query and must have the 'user' and 'supervisor' role, as in JobForm.
+    Valid rows are inserted with bulk_create in one transaction per batch.
+    """
+    result = ImportResult()
+    for batch in iter_batches(read_csv(file), batch_size):
+        rows = [(line, _clean(row, JOB_COLUMNS)) for line, row in batch]
+        refs = {data[field] for _, data in rows for field in ('assigned_to', 'supervisor') if data[field]}
+        matches = list(CustomUser.objects.filter(Q(user_id__in=refs) | Q(username__in=refs)).only('id', 'user_id', 'username', 'role'))
+        # A user_id match wins over a username match, as in ajax_user_search
+        people = {user.username: user for user in matches}
+        people.update({user.user_id: user for user in matches if user.user_id})
+        jobs = []
+        for line, data in rows:
+            form = JobImportForm(data)
+            errors = {}
+            if not form.is_valid():
+                errors = form_errors(form)
+            for field, role in (('assigned_to', 'user'), ('supervisor', 'supervisor')):
+                ref = data[field]
+                if not ref:
+                    continue
+                person = people.get(ref)
+                if person is None or person.role != role:
+                    errors.setdefault(field, []).append(f'No {role} with user ID or username "{ref}".')
+                else:
+                    setattr(form.instance, field, person)
+            if errors:
+                result.errors.append((line, errors))
+                continue
+            jobs.append(form.instance)
+        if jobs:
+            with transaction.atomic():
+                Job.objects.bulk_create(jobs)
+                # bulk_create sends no post_save, so recount the people here
+                refresh_work_stats({user_id for job in jobs for user_id in (job.assigned_to_id, job.supervisor_id)})
+            result.created += len(jobs)
+    if result.created:
+        bump_generation()
+    return result
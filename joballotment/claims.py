@@ -0,0 +1,86 @@
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .events import publish_job_event
+from .fragment_cache import bump_generation
+from .models import Job
+from .work_stats import refresh_work_stats
+
+# Claims retried after losing a race for the chosen job (not on SQLite,
+# where the UPDATE and its subquery run under one write lock)
+MAX_CLAIM_ATTEMPTS = 5
+
+
+def claimable_jobs(user):
+    """
+    Unassigned open jobs ``user`` may claim, highest priority and oldest
+    first: jobs whose supervisor is in the user's department, plus jobs
+    without a department. Ordered like job_claim_queue_idx.
+    """
+    jobs = Job.objects.filter(assigned_to__isnull=True, status='pending')
+    if user.department_code:
+        jobs = jobs.filter(
+            Q(supervisor__department_code=user.department_code)
+            | Q(supervisor__department_code__isnull=True)
+            | Q(supervisor__department_code='')
+        )
+    return jobs.order_by('-priority', 'created_at', 'pk')
+
+
+def _claim_statement(user):
+    """
+    UPDATE assigning the first claimable job to ``user`` WHERE it is still
+    unassigned, returning its pk. The job is picked by a subquery of the
+    same statement, so two claimers can never both get it.
+    """
+    meta = Job._meta
+    quote = connection.ops.quote_name
+    now = timezone.now()
+    candidate, candidate_params = claimable_jobs(user).values('pk')[:1].query.sql_with_params()
+    assigned_to = quote(meta.get_field('assigned_to').column)
+    allotted_at = quote(meta.get_field('allotted_at').column)
+    updated_at = quote(meta.get_field('updated_at').column)
+    version = quote(meta.get_field('version').column)
+    pk = quote(meta.pk.column)
+    sql = (
+        f'UPDATE {quote(meta.db_table)} '
+        f'SET {assigned_to} = %s, {allotted_at} = COALESCE({allotted_at}, %s), {updated_at} = %s, '
+        f'{version} = {version} + 1 '
+        f'WHERE {pk} = ({candidate}) AND {assigned_to} IS NULL '
+        f'RETURNING {pk}'
+    )
+    stamp = meta.get_field('updated_at').get_db_prep_save(now, connection)
+    return sql, [user.pk, stamp, stamp, *candidate_params]
+
+
+def _claim(user):
+    with transaction.atomic():
+        # The UPDATE is the transaction's first statement, so on SQLite it
+        # takes the write lock right away (waiting out other writers)
+        # instead of upgrading a read lock later
+        with connection.cursor() as cursor:
+            cursor.execute(*_claim_statement(user))
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        job = Job.objects.get(pk=row[0])
+        # No post_save is sent; recount and notify here
+        refresh_work_stats([user.pk, job.supervisor_id])
+        publish_job_event('job_allotted', job)
+    return job
+
+
+def claim_next_job(user):
+    """
+    Assign the highest-priority claimable job to ``user`` and return it, or
+    None when there is nothing left to claim. Safe to call from many
+    workers at once: each job goes to exactly one claimer.
+    """
+    for attempt in range(MAX_CLAIM_ATTEMPTS):
+        job = _claim(user)
+        if job is not None:
+            bump_generation()
+            return job
+        if not claimable_jobs(user).exists():
+            return None
+    return None
@@ -0,0 +1,106 @@
+import hashlib
+from functools import wraps
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.views.decorators.http import condition
+from .fragment_cache import get_generation
+from .models import CustomUser, Job, Report
+
+# Admin sections whose content is derived from jobs/reports or from users.
+# The other admin sections are forms and carry no validator.
+ADMIN_JOB_SECTIONS = {'jobs_table', 'reports_table', 'search'}
+ADMIN_USER_SECTIONS = {'users_table', 'user_search'}
+
+
+def _stamp(queryset, field):
+    # One aggregate query: (row count, latest timestamp)
+    stats = queryset.aggregate(count=Count('pk'), latest=Max(field))
+    return stats['count'], stats['latest'].isoformat() if stats['latest'] else ''
+
+
+def data_stamps(area, section, user):
+    """
+    Row counts and latest timestamps of the data a section reads, or None
+    when the section should not be validated.
+    """
+    if area == 'user':
+        return [
+            _stamp(Job.objects.filter(assigned_to=user), 'updated_at'),
+            _stamp(Report.objects.filter(submitted_by=user), 'submitted_at'),
+        ]
+    if area == 'supervisor':
+        jobs = Job.objects.filter(supervisor=user)
+        return [
+            _stamp(jobs, 'updated_at'),
+            _stamp(Report.objects.filter(job__in=jobs.values('pk')), 'submitted_at'),
+        ]
+    if section in ADMIN_JOB_SECTIONS:
+        return [_stamp(Job.objects.all(), 'updated_at'), _stamp(Report.objects.all(), 'submitted_at')]
+    if section in ADMIN_USER_SECTIONS:
+        return [_stamp(CustomUser.objects.all(), 'date_joined')]
+    return None
+
+
+def section_etag(area):
+    """
+    ETag function for condition(). Report status changes keep counts and
+    submitted_at as they are, so the fragment-cache generation (bumped on
+    every model write) is mixed in as well, and so are the CSRF cookie and
+    session key the page was rendered for.
+    """
+    def etag(request, section='dashboard', *args, **kwargs):
+        if request.method != 'GET' or not request.user.is_authenticated:
+            return None
+        # A 304 would hide flash messages waiting to be shown
+        if len(messages.get_messages(request)):
+            return None
+        stamps = data_stamps(area, section, request.user)
+        if stamps is None:
+            return None
+        # Pages may embed a csrf_token, which must not outlive the CSRF
+        # secret or the session it was rendered for (both rotate on login)
+        csrf_secret = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+        session_key = request.session.session_key
+        raw = repr((area, section, request.user.pk, request.get_full_path(), get_generation(), stamps, csrf_secret, session_key))
+        return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+    return etag
+
+
+def conditional_section(area):
+    """
+    Answer If-None-Match with 304 before the view runs. Responses are marked
+    private and no-cache, so browsers keep them but revalidate every time.
+    Works on sync and async views.
+    """
+    etag_func = section_etag(area)
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            # condition() would run the ETag queries on the event loop
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                etag = await sync_to_async(etag_func)(request, *args, **kwargs)
+                etag = quote_etag(etag) if etag else None
+                response = get_conditional_response(request, etag=etag)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                if etag:
+                    response.headers.setdefault('ETag', etag)
+                    patch_cache_control(response, private=True, no_cache=True)
+                return response
+            return async_wrapper
+
+        conditional_view = condition(etag_func=etag_func)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.has_header('ETag'):
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
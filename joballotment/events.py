@@ -0,0 +1,104 @@
+import asyncio
+import json
+import threading
+from django.conf import settings
+from django.db import transaction
+from .workflow import job_status_labels
+
+# Events queued per connection before it is told to reload instead
+DEFAULT_QUEUE_SIZE = 100
+RESYNC = {'event': 'resync'}
+
+
+class Subscription:
+    def __init__(self, user_id, role, loop, queue_size):
+        self.user_id = user_id
+        self.role = role
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def wants(self, recipients):
+        # Admins get every event, users and supervisors those about their jobs
+        return self.role == 'admin' or self.user_id in recipients
+
+    def put(self, event):
+        # Runs on the subscriber's event loop
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A slow client misses events; tell it to reload once it catches up
+            self.overflowed = True
+
+    async def get(self):
+        if self.overflowed and self.queue.empty():
+            self.overflowed = False
+            return RESYNC
+        return await self.queue.get()
+
+
+class Broadcaster:
+    """
+    In-process fan-out of change events to the open SSE connections of this
+    worker. publish() may be called from any thread; each subscription's
+    queue is only touched on its own event loop.
+    """
+
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id, role):
+        queue_size = getattr(settings, 'EVENT_QUEUE_SIZE', DEFAULT_QUEUE_SIZE)
+        subscription = Subscription(user_id, role, asyncio.get_running_loop(), queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event, recipients):
+        with self._lock:
+            subscriptions = [s for s in self._subscriptions if s.wants(recipients)]
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # Loop already closed; the connection is going away
+                pass
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+
+broadcaster = Broadcaster()
+
+
+def job_event(kind, job, report=None):
+    return {
+        'event': kind,
+        'job_id': job.id,
+        'report_id': report.id if report else None,
+        'title': job.title,
+        'status': job.status,
+        **job_status_labels(job),
+    }
+
+
+def publish_job_event(kind, job, report=None, previous_recipients=()):
+    """
+    Send ``kind`` to the admins and to the job's assignee and supervisor once
+    the current transaction commits. ``previous_recipients`` are user pks
+    that should hear about the change too, e.g. the old assignee.
+    """
+    event = job_event(kind, job, report)
+    recipients = {job.assigned_to_id, job.supervisor_id, *previous_recipients} - {None}
+    transaction.on_commit(lambda: broadcaster.publish(event, recipients))
+
+
+def format_sse(event):
+    return f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
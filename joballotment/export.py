@@ -0,0 +1,60 @@
+import csv
+from itertools import islice
+from .workflow import build_job_workflow
+
+EXPORT_CHUNK_SIZE = 2000
+
+JOB_EXPORT_HEADER = [
+    'job_id', 'title', 'description', 'remark', 'status',
+    'assigned_to', 'assigned_to_user_id', 'supervisor', 'supervisor_user_id',
+    'user_status', 'supervisor_status', 'final_status', 'ready_for_admin_verification',
+    'created_at', 'updated_at', 'user_report_submitted_at', 'supervisor_report_submitted_at',
+]
+
+
+class Echo:
+    # File-like object whose write() hands the line back to the caller
+    def write(self, value):
+        return value
+
+
+def _timestamp(value):
+    return value.isoformat() if value else ''
+
+
+def job_export_rows(jobs, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield JOB_EXPORT_HEADER and then one row per job. ``jobs`` is read with
+    iterator() and the workflow statuses are computed per chunk with
+    build_job_workflow(), so memory stays flat however many jobs there are.
+    """
+    yield JOB_EXPORT_HEADER
+    jobs = jobs.select_related('assigned_to', 'supervisor').order_by('pk').iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(jobs, chunk_size))
+        if not chunk:
+            return
+        workflow = build_job_workflow(chunk)
+        for job in chunk:
+            reports = workflow['reports'][job.id]
+            yield [
+                job.id, job.title, job.description, job.remark, job.status,
+                job.assigned_to.username if job.assigned_to else '',
+                job.assigned_to.user_id if job.assigned_to else '',
+                job.supervisor.username if job.supervisor else '',
+                job.supervisor.user_id if job.supervisor else '',
+                workflow['job_user_statuses'][job.id],
+                workflow['job_supervisor_statuses'][job.id],
+                workflow['job_final_statuses'][job.id],
+                'yes' if workflow['job_statuses'][job.id] else 'no',
+                _timestamp(job.created_at), _timestamp(job.updated_at),
+                _timestamp(reports['user'] and reports['user'].submitted_at),
+                _timestamp(reports['supervisor'] and reports['supervisor'].submitted_at),
+            ]
+
+
+def stream_jobs_csv(jobs, chunk_size=EXPORT_CHUNK_SIZE):
+    """CSV text of job_export_rows(), one line at a time."""
+    writer = csv.writer(Echo())
+    for row in job_export_rows(jobs, chunk_size):
+        yield writer.writerow(row)
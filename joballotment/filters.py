@@ -0,0 +1,130 @@
+from datetime import datetime, time, timedelta
+from django.db.models import Case, Exists, OuterRef, Q, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from .models import Report
+
+
+def _parse_day(value):
+    try:
+        return parse_date(value) if value else None
+    except ValueError:
+        return None
+
+
+def date_range_q(field, date_from=None, date_to=None):
+    """
+    Q for ``field`` (a DateTimeField) falling on or between the given
+    YYYY-MM-DD days in the current time zone. Unlike ``__date__gte`` this
+    compares the bare column, so an index on it can serve the range.
+    Empty or malformed bounds are ignored.
+    """
+    q = Q()
+    day_from = _parse_day(date_from)
+    day_to = _parse_day(date_to)
+    if day_from:
+        q &= Q(**{f'{field}__gte': timezone.make_aware(datetime.combine(day_from, time.min))})
+    if day_to:
+        q &= Q(**{f'{field}__lt': timezone.make_aware(datetime.combine(day_to + timedelta(days=1), time.min))})
+    return q
+
+
+def _parse_pk(value):
+    return int(value) if value and value.isdigit() else None
+
+
+# ?status= values each role's job lists understand
+STATUS_FILTERS = {
+    'admin': ['pending', 'completed'],
+    'user': ['pending', 'submitted', 'verified'],
+    'supervisor': ['pending', 'submitted', 'verified'],
+}
+
+
+class JobFilter:
+    """
+    The status, date_from, date_to, assigned_to, supervisor and title
+    parameters of a job list, turned into SQL predicates so the database
+    filters before a page is cut.
+
+    ``status`` depends on the role: admins filter on Job.status, users on
+    their own user report of the job (pending: none, submitted: not yet
+    verified, verified) and supervisors on their own supervisor report
+    (pending: none, submitted: job still open, verified: job completed).
+    Report conditions are Exists subqueries. Dates are half-open ranges on
+    created_at, or for admins on the submitted_at of the job's reports.
+    """
+
+    def __init__(self, params, role='admin', user=None):
+        self.role = role
+        self.user = user
+        status = params.get('status', 'all')
+        self.status = status if status in STATUS_FILTERS[role] else 'all'
+        self.date_from = params.get('date_from') or ''
+        self.date_to = params.get('date_to') or ''
+        self.assigned_to = _parse_pk(params.get('assigned_to'))
+        self.supervisor = _parse_pk(params.get('supervisor'))
+        self.title = params.get('title') or ''
+
+    def _own_report(self, **filters):
+        report_type = 'supervisor' if self.role == 'supervisor' else 'user'
+        return Exists(Report.objects.filter(job=OuterRef('pk'), report_type=report_type, submitted_by=self.user, **filters))
+
+    def date_q(self):
+        if self.role != 'admin':
+            return date_range_q('created_at', self.date_from, self.date_to)
+        if not (_parse_day(self.date_from) or _parse_day(self.date_to)):
+            return Q()
+        # Jobs with a report inside the window
+        return Q(Exists(Report.objects.filter(date_range_q('submitted_at', self.date_from, self.date_to), job=OuterRef('pk'))))
+
+    def status_q(self):
+        if self.status == 'all':
+            return Q()
+        if self.role == 'admin':
+            return Q(status=self.status)
+        if self.status == 'pending':
+            return ~Q(self._own_report())
+        if self.role == 'user':
+            verified = Q(self._own_report(status='verified'))
+            return verified if self.status == 'verified' else Q(self._own_report()) & ~verified
+        completed = Q(status='completed')
+        return Q(self._own_report()) & (completed if self.status == 'verified' else ~completed)
+
+    def q(self, status=True):
+        """Every predicate ANDed; ``status=False`` leaves out the status one."""
+        q = self.date_q()
+        if status:
+            q &= self.status_q()
+        if self.assigned_to:
+            q &= Q(assigned_to_id=self.assigned_to)
+        if self.supervisor:
+            q &= Q(supervisor_id=self.supervisor)
+        if self.title:
+            q &= Q(title=self.title)
+        return q
+
+    def report_label(self):
+        """Case expression for the Pending/Submitted/Verified badge of a user or supervisor."""
+        if self.role == 'user':
+            verified = Q(self._own_report(status='verified'))
+        else:
+            verified = Q(self._own_report()) & Q(status='completed')
+        return Case(
+            When(verified, then=Value('Verified')),
+            When(self._own_report(), then=Value('Submitted')),
+            default=Value('Pending'),
+        )
+
+    def apply(self, jobs):
+        jobs = jobs.filter(self.q())
+        if self.role != 'admin':
+            jobs = jobs.annotate(report_label=self.report_label())
+        return jobs
+
+    def context(self):
+        return {
+            'filter_status': self.status,
+            'date_from': self.date_from,
+            'date_to': self.date_to,
+        }
@@ -1,5 +1,6 @@
 from django import forms
 from .models import Job, Report, CustomUser
+from .widgets import UserAutocompleteWidget
 from django.contrib.auth.forms import UserCreationForm
 
 JOB_TITLE_CHOICES = [
@@ -19,7 +20,11 @@ class JobForm(forms.ModelForm):
     job_title_dropdown = forms.ChoiceField(choices=JOB_TITLE_CHOICES, required=False, label='Job Title (select)')
     class Meta:
         model = Job
-        fields = ['title', 'job_title_dropdown', 'description', 'assigned_to', 'supervisor', 'remark']
+        fields = ['title', 'job_title_dropdown', 'description', 'priority', 'assigned_to', 'supervisor', 'remark']
+        widgets = {
+            'assigned_to': UserAutocompleteWidget(role='user'),
+            'supervisor': UserAutocompleteWidget(role='supervisor'),
+        }
 
     def clean(self):
         cleaned_data = super().clean()
@@ -57,7 +62,45 @@ class CustomUserCreationForm(UserCreationForm):
 class JobAllotmentForm(forms.ModelForm):
     class Meta:
         model = Job
-        fields = ['assigned_to', 'supervisor']
+        # version is posted back so the save can detect concurrent edits
+        fields = ['assigned_to', 'supervisor', 'version']
+        widgets = {**JobForm.Meta.widgets, 'version': forms.HiddenInput}
+
+class IdListField(forms.Field):
+    # Repeated values of one parameter, e.g. the checked rows of a table
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        if not value:
+            return []
+        try:
+            return [int(job_id) for job_id in value]
+        except (TypeError, ValueError):
+            raise forms.ValidationError('IDs must be numbers.')
+
+class BulkJobActionForm(forms.Form):
+    ACTION_CHOICES = [
+        ('allot', 'Allot / re-allot'),
+        ('verify', 'Mark verified'),
+        ('complete', 'Mark completed'),
+        ('delete', 'Delete'),
+    ]
+    # The controls are rendered in the jobs table section and join the
+    # #bulk-action-form of admin_dashboard.html through their form attribute
+    action = forms.ChoiceField(choices=ACTION_CHOICES, widget=forms.Select(attrs={'form': 'bulk-action-form'}))
+    job_ids = IdListField()
+    # Role constraints are checked here once for the whole selection
+    assigned_to = forms.ModelChoiceField(queryset=CustomUser.objects.filter(role='user'), required=False, widget=UserAutocompleteWidget(role='user', attrs={'form': 'bulk-action-form'}))
+    supervisor = forms.ModelChoiceField(queryset=CustomUser.objects.filter(role='supervisor'), required=False, widget=UserAutocompleteWidget(role='supervisor', attrs={'form': 'bulk-action-form'}))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('action') == 'allot' and not (cleaned_data.get('assigned_to') or cleaned_data.get('supervisor')):
+            raise forms.ValidationError('Choose a user and/or a supervisor to allot the jobs to.')
+        return cleaned_data
+
+class ReportVerifyForm(forms.Form):
+    report_ids = IdListField()
 
 class ReportForm(forms.ModelForm):
     class Meta:
@@ -66,4 +109,26 @@ class ReportForm(forms.ModelForm):
 
 class NewTitleForm(forms.Form):
     title_name = forms.CharField(label='Title Name', max_length=255, required=True)
-    title_code = forms.CharField(label='Title Code', max_length=50, required=True) 
\ No newline at end of file
+    title_code = forms.CharField(label='Title Code', max_length=50, required=True) 
+class UserImportForm(CustomUserCreationForm):
+    """
+    CustomUserCreationForm rules for one CSV row. Uniqueness is checked for a
+    whole batch by bulk_import, so the per-row username query is skipped.
+    """
+    def clean_username(self):
+        return self.cleaned_data.get('username')
+
+    def validate_unique(self):
+        pass
+
+class JobImportForm(JobForm):
+    """
+    JobForm rules for one CSV row. assigned_to and supervisor are resolved
+    and role-checked for a whole batch by bulk_import.
+    """
+    class Meta(JobForm.Meta):
+        fields = ['title', 'job_title_dropdown', 'description', 'remark']
+
+class BulkImportForm(forms.Form):
+    kind = forms.ChoiceField(choices=[('users', 'Users'), ('jobs', 'Jobs')])
+    file = forms.FileField(label='CSV file')
@@ -0,0 +1,123 @@
+import hashlib
+from functools import wraps
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+# Bumped on every Job/Report/CustomUser write; part of every fragment key, so
+# older fragments are never read again and simply expire.
+GENERATION_KEY = 'joballotment:fragments:generation'
+HITS_KEY = 'joballotment:fragments:hits'
+MISSES_KEY = 'joballotment:fragments:misses'
+
+
+def get_cache():
+    return caches[getattr(settings, 'SECTION_CACHE_ALIAS', 'default')]
+
+
+def _incr(key):
+    cache = get_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Missing or evicted counter
+        cache.add(key, 0, timeout=None)
+        return cache.incr(key)
+
+
+def get_generation(key=GENERATION_KEY):
+    generation = get_cache().get(key)
+    if generation is None:
+        get_cache().add(key, 1, timeout=None)
+        generation = get_cache().get(key, 1)
+    return generation
+
+
+def bump_generation(key=GENERATION_KEY):
+    # Any write to the models behind the dashboards; other counters (e.g.
+    # user_lookup's) pass their own key
+    _incr(key)
+
+
+def fragment_cache_stats():
+    cache = get_cache()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'generation': get_generation(),
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / total if total else 0.0,
+    }
+
+
+def fragment_key(request, area, section):
+    user = request.user
+    query = sorted(request.GET.lists())
+    raw = repr((area, section, getattr(user, 'role', ''), user.pk, query))
+    digest = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+    return f'joballotment:fragment:{get_generation()}:{digest}'
+
+
+def _cached_response(request, area, section):
+    # (key, cached response or None) for a GET that may use the cache
+    key = fragment_key(request, area, section)
+    cached = get_cache().get(key)
+    if cached is None:
+        _incr(MISSES_KEY)
+        return key, None
+    _incr(HITS_KEY)
+    content, content_type = cached
+    response = HttpResponse(content, content_type=content_type)
+    response['X-Fragment-Cache'] = 'hit'
+    return key, response
+
+
+def _store_response(request, key, response, timeout):
+    if (
+        response.status_code == 200
+        and not response.streaming
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+    ):
+        get_cache().set(key, (response.content, response['Content-Type']), timeout)
+    response['X-Fragment-Cache'] = 'miss'
+
+
+def cache_section(area):
+    """
+    Cache the GET responses of a ``view(request, section)`` dashboard view per
+    section, role, user and query string. Fragments that embed a CSRF token
+    are never stored, since the token belongs to the requesting session.
+    Works on sync and async views.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, section, *args, **kwargs):
+                timeout = getattr(settings, 'SECTION_CACHE_TIMEOUT', 300)
+                if request.method != 'GET' or not timeout:
+                    return await view(request, section, *args, **kwargs)
+                # fragment_key() reads request.user, which is sync-only
+                key, response = await sync_to_async(_cached_response)(request, area, section)
+                if response is not None:
+                    return response
+                response = await view(request, section, *args, **kwargs)
+                await sync_to_async(_store_response)(request, key, response, timeout)
+                return response
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, section, *args, **kwargs):
+            timeout = getattr(settings, 'SECTION_CACHE_TIMEOUT', 300)
+            if request.method != 'GET' or not timeout:
+                return view(request, section, *args, **kwargs)
+            key, response = _cached_response(request, area, section)
+            if response is not None:
+                return response
+            response = view(request, section, *args, **kwargs)
+            _store_response(request, key, response, timeout)
+            return response
+        return wrapper
+    return decorator
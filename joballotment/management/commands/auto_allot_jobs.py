@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from joballotment.allotment import DEFAULT_CHUNK_SIZE, auto_allot_pending
+
+
+class Command(BaseCommand):
+    help = 'Allot every pending job without an assignee or supervisor to the least-loaded eligible people.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Number of jobs written per transaction.')
+        parser.add_argument('--limit', type=int, help='Stop after allotting this many jobs.')
+
+    def handle(self, *args, **options):
+        count = auto_allot_pending(options['chunk_size'], options['limit'])
+        self.stdout.write(self.style.SUCCESS(f'Allotted {count} jobs.'))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from joballotment.models import Job
+from joballotment.fragment_cache import bump_generation
+from joballotment.workflow import WORKFLOW_STATE_FIELDS, apply_workflow_state, first_reports_by_job
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized workflow status columns on Job from its reports.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Number of jobs updated per transaction.')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        last_id = 0
+        scanned = 0
+        updated = 0
+        while True:
+            # Walk the primary key so each chunk is an index range scan
+            jobs = list(Job.objects.filter(pk__gt=last_id).order_by('pk')[:chunk_size])
+            if not jobs:
+                break
+            reports = first_reports_by_job(jobs)
+            changed = [
+                job for job in jobs
+                if apply_workflow_state(job, reports[job.id]['user'], reports[job.id]['supervisor'])
+            ]
+            if changed:
+                with transaction.atomic():
+                    Job.objects.bulk_update(changed, WORKFLOW_STATE_FIELDS)
+            scanned += len(jobs)
+            updated += len(changed)
+            last_id = jobs[-1].pk
+        if updated:
+            # bulk_update() sends no post_save, so drop cached sections here
+            bump_generation()
+        self.stdout.write(self.style.SUCCESS(f'Scanned {scanned} jobs, updated {updated}.'))
@@ -0,0 +1,51 @@
+import logging
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from joballotment import async_views, views
+from joballotment.benchmarks import load_requests, login_cookies, run_async_load, run_sync_load, seed_dataset, section_urlconf
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database and compare p50/p99 latency and throughput of the '
+        'sync (WSGI) and async (ASGI) section views under concurrent load.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=10000, help='Number of jobs to seed.')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per mode and concurrency level.')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            # Committed, not rolled back: the sync run reads from other threads
+            self.stdout.write(f'Seeding {options["jobs"]} jobs...')
+            actors = seed_dataset(options['jobs'], seed=options['seed'])
+            cookies = login_cookies(actors)
+            requests = load_requests(actors, options['requests'])
+            self.stdout.write(f'{"mode":<6} {"concurrency":>11} {"requests":>9} {"p50 ms":>9} {"p99 ms":>9} {"req/s":>8}')
+            # Measure the views, not the fragment cache
+            with override_settings(SECTION_CACHE_TIMEOUT=0):
+                for concurrency in options['concurrency']:
+                    for mode, section_views in (('sync', views), ('async', async_views)):
+                        cache.clear()
+                        with override_settings(ROOT_URLCONF=section_urlconf(section_views)):
+                            if mode == 'sync':
+                                result = run_sync_load(cookies, requests, concurrency)
+                            else:
+                                result = async_to_sync(run_async_load)(cookies, requests, concurrency)
+                        self.stdout.write(
+                            f'{mode:<6} {concurrency:>11} {result["requests"]:>9} '
+                            f'{result["p50"]:>9.1f} {result["p99"]:>9.1f} {result["rps"]:>8.1f}'
+                        )
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
@@ -0,0 +1,62 @@
+import logging
+from pathlib import Path
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from joballotment.benchmarks import login_cookies, run_read_write_load, seed_dataset
+
+# SQLite as it was before joballotment/sqlite.py: rollback journal, the
+# driver's 5 second lock timeout, and every read on the default connection
+BASELINE = {'SQLITE_PRAGMAS': {'journal_mode': 'DELETE'}, 'READ_ONLY_DATABASE': None}
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database and compare read/write throughput and "database is locked" '
+        'errors of concurrent dashboard readers and report writers, with SQLite as configured '
+        '(SQLITE_PRAGMAS and the read-only alias) against its defaults.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=10000, help='Number of jobs to seed.')
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per configuration.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            # The test mirror opens the test database read-write; open it
+            # read-only, as the production alias does
+            readonly = connections['readonly'].settings_dict
+            readonly.update(NAME=f'{Path(connections["default"].settings_dict["NAME"]).as_uri()}?mode=ro', OPTIONS={'uri': True})
+            self.stdout.write(f'Seeding {options["jobs"]} jobs...')
+            actors = seed_dataset(options['jobs'], seed=options['seed'])
+            cookies = login_cookies(actors)
+            self.stdout.write(f'{"config":<9} {"reads/s":>9} {"writes/s":>9} {"locked":>7}')
+            # Measure the database, not the fragment cache
+            with override_settings(SECTION_CACHE_TIMEOUT=0):
+                for label, overrides in (('baseline', BASELINE), ('tuned', {})):
+                    cache.clear()
+                    with override_settings(**overrides):
+                        # New connections, so the journal mode is switched
+                        # and every pragma applied
+                        connections.close_all()
+                        connections['default'].ensure_connection()
+                        result = run_read_write_load(
+                            {role: cookies[role] for role in ('user', 'supervisor')},
+                            options['readers'], options['writers'], options['duration'],
+                        )
+                        connections.close_all()
+                    self.stdout.write(
+                        f'{label:<9} {result["reads/s"]:>9.1f} {result["writes/s"]:>9.1f} {result["locked"]:>7}'
+                    )
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
@@ -0,0 +1,67 @@
+import json
+import logging
+from pathlib import Path
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from joballotment.benchmarks import check_results, load_budgets, make_budgets, run_benchmarks, seed_dataset
+
+DEFAULT_BUDGETS = Path(__file__).resolve().parents[2] / 'benchmark_budgets.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database at each size and measure query count, wall time '
+        'and peak memory of every view per role against the checked-in budgets.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='Numbers of jobs to seed.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--budgets', default=str(DEFAULT_BUDGETS), help='Budget file to check against.')
+        parser.add_argument('--write-budgets', action='store_true', help='Write the budget file from this run instead of checking it.')
+
+    def handle(self, *args, **options):
+        # 404/405 responses are expected for routes a role may not use
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            results_by_size = {}
+            # Measure the uncached cost of each view
+            with override_settings(SECTION_CACHE_TIMEOUT=0):
+                for size in sorted(options['sizes']):
+                    self.stdout.write(f'Seeding {size} jobs...')
+                    with transaction.atomic():
+                        actors = seed_dataset(size, seed=options['seed'])
+                        cache.clear()
+                        results_by_size[size] = run_benchmarks(actors)
+                        transaction.set_rollback(True)
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        if options['write_budgets']:
+            with open(options['budgets'], 'w') as f:
+                json.dump(make_budgets(results_by_size), f, indent=2, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(self.style.SUCCESS(f'Wrote {options["budgets"]}'))
+            return
+
+        rows, failures = check_results(results_by_size, load_budgets(options['budgets']))
+        self.stdout.write(f'{"view":<56} {"jobs":>7} {"status":>6} {"queries":>9} {"ms":>16} {"peak KB":>18}')
+        for name, size, result, budget, problems in rows:
+            ms_budget = budget.get('ms', {}).get(str(size), '-')
+            kb_budget = budget.get('peak_kb', {}).get(str(size), '-')
+            line = (
+                f'{name:<56} {size:>7} {result["status"]:>6} '
+                f'{result["queries"]:>4}/{budget.get("queries", "-"):<4} '
+                f'{result["ms"]:>8.1f}/{ms_budget:<7} {result["peak_kb"]:>9.0f}/{kb_budget:<8}'
+            )
+            self.stdout.write(self.style.ERROR(line) if problems else line)
+        if failures:
+            raise CommandError('Benchmark budgets exceeded:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('All views within budget.'))
@@ -0,0 +1,28 @@
+import sys
+from django.core.management.base import BaseCommand
+from joballotment.export import EXPORT_CHUNK_SIZE, stream_jobs_csv
+from joballotment.filters import STATUS_FILTERS, JobFilter
+from joballotment.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Write every job with its assignee, supervisor and workflow statuses as CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-from', help='Only jobs with a report submitted on or after this day (YYYY-MM-DD).')
+        parser.add_argument('--date-to', help='Only jobs with a report submitted on or before this day (YYYY-MM-DD).')
+        parser.add_argument('--status', choices=STATUS_FILTERS['admin'], help='Only jobs with this status.')
+        parser.add_argument('--title', help='Only jobs with this title.')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+        parser.add_argument('-o', '--output', help='File to write instead of stdout.')
+
+    def handle(self, *args, **options):
+        params = {field: options[field] for field in ('date_from', 'date_to', 'status', 'title') if options[field]}
+        jobs = JobFilter(params).apply(Job.objects.all())
+        out = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        try:
+            for line in stream_jobs_csv(jobs, options['chunk_size']):
+                out.write(line)
+        finally:
+            if options['output']:
+                out.close()
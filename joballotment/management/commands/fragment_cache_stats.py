@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from joballotment.fragment_cache import fragment_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counts of the dashboard section fragment cache.'
+
+    def handle(self, *args, **options):
+        stats = fragment_cache_stats()
+        self.stdout.write(
+            f"generation {stats['generation']}: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.1%} hit rate)"
+        )
@@ -0,0 +1,31 @@
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from joballotment.bulk_import import DEFAULT_BATCH_SIZE, import_jobs, import_users
+
+
+class Command(BaseCommand):
+    help = 'Import users or jobs from a CSV file in batches and report the rows that failed validation.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=['users', 'jobs'])
+        parser.add_argument('path', help='CSV file with a header row.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows validated and inserted per transaction.')
+        parser.add_argument('--workers', type=int, default=None, help='Processes used to hash passwords (users only; default IMPORT_HASH_WORKERS).')
+        parser.add_argument('--errors', help='Write the per-row error report to this CSV file instead of stdout.')
+
+    def handle(self, *args, **options):
+        workers = options['workers'] or getattr(settings, 'IMPORT_HASH_WORKERS', os.cpu_count() or 1)
+        with open(options['path'], encoding='utf-8-sig', newline='') as f:
+            if options['kind'] == 'users':
+                result = import_users(f, batch_size=options['batch_size'], workers=workers)
+            else:
+                result = import_jobs(f, batch_size=options['batch_size'])
+        if result.errors:
+            if options['errors']:
+                with open(options['errors'], 'w', newline='') as out:
+                    result.write_error_report(out)
+            else:
+                result.write_error_report(self.stdout)
+        style = self.style.WARNING if result.failed else self.style.SUCCESS
+        self.stdout.write(style(f"Imported {result.created} {options['kind']}, {result.failed} rows failed."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from joballotment.work_stats import REBUILD_BATCH_SIZE, rebuild_work_stats
+
+
+class Command(BaseCommand):
+    help = 'Recount the per-user dashboard counters in UserWorkStats from jobs and reports.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=REBUILD_BATCH_SIZE, help='Number of users recounted per transaction.')
+
+    def handle(self, *args, **options):
+        count = rebuild_work_stats(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Recounted work stats of {count} users.'))
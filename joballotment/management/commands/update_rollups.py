@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from joballotment.rollups import update_rollups
+
+
+class Command(BaseCommand):
+    help = 'Update the daily department and job title rollups from the last run onwards.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recount all history instead of the days since the last run.')
+
+    def handle(self, *args, **options):
+        first_day = update_rollups(full=options['full'])
+        if first_day is None:
+            self.stdout.write(self.style.SUCCESS('Rebuilt the rollups from all history.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Recounted the rollups from {first_day} onwards.'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from joballotment.user_ids import user_id_usage
+
+
+class Command(BaseCommand):
+    help = 'Show how much of the 5-digit user_id space has been allocated.'
+
+    def handle(self, *args, **options):
+        usage = user_id_usage()
+        message = f"{usage['allocated']} of {usage['capacity']} user IDs allocated, {usage['remaining']} left."
+        if usage['remaining'] < getattr(settings, 'USER_ID_LOW_WATERMARK', 5000):
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-17 16:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('joballotment', '0004_customuser_department_code_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='final_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready for admin verification'), ('verified', 'Verified by Admin'), ('approved', 'Approved')], db_index=True, default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='supervisor_report_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('submitted', 'Submitted'), ('completed', 'Completed')], db_index=True, default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='user_report_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('submitted', 'Submitted'), ('completed', 'Completed')], db_index=True, default='pending', max_length=20),
+        ),
+    ]
@@ -0,0 +1,86 @@
+from django.db import migrations
+
+# Full-text index over job titles/descriptions/remarks and report content.
+# Job documents use rowid 2*id, report documents 2*id+1, so the triggers can
+# address a document by rowid without a lookup.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE joballotment_search USING fts5(
+        title, body, kind UNINDEXED, job_id UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER joballotment_job_search_insert AFTER INSERT ON joballotment_job BEGIN
+        INSERT INTO joballotment_search (rowid, title, body, kind, job_id)
+        VALUES (new.id * 2, new.title, new.description || ' ' || new.remark, 'job', new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER joballotment_job_search_update AFTER UPDATE OF title, description, remark ON joballotment_job BEGIN
+        UPDATE joballotment_search SET title = new.title, body = new.description || ' ' || new.remark
+        WHERE rowid = new.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER joballotment_job_search_delete AFTER DELETE ON joballotment_job BEGIN
+        DELETE FROM joballotment_search WHERE rowid = old.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER joballotment_report_search_insert AFTER INSERT ON joballotment_report BEGIN
+        INSERT INTO joballotment_search (rowid, title, body, kind, job_id)
+        VALUES (new.id * 2 + 1, '', new.content, 'report', new.job_id);
+    END
+    """,
+    """
+    CREATE TRIGGER joballotment_report_search_update AFTER UPDATE OF content, job_id ON joballotment_report BEGIN
+        UPDATE joballotment_search SET body = new.content, job_id = new.job_id
+        WHERE rowid = new.id * 2 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER joballotment_report_search_delete AFTER DELETE ON joballotment_report BEGIN
+        DELETE FROM joballotment_search WHERE rowid = old.id * 2 + 1;
+    END
+    """,
+    """
+    INSERT INTO joballotment_search (rowid, title, body, kind, job_id)
+    SELECT id * 2, title, description || ' ' || remark, 'job', id FROM joballotment_job
+    """,
+    """
+    INSERT INTO joballotment_search (rowid, title, body, kind, job_id)
+    SELECT id * 2 + 1, '', content, 'report', job_id FROM joballotment_report
+    """,
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS joballotment_job_search_insert',
+    'DROP TRIGGER IF EXISTS joballotment_job_search_update',
+    'DROP TRIGGER IF EXISTS joballotment_job_search_delete',
+    'DROP TRIGGER IF EXISTS joballotment_report_search_insert',
+    'DROP TRIGGER IF EXISTS joballotment_report_search_update',
+    'DROP TRIGGER IF EXISTS joballotment_report_search_delete',
+    'DROP TABLE IF EXISTS joballotment_search',
+]
+
+
+def run(statements):
+    def apply(apps, schema_editor):
+        # FTS5 is SQLite-only
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('joballotment', '0007_user_id_sequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(CREATE_SQL), run(DROP_SQL)),
+    ]
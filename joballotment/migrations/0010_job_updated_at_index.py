@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-17 18:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('joballotment', '0009_user_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['updated_at'], name='job_updated_at_idx'),
+        ),
+    ]
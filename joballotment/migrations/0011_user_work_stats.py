@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-17 18:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('joballotment', '0010_job_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserWorkStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='work_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('open_jobs', models.PositiveIntegerField(default=0)),
+                ('completed_jobs', models.PositiveIntegerField(default=0)),
+                ('reports_submitted', models.PositiveIntegerField(default=0)),
+                ('awaiting_review', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.3 on 2026-10-17 18:34
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def stamp_existing_jobs(apps, schema_editor):
+    # Best available times for jobs allotted or completed before this migration
+    Job = apps.get_model('joballotment', 'Job')
+    Job.objects.filter(assigned_to__isnull=False).update(allotted_at=F('created_at'))
+    Job.objects.filter(status='completed').update(completed_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('joballotment', '0011_user_work_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepartmentDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('created', models.PositiveIntegerField(default=0)),
+                ('allotted', models.PositiveIntegerField(default=0)),
+                ('user_reported', models.PositiveIntegerField(default=0)),
+                ('supervisor_reported', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('department_code', models.CharField(blank=True, max_length=10)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('processed_until', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TitleDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('created', models.PositiveIntegerField(default=0)),
+                ('allotted', models.PositiveIntegerField(default=0)),
+                ('user_reported', models.PositiveIntegerField(default=0)),
+                ('supervisor_reported', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('title', models.CharField(max_length=255)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='allotted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(stamp_existing_jobs, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['allotted_at'], name='job_allotted_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['completed_at'], name='job_completed_at_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='departmentdailyrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'department_code'), name='department_rollup_day_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='titledailyrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'title'), name='title_rollup_day_uniq'),
+        ),
+    ]
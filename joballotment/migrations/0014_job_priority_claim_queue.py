@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-17 18:53
+
+from importlib import import_module
+from django.db import migrations, models
+
+search_index = import_module('joballotment.migrations.0008_search_index')
+
+# Adding a NOT NULL column rebuilds joballotment_job on SQLite, which drops
+# the full-text search triggers of 0008 along with the old table
+JOB_TRIGGERS = [sql for sql in search_index.DROP_SQL if 'joballotment_job_' in sql] + [
+    sql for sql in search_index.CREATE_SQL if 'ON joballotment_job ' in sql
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('joballotment', '0013_review_queue_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, search_index.run(JOB_TRIGGERS)),
+        migrations.AddField(
+            model_name='job',
+            name='priority',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Low'), (2, 'Normal'), (3, 'High'), (4, 'Urgent')], default=2),
+        ),
+        migrations.RunPython(search_index.run(JOB_TRIGGERS), migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(models.F('status'), models.OrderBy(models.F('priority'), descending=True), models.F('created_at'), condition=models.Q(('assigned_to__isnull', True)), name='job_claim_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-17 18:58
+
+from importlib import import_module
+from django.db import migrations, models
+
+search_index = import_module('joballotment.migrations.0008_search_index')
+
+# Adding NOT NULL columns rebuilds both tables on SQLite, which drops the
+# full-text search triggers of 0008 (see 0014)
+TRIGGERS = [sql for sql in search_index.DROP_SQL if 'TRIGGER' in sql] + [
+    sql for sql in search_index.CREATE_SQL if 'CREATE TRIGGER' in sql
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('joballotment', '0014_job_priority_claim_queue'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, search_index.run(TRIGGERS)),
+        migrations.AddField(
+            model_name='job',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(search_index.run(TRIGGERS), migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models import F, Q
 from django.contrib.auth.models import AbstractUser
+from django.db.models.functions import Lower
+from django.utils import timezone
 
 # User roles
 ROLE_CHOICES = [
@@ -8,6 +11,28 @@ ROLE_CHOICES = [
     ('supervisor', 'Supervisor'),
 ]
 
+# Denormalized workflow state stored on Job
+REPORT_STATE_CHOICES = [
+    ('pending', 'Pending'),
+    ('submitted', 'Submitted'),
+    ('completed', 'Completed'),
+]
+
+FINAL_STATE_CHOICES = [
+    ('pending', 'Pending'),
+    ('ready', 'Ready for admin verification'),
+    ('verified', 'Verified by Admin'),
+    ('approved', 'Approved'),
+]
+
+# Order in which users claim unassigned jobs (claims.py), highest first
+JOB_PRIORITY_CHOICES = [
+    (1, 'Low'),
+    (2, 'Normal'),
+    (3, 'High'),
+    (4, 'Urgent'),
+]
+
 class CustomUser(AbstractUser):
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='user')
     user_id = models.CharField(max_length=5, unique=True, blank=True, null=True)
@@ -15,31 +40,109 @@ class CustomUser(AbstractUser):
     department_name = models.CharField(max_length=100, blank=True, null=True)
     designation = models.CharField(max_length=100, blank=True, null=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Case-insensitive prefix lookups in user_lookup.py
+            models.Index(Lower('username'), name='user_username_lower_idx'),
+            models.Index(Lower('first_name'), name='user_first_name_lower_idx'),
+            models.Index(Lower('last_name'), name='user_last_name_lower_idx'),
+            models.Index(Lower('department_name'), name='user_department_lower_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.user_id:
-            # Generate a unique 5-digit user_id
-            import random
-            while True:
-                new_id = str(random.randint(10000, 99999))
-                if not CustomUser.objects.filter(user_id=new_id).exists():
-                    self.user_id = new_id
-                    break
+            # Allocate a unique 5-digit user_id
+            from .user_ids import reserve_user_ids
+            self.user_id = reserve_user_ids(1)[0]
         super().save(*args, **kwargs)
 
-class Job(models.Model):
+class UserIdSequence(models.Model):
+    # Single row: number of user_id codes handed out so far (see user_ids.py)
+    position = models.PositiveIntegerField(default=0)
+
+class VersionConflict(Exception):
+    """A versioned row was changed by someone else since it was read."""
+
+class VersionedModel(models.Model):
+    """
+    Optimistic concurrency. Every UPDATE that save() issues is conditional
+    on the version the instance was read with (WHERE id = ? AND version = ?)
+    and bumps it; if the row has moved on, save() raises VersionConflict
+    instead of overwriting it. Queryset update()s of these models should
+    bump the version as well.
+    """
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        abstract = True
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        version_field = self._meta.get_field('version')
+        values = [value for value in values if value[0] is not version_field]
+        values.append((version_field, None, self.version + 1))
+        if base_qs.filter(pk=pk_val, version=self.version)._update(values):
+            self.version += 1
+            return True
+        if base_qs.filter(pk=pk_val).exists():
+            raise VersionConflict(f'{self._meta.label} {pk_val} is past version {self.version}')
+        # Deleted meanwhile: save() inserts it again, as it would unversioned
+        return False
+
+class Job(VersionedModel):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     assigned_to = models.ForeignKey('CustomUser', related_name='jobs', on_delete=models.SET_NULL, null=True, blank=True, limit_choices_to={'role': 'user'})
     supervisor = models.ForeignKey('CustomUser', related_name='supervised_jobs', on_delete=models.SET_NULL, null=True, blank=True, limit_choices_to={'role': 'supervisor'})
     status = models.CharField(max_length=20, choices=[('pending', 'Pending'), ('completed', 'Completed')], default='pending')
     remark = models.TextField(blank=True)
+    priority = models.PositiveSmallIntegerField(choices=JOB_PRIORITY_CHOICES, default=2)
+    user_report_status = models.CharField(max_length=20, choices=REPORT_STATE_CHOICES, default='pending', db_index=True)
+    supervisor_report_status = models.CharField(max_length=20, choices=REPORT_STATE_CHOICES, default='pending', db_index=True)
+    final_status = models.CharField(max_length=20, choices=FINAL_STATE_CHOICES, default='pending', db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # First allotment and completion, counted by the daily rollups (rollups.py)
+    allotted_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Per-user and per-supervisor job lists and their status counts
+            models.Index(fields=['assigned_to', 'status'], name='job_assignee_status_idx'),
+            models.Index(fields=['supervisor', 'status'], name='job_supervisor_status_idx'),
+            # created_at date filters and default table order
+            models.Index(fields=['created_at'], name='job_created_at_idx'),
+            # Latest change for the section ETags (conditional.py)
+            models.Index(fields=['updated_at'], name='job_updated_at_idx'),
+            # Incremental rollup windows
+            models.Index(fields=['allotted_at'], name='job_allotted_at_idx'),
+            models.Index(fields=['completed_at'], name='job_completed_at_idx'),
+            # Claim queue: unassigned jobs by status, highest priority and
+            # oldest first. status is a column rather than part of the
+            # condition, which SQLite could not match against a bound parameter.
+            models.Index(
+                'status', F('priority').desc(), 'created_at',
+                condition=Q(assigned_to__isnull=True),
+                name='job_claim_queue_idx',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        stamped = []
+        if self.assigned_to_id and self.allotted_at is None:
+            self.allotted_at = timezone.now()
+            stamped.append('allotted_at')
+        if (self.status == 'completed') != (self.completed_at is not None):
+            self.completed_at = timezone.now() if self.status == 'completed' else None
+            stamped.append('completed_at')
+        if stamped and kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], *stamped}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
 
-class Report(models.Model):
+class Report(VersionedModel):
     REPORT_TYPE_CHOICES = [
         ('user', 'User'),
         ('supervisor', 'Supervisor'),
@@ -51,5 +154,64 @@ class Report(models.Model):
     status = models.CharField(max_length=20, choices=[('pending', 'Pending'), ('verified', 'Verified')], default='pending')
     submitted_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # User/supervisor report of a job
+            models.Index(fields=['job', 'report_type'], name='report_job_type_idx'),
+            # A user's or supervisor's own reports
+            models.Index(fields=['submitted_by', 'report_type'], name='report_submitter_type_idx'),
+            # Review queues, e.g. pending user reports, oldest first
+            models.Index(fields=['report_type', 'status', 'submitted_at'], name='report_review_queue_idx'),
+            # submitted_at date filters
+            models.Index(fields=['submitted_at'], name='report_submitted_at_idx'),
+        ]
+
     def __str__(self):
         return f"{self.job.title} - {self.report_type} report"
+
+class UserWorkStats(models.Model):
+    # Dashboard counters per user, kept current by work_stats.py
+    user = models.OneToOneField('CustomUser', on_delete=models.CASCADE, primary_key=True, related_name='work_stats')
+    # Jobs the user is assigned to or supervises
+    open_jobs = models.PositiveIntegerField(default=0)
+    completed_jobs = models.PositiveIntegerField(default=0)
+    reports_submitted = models.PositiveIntegerField(default=0)
+    # Pending user reports the user submitted or has to review as supervisor
+    awaiting_review = models.PositiveIntegerField(default=0)
+
+    @property
+    def total_jobs(self):
+        return self.open_jobs + self.completed_jobs
+
+class DailyRollup(models.Model):
+    # Job throughput of one day, rebuilt by rollups.update_rollups()
+    day = models.DateField()
+    created = models.PositiveIntegerField(default=0)
+    allotted = models.PositiveIntegerField(default=0)
+    user_reported = models.PositiveIntegerField(default=0)
+    supervisor_reported = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+class DepartmentDailyRollup(DailyRollup):
+    # Department of the job's assignee; '' for unassigned jobs
+    department_code = models.CharField(max_length=10, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'department_code'], name='department_rollup_day_uniq'),
+        ]
+
+class TitleDailyRollup(DailyRollup):
+    title = models.CharField(max_length=255)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'title'], name='title_rollup_day_uniq'),
+        ]
+
+class RollupWatermark(models.Model):
+    # Single row: time of the last rollup update
+    processed_until = models.DateTimeField()
@@ -0,0 +1,170 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+
+# Sortable columns of the admin tables: ?sort=<key> or ?sort=-<key>
+JOB_SORT_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'created_at': 'created_at',
+    'assigned_to': 'assigned_to__username',
+    'supervisor': 'supervisor__username',
+    'status': 'status',
+    'user_status': 'user_report_status',
+    'supervisor_status': 'supervisor_report_status',
+    'final_status': 'final_status',
+}
+
+# Supervisor review inbox, oldest first by default
+REVIEW_SORT_FIELDS = {
+    'submitted_at': 'submitted_at',
+}
+
+USER_SORT_FIELDS = {
+    'user_id': 'user_id',
+    'username': 'username',
+    'email': 'email',
+    'role': 'role',
+}
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPage:
+    def __init__(self, object_list, sort, page_size, next_cursor=None):
+        self.object_list = object_list
+        self.sort = sort
+        self.page_size = page_size
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def get_page_size(request, default=None):
+    default = default or getattr(settings, 'ADMIN_TABLE_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    try:
+        page_size = int(request.GET.get('page_size', default))
+    except (TypeError, ValueError):
+        page_size = default
+    return max(1, min(page_size, getattr(settings, 'ADMIN_TABLE_MAX_PAGE_SIZE', MAX_PAGE_SIZE)))
+
+
+def get_sort(request, sort_fields, default):
+    sort = request.GET.get('sort') or default
+    if sort.lstrip('-') not in sort_fields:
+        sort = default
+    return sort
+
+
+def encode_cursor(value, pk):
+    if isinstance(value, datetime):
+        payload = {'v': value.isoformat(), 't': 'dt', 'pk': pk}
+    else:
+        payload = {'v': value, 'pk': pk}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        value, pk = payload['v'], payload['pk']
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise InvalidCursor(cursor)
+    if payload.get('t') == 'dt':
+        value = parse_datetime(value)
+        if value is None:
+            raise InvalidCursor(cursor)
+    return value, pk
+
+
+def _field_value(obj, field):
+    # Follow assigned_to__username style lookups on an instance
+    for attr in field.split('__'):
+        if obj is None:
+            return None
+        obj = getattr(obj, attr)
+    return obj
+
+
+def _after(field, value, pk, descending):
+    """
+    Rows strictly after (value, pk) in the page order. NULLs sort first when
+    ascending and last when descending, as in the order_by() below.
+    """
+    if descending:
+        if value is None:
+            return Q(**{f'{field}__isnull': True, 'pk__lt': pk})
+        return (
+            Q(**{f'{field}__lt': value})
+            | Q(**{field: value, 'pk__lt': pk})
+            | Q(**{f'{field}__isnull': True})
+        )
+    if value is None:
+        return Q(**{f'{field}__isnull': True, 'pk__gt': pk}) | Q(**{f'{field}__isnull': False})
+    return Q(**{f'{field}__gt': value}) | Q(**{field: value, 'pk__gt': pk})
+
+
+def keyset_paginate(request, queryset, sort_fields, default_sort, default_page_size=None):
+    """
+    Return one KeysetPage of ``queryset`` sorted by ``?sort=`` and starting
+    after ``?cursor=``. The cursor holds the (sort value, pk) of the last row
+    of the previous page, so every page is a range scan however deep it is.
+    Raises InvalidCursor for a cursor we did not issue.
+    """
+    sort = get_sort(request, sort_fields, default_sort)
+    page_size = get_page_size(request, default_page_size)
+    descending = sort.startswith('-')
+    field = sort_fields[sort.lstrip('-')]
+    if descending:
+        ordering = [F(field).desc(nulls_last=True), '-pk']
+    else:
+        ordering = [F(field).asc(nulls_first=True), 'pk']
+    queryset = queryset.order_by(*ordering)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        value, pk = decode_cursor(cursor)
+        queryset = queryset.filter(_after(field, value, pk, descending))
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(_field_value(last, field), last.pk)
+    return KeysetPage(rows, sort, page_size, next_cursor)
+
+
+def page_url(request, **params):
+    """Current URL with the given query parameters replaced (None removes one)."""
+    query = request.GET.copy()
+    for key, value in params.items():
+        if value is None:
+            query.pop(key, None)
+        else:
+            query[key] = value
+    return f'{request.path}?{query.urlencode()}' if query else request.path
+
+
+def sort_links(request, page, sort_fields):
+    # First-page URL per column, flipping the direction of the current one
+    links = {}
+    for key in sort_fields:
+        sort = f'-{key}' if page.sort == key else key
+        links[key] = page_url(request, sort=sort, cursor=None)
+    return links
@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .events import publish_job_event
+from .fragment_cache import bump_generation
+from .models import Job, Report
+from .pagination import REVIEW_SORT_FIELDS, keyset_paginate
+from .work_stats import refresh_work_stats
+from .workflow import workflow_state_expressions
+
+DEFAULT_PAGE_SIZE = 250
+
+
+def review_queue(supervisor):
+    """
+    Pending user reports on the jobs ``supervisor`` supervises, with the
+    job and submitter joined in. Ordered by submitted_at it is a walk of
+    report_review_queue_idx.
+    """
+    return Report.objects.filter(
+        job__in=Job.objects.filter(supervisor=supervisor).values('pk'),
+        report_type='user',
+        status='pending',
+    ).select_related('job', 'submitted_by')
+
+
+def review_page(request, supervisor):
+    """One keyset page of the review queue, oldest report first. May raise InvalidCursor."""
+    page_size = getattr(settings, 'REVIEW_INBOX_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    return keyset_paginate(request, review_queue(supervisor), REVIEW_SORT_FIELDS, 'submitted_at', page_size)
+
+
+def verify_user_reports(supervisor, report_ids):
+    """
+    Verify the given reports of ``supervisor``'s review queue with a single
+    UPDATE and recompute their jobs' workflow columns with another, as
+    supervisor_verify_user_report does one report at a time. Ids outside
+    the queue (another supervisor's, or verified already) are skipped.
+    Returns the ids that were verified.
+    """
+    with transaction.atomic():
+        rows = list(review_queue(supervisor).filter(pk__in=report_ids).values_list('pk', 'job_id', 'submitted_by_id'))
+        if not rows:
+            return []
+        verified = [pk for pk, job_id, submitted_by_id in rows]
+        job_ids = {job_id for pk, job_id, submitted_by_id in rows}
+        Report.objects.filter(pk__in=verified).update(status='verified', version=F('version') + 1)
+        # Derived columns only, so the jobs' version stays (see refresh_job_workflow)
+        Job.objects.filter(pk__in=job_ids).update(**workflow_state_expressions(), updated_at=timezone.now())
+        # update() sends no signals; recount and notify here
+        refresh_work_stats({submitted_by_id for pk, job_id, submitted_by_id in rows} | {supervisor.pk})
+        for report in Report.objects.filter(pk__in=verified).select_related('job'):
+            publish_job_event('report_verified', report.job, report)
+    bump_generation()
+    return verified
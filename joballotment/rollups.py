@@ -0,0 +1,130 @@
+from datetime import datetime, time, timedelta
+from django.db import transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+from .fragment_cache import bump_generation
+from .models import DepartmentDailyRollup, Job, Report, RollupWatermark, TitleDailyRollup
+
+METRIC_FIELDS = ['created', 'allotted', 'user_reported', 'supervisor_reported', 'completed']
+# Writes still in flight during the last update are picked up by recounting
+# from this long before its watermark
+LATE_WRITE_MARGIN = timedelta(minutes=5)
+ANALYTICS_RANGES = [30, 90, 365]
+TOP_TITLES = 20
+
+# rollup model -> (its key field, the job field it is grouped by)
+DIMENSIONS = {
+    DepartmentDailyRollup: ('department_code', 'assigned_to__department_code'),
+    TitleDailyRollup: ('title', 'title'),
+}
+
+
+def metric_sources():
+    # metric -> (queryset, timestamp field, path from the row to its job)
+    return {
+        'created': (Job.objects.all(), 'created_at', ''),
+        'allotted': (Job.objects.all(), 'allotted_at', ''),
+        'user_reported': (Report.objects.filter(report_type='user'), 'submitted_at', 'job__'),
+        'supervisor_reported': (Report.objects.filter(report_type='supervisor'), 'submitted_at', 'job__'),
+        'completed': (Job.objects.all(), 'completed_at', ''),
+    }
+
+
+def count_days(start=None):
+    """
+    {rollup model: {(day, key): {metric: count}}} for events at or after
+    ``start`` (all history when None). Each metric and dimension is one
+    GROUP BY over a range of the metric's indexed timestamp column.
+    """
+    counts = {model: {} for model in DIMENSIONS}
+    for metric, (queryset, field, job_path) in metric_sources().items():
+        queryset = queryset.filter(**{f'{field}__isnull': False})
+        if start is not None:
+            queryset = queryset.filter(**{f'{field}__gte': start})
+        for model, (key_field, job_field) in DIMENSIONS.items():
+            rows = (
+                queryset.annotate(day=TruncDate(field), key=Coalesce(job_path + job_field, Value('')))
+                .values('day', 'key').order_by()
+                .annotate(n=Count('pk'))
+            )
+            for row in rows:
+                day_counts = counts[model].setdefault((row['day'], row['key']), dict.fromkeys(METRIC_FIELDS, 0))
+                day_counts[metric] += row['n']
+    return counts
+
+
+def update_rollups(full=False):
+    """
+    Recount the days since the last update (every day when ``full`` or on
+    the first run) and replace their rollup rows. Older days are left
+    alone, so a run costs the same however much history there is.
+    Returns the first recounted day, or None after a full rebuild.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        watermark = RollupWatermark.objects.select_for_update().filter(pk=1).first()
+        first_day = start = None
+        if watermark is not None and not full:
+            first_day = timezone.localdate(watermark.processed_until - LATE_WRITE_MARGIN)
+            start = timezone.make_aware(datetime.combine(first_day, time.min))
+        counts = count_days(start)
+        for model, (key_field, job_field) in DIMENSIONS.items():
+            stale = model.objects.all()
+            if first_day is not None:
+                stale = stale.filter(day__gte=first_day)
+            stale.delete()
+            model.objects.bulk_create(
+                model(day=day, **{key_field: key}, **values)
+                for (day, key), values in counts[model].items()
+            )
+        RollupWatermark.objects.update_or_create(pk=1, defaults={'processed_until': now})
+    # bulk_create sends no post_save, so drop the cached analytics section here
+    bump_generation()
+    return first_day
+
+
+def get_range_days(request):
+    try:
+        days = int(request.GET.get('days', ANALYTICS_RANGES[-1]))
+    except ValueError:
+        days = ANALYTICS_RANGES[-1]
+    return days if days in ANALYTICS_RANGES else ANALYTICS_RANGES[-1]
+
+
+def _sums():
+    return {field: Sum(field) for field in METRIC_FIELDS}
+
+
+def analytics_context(days):
+    """
+    Trend, per-department and per-title totals for the last ``days`` days,
+    read from the rollup tables only. Every job has exactly one department
+    row per event, so the department rollup also gives the overall totals.
+    """
+    since = timezone.localdate() - timedelta(days=days - 1)
+    departments = DepartmentDailyRollup.objects.filter(day__gte=since)
+    # Daily rows for a month, weekly for a quarter, monthly beyond
+    if days <= ANALYTICS_RANGES[0]:
+        period, bucket = 'day', F('day')
+    elif days <= ANALYTICS_RANGES[1]:
+        period, bucket = 'week', TruncWeek('day')
+    else:
+        period, bucket = 'month', TruncMonth('day')
+    trend = departments.annotate(period=bucket).values('period')
+    watermark = RollupWatermark.objects.filter(pk=1).first()
+    return {
+        'days': days,
+        'ranges': ANALYTICS_RANGES,
+        'since': since,
+        'period': period,
+        'totals': departments.aggregate(**_sums()),
+        'trend': list(trend.order_by('period').annotate(**_sums())),
+        'by_department': list(departments.values('department_code').order_by().annotate(**_sums()).order_by('-created', 'department_code')),
+        'by_title': list(
+            TitleDailyRollup.objects.filter(day__gte=since)
+            .values('title').order_by().annotate(**_sums())
+            .order_by('-created', 'title')[:TOP_TITLES]
+        ),
+        'processed_until': watermark.processed_until if watermark else None,
+    }
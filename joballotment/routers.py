@@ -0,0 +1,77 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Set while a read_only_view runs; copied into sync_to_async threads
+_read_only = ContextVar('read_only_queries', default=False)
+
+
+def read_only_alias():
+    return getattr(settings, 'READ_ONLY_DATABASE', None)
+
+
+@contextmanager
+def read_only_queries():
+    """Send the ORM reads made inside the block to the read-only alias."""
+    token = _read_only.set(True)
+    try:
+        yield
+    finally:
+        _read_only.reset(token)
+
+
+def read_only_view(view):
+    """
+    Run GET/HEAD requests of a sync or async view under read_only_queries().
+    Other methods may write and read back, so they stay on default.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await view(request, *args, **kwargs)
+            with read_only_queries():
+                return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+        with read_only_queries():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReadOnlyRouter:
+    """
+    Reads made under read_only_queries() go to settings.READ_ONLY_DATABASE,
+    everything else to default. Reads inside a transaction stay on default
+    so that they see its uncommitted writes (this also keeps TestCase data,
+    never committed, visible to the views under test).
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = read_only_alias()
+        if alias and _read_only.get() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Also for instances loaded from the read-only alias
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases are the same database
+        aliases = {DEFAULT_DB_ALIAS, read_only_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db == read_only_alias():
+            return False
+        return None
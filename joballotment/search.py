@@ -0,0 +1,144 @@
+import re
+from django.conf import settings
+from django.db import connection
+from django.shortcuts import render
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from .models import Job
+from .pagination import page_url
+
+# FTS5 table created by migration 0008. Job documents have rowid 2*id,
+# report documents 2*id+1.
+SEARCH_TABLE = 'joballotment_search'
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+MAX_TERMS = 10
+
+# Placeholders snippet() wraps matches in; swapped for <mark> after escaping
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+TERM = re.compile(r'\w+')
+
+
+class SearchHit:
+    def __init__(self, job, kind, report_id, snippet):
+        self.job = job
+        self.kind = kind
+        self.report_id = report_id
+        self.snippet = snippet
+
+
+class SearchPage:
+    def __init__(self, query, hits, page, page_size, has_next):
+        self.query = query
+        self.hits = hits
+        self.page = page
+        self.page_size = page_size
+        self.has_next = has_next
+
+    @property
+    def has_previous(self):
+        return self.page > 1
+
+    def __iter__(self):
+        return iter(self.hits)
+
+    def __len__(self):
+        return len(self.hits)
+
+
+def match_expression(query):
+    """
+    FTS5 MATCH expression for free text: every word must appear, the last
+    one as a prefix so results show up while typing. Each word is quoted, so
+    FTS5 operators in the input are searched for as plain text.
+    """
+    terms = TERM.findall(query or '')[:MAX_TERMS]
+    if not terms:
+        return ''
+    quoted = ['"%s"' % term for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def highlight(snippet):
+    return mark_safe(escape(snippet).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'))
+
+
+# Report of a report document (r), joined for the visibility check
+REPORT_JOIN = " LEFT JOIN joballotment_report r ON s.kind = 'report' AND r.id = (s.rowid - 1) / 2"
+
+
+def visibility_sql(user):
+    """
+    (join, where, params) limiting hits to what ``user`` may see. Admins
+    see everything. Users see the jobs assigned to them and their own
+    reports. Supervisors see the jobs they supervise, their own reports and
+    the user reports they review.
+    """
+    if user.role == 'admin':
+        return '', '', []
+    if user.role == 'supervisor':
+        where = " AND j.supervisor_id = %s AND (s.kind = 'job' OR r.submitted_by_id = %s OR r.report_type = 'user')"
+        return REPORT_JOIN, where, [user.pk, user.pk]
+    where = " AND j.assigned_to_id = %s AND (s.kind = 'job' OR r.submitted_by_id = %s)"
+    return REPORT_JOIN, where, [user.pk, user.pk]
+
+
+def get_page(request):
+    try:
+        page = int(request.GET.get('page', 1))
+    except (TypeError, ValueError):
+        page = 1
+    try:
+        page_size = int(request.GET.get('page_size', getattr(settings, 'SEARCH_PAGE_SIZE', DEFAULT_PAGE_SIZE)))
+    except (TypeError, ValueError):
+        page_size = DEFAULT_PAGE_SIZE
+    return max(page, 1), min(max(page_size, 1), MAX_PAGE_SIZE)
+
+
+def search(user, query, page=1, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Rank jobs and reports matching ``query`` that ``user`` may see, best
+    first (bm25, title matches weigh more). One query against the FTS index
+    plus one to load the jobs of the page.
+    """
+    expression = match_expression(query)
+    if not expression or connection.vendor != 'sqlite':
+        return SearchPage(query, [], page, page_size, False)
+    join, where, params = visibility_sql(user)
+    sql = (
+        f"SELECT s.rowid, s.kind, s.job_id, "
+        f"snippet({SEARCH_TABLE}, -1, %s, %s, '…', 12) "
+        f"FROM {SEARCH_TABLE} s JOIN joballotment_job j ON j.id = s.job_id{join} "
+        f"WHERE {SEARCH_TABLE} MATCH %s{where} "
+        f"ORDER BY bm25({SEARCH_TABLE}, 5.0, 1.0) LIMIT %s OFFSET %s"
+    )
+    # One extra row tells whether there is a next page
+    params = [MARK_START, MARK_END, expression] + params + [page_size + 1, (page - 1) * page_size]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    jobs = Job.objects.select_related('assigned_to', 'supervisor').in_bulk({job_id for _, _, job_id, _ in rows})
+    hits = [
+        SearchHit(jobs[job_id], kind, (rowid - 1) // 2 if kind == 'report' else None, highlight(snippet))
+        for rowid, kind, job_id, snippet in rows
+        if job_id in jobs
+    ]
+    return SearchPage(query, hits, page, page_size, has_next)
+
+
+def render_search_section(request):
+    # The same section serves the admin, user and supervisor dashboards
+    page, page_size = get_page(request)
+    results = search(request.user, request.GET.get('q', ''), page, page_size)
+    return render(request, 'joballotment/search_section.html', {
+        'results': results,
+        'query': results.query,
+        'previous_page_url': page_url(request, page=page - 1) if results.has_previous else '',
+        'next_page_url': page_url(request, page=page + 1) if results.has_next else '',
+    })
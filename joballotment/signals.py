@@ -0,0 +1,70 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .auth_backends import forget_user
+from .fragment_cache import bump_generation
+from .models import CustomUser, Job, Report
+from .user_lookup import bump_users_generation
+from .work_stats import refresh_work_stats
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+@receiver(post_save, sender=Report)
+@receiver(post_delete, sender=Report)
+def invalidate_fragments(sender, **kwargs):
+    # Again on commit: a request that read the old rows before the commit
+    # may have stored its fragment under the generation bumped here
+    bump_generation()
+    transaction.on_commit(bump_generation)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_caches(sender, update_fields=None, **kwargs):
+    # Logging in only touches last_login, which no section or lookup displays
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    for bump in (bump_generation, bump_users_generation):
+        bump()
+        transaction.on_commit(bump)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def forget_cached_user(sender, instance, **kwargs):
+    # Also on last_login saves: the cached copy must match the row
+    forget_user(instance.pk)
+
+
+# Job fields that move a job between users' counters
+WORK_STATS_JOB_FIELDS = {'assigned_to', 'supervisor', 'status'}
+
+
+def _affects_work_stats(update_fields):
+    return update_fields is None or bool(WORK_STATS_JOB_FIELDS & set(update_fields))
+
+
+@receiver(pre_save, sender=Job)
+def remember_job_people(sender, instance, update_fields=None, **kwargs):
+    # The previous assignee/supervisor lose the job and need a recount too
+    instance._work_stats_previous = ()
+    if instance.pk and _affects_work_stats(update_fields):
+        instance._work_stats_previous = Job.objects.filter(pk=instance.pk).values_list('assigned_to_id', 'supervisor_id').first() or ()
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def refresh_job_work_stats(sender, instance, update_fields=None, **kwargs):
+    if not _affects_work_stats(update_fields):
+        return
+    previous = getattr(instance, '_work_stats_previous', ())
+    refresh_work_stats([instance.assigned_to_id, instance.supervisor_id, *previous])
+
+
+@receiver(post_save, sender=Report)
+@receiver(post_delete, sender=Report)
+def refresh_report_work_stats(sender, instance, **kwargs):
+    # The job's supervisor reviews pending user reports
+    supervisor_id = Job.objects.filter(pk=instance.job_id).values_list('supervisor_id', flat=True).first()
+    refresh_work_stats([instance.submitted_by_id, supervisor_id])
@@ -0,0 +1,45 @@
+import re
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# settings.SQLITE_PRAGMAS is built from these (with environment overrides);
+# also used when it is not set
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 20000,  # ms a statement waits for a lock
+    'synchronous': 'NORMAL',
+    'cache_size': -32000,  # KiB of page cache per connection
+    'mmap_size': 134217728,
+}
+# Stored in the database file rather than per connection; a read-only
+# connection can neither set nor needs them
+FILE_PRAGMAS = {'journal_mode'}
+PRAGMA_VALUE = re.compile(r'-?\w+')
+
+
+def is_read_only(settings_dict):
+    return settings_dict.get('OPTIONS', {}).get('uri') and 'mode=ro' in str(settings_dict['NAME'])
+
+
+def pragma_statements(pragmas, read_only=False):
+    """PRAGMA statements for ``pragmas``; names and values are checked, as they cannot be bound."""
+    statements = []
+    for name, value in pragmas.items():
+        if read_only and name in FILE_PRAGMAS:
+            continue
+        if not name.isidentifier() or not PRAGMA_VALUE.fullmatch(str(value)):
+            raise ImproperlyConfigured(f'Invalid SQLite pragma {name} = {value!r}')
+        statements.append(f'PRAGMA {name} = {value}')
+    return statements
+
+
+@receiver(connection_created)
+def apply_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', DEFAULT_PRAGMAS)
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(pragmas, is_read_only(connection.settings_dict)):
+            cursor.execute(statement)
@@ -0,0 +1,73 @@
+// Live dashboard updates over Server-Sent Events. Rows rendered with
+// data-job-id are patched in place: cells with data-field take the matching
+// value of the event. Changes to jobs that are not on screen light up the
+// #live-updates button, which reloads the current section.
+(function () {
+  const BADGES = {
+    Verified: '<span class="badge bg-success"><i class="bi bi-check-circle"></i> Verified</span>',
+    Submitted: '<span class="badge bg-info text-dark"><i class="bi bi-file-earmark-check"></i> Submitted</span>',
+    Completed: '<span class="badge bg-success"><i class="bi bi-check-circle"></i> Completed</span>',
+    Pending: '<span class="badge bg-warning text-dark"><i class="bi bi-hourglass-split"></i> Pending</span>'
+  };
+
+  function showStale(button) {
+    if (!button) return;
+    const count = Number(button.dataset.count || 0) + 1;
+    button.dataset.count = count;
+    button.textContent = count === 1 ? '1 update' : count + ' updates';
+    button.classList.remove('d-none');
+  }
+
+  function patchRows(event, button) {
+    const rows = document.querySelectorAll('#main-content [data-job-id="' + event.job_id + '"]');
+    if (!rows.length) {
+      showStale(button);
+      return;
+    }
+    rows.forEach(function (row) {
+      const cells = row.querySelectorAll('[data-field]');
+      cells.forEach(function (cell) {
+        const value = event[cell.dataset.field];
+        if (value === undefined) return;
+        // *_label cells hold a status badge, the others plain text
+        if (cell.dataset.field.endsWith('_label')) {
+          cell.innerHTML = BADGES[value] || '';
+        } else {
+          cell.textContent = value;
+        }
+      });
+      if (!cells.length) {
+        row.classList.add('table-warning');
+        showStale(button);
+      }
+    });
+  }
+
+  window.connectLiveUpdates = function (url, reloadSection) {
+    if (!window.EventSource) return;
+    const button = document.getElementById('live-updates');
+    if (button) {
+      button.addEventListener('click', function () {
+        button.dataset.count = 0;
+        button.classList.add('d-none');
+        reloadSection();
+      });
+    }
+    const source = new EventSource(url);
+    ['job_created', 'job_allotted', 'job_completed', 'report_submitted', 'report_verified', 'report_updated'].forEach(function (name) {
+      source.addEventListener(name, function (e) {
+        patchRows(JSON.parse(e.data), button);
+      });
+    });
+    source.addEventListener('job_deleted', function (e) {
+      const rows = document.querySelectorAll('#main-content [data-job-id="' + JSON.parse(e.data).job_id + '"]');
+      rows.forEach(function (row) { row.remove(); });
+      // Counters and other sections still show the job
+      showStale(button);
+    });
+    // Too many events were missed; only a reload is accurate now
+    source.addEventListener('resync', function () {
+      showStale(button);
+    });
+  };
+})();
@@ -0,0 +1,74 @@
+// Autocomplete for UserAutocompleteWidget. Handlers are delegated to the
+// document so widgets in sections loaded with fetch() work as well.
+(function () {
+  const timers = new WeakMap();
+
+  function widgetOf(el) {
+    return el.closest('.user-autocomplete');
+  }
+
+  function closeResults(widget) {
+    widget.querySelector('[data-autocomplete-results]').innerHTML = '';
+  }
+
+  function showResults(widget, results) {
+    const list = widget.querySelector('[data-autocomplete-results]');
+    list.innerHTML = '';
+    results.forEach(function (user) {
+      const item = document.createElement('button');
+      item.type = 'button';
+      item.className = 'list-group-item list-group-item-action';
+      item.textContent = user.label;
+      item.dataset.userId = user.id;
+      list.appendChild(item);
+    });
+  }
+
+  function lookup(widget, query) {
+    const params = new URLSearchParams({ q: query, role: widget.dataset.role });
+    fetch(widget.dataset.lookupUrl + '?' + params.toString(), {
+      headers: { 'X-Requested-With': 'XMLHttpRequest' }
+    })
+      .then(response => response.json())
+      .then(data => {
+        // Ignore answers for text the user has already changed
+        if (widget.querySelector('[data-autocomplete-input]').value.trim() === query) {
+          showResults(widget, data.results);
+        }
+      });
+  }
+
+  document.addEventListener('input', function (e) {
+    if (!e.target.matches('[data-autocomplete-input]')) return;
+    const widget = widgetOf(e.target);
+    // Typing invalidates the previous choice
+    widget.querySelector('[data-autocomplete-value]').value = '';
+    clearTimeout(timers.get(widget));
+    const query = e.target.value.trim();
+    if (!query) {
+      closeResults(widget);
+      return;
+    }
+    timers.set(widget, setTimeout(function () { lookup(widget, query); }, 150));
+  });
+
+  document.addEventListener('click', function (e) {
+    const item = e.target.closest('.user-autocomplete [data-user-id]');
+    if (item) {
+      const widget = widgetOf(item);
+      widget.querySelector('[data-autocomplete-value]').value = item.dataset.userId;
+      widget.querySelector('[data-autocomplete-input]').value = item.textContent;
+      closeResults(widget);
+      return;
+    }
+    document.querySelectorAll('.user-autocomplete').forEach(function (widget) {
+      if (!widget.contains(e.target)) closeResults(widget);
+    });
+  });
+
+  document.addEventListener('keydown', function (e) {
+    if (e.key === 'Escape' && e.target.matches('[data-autocomplete-input]')) {
+      closeResults(widgetOf(e.target));
+    }
+  });
+})();
@@ -1,3 +1,1203 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import re
+import threading
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections, router, transaction
+from django.db.models import F
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from . import async_views
+from .admin_sections import ADMIN_SECTIONS
+from .allotment import DEFAULT_TITLE_BONUS, Allotter, auto_allot_pending, save_allotments, unallotted_jobs
+from .benchmarks import section_urlconf
+from .bulk_import import import_jobs, import_users
+from .claims import claim_next_job, claimable_jobs
+from .events import broadcaster, job_event
+from .export import JOB_EXPORT_HEADER, stream_jobs_csv
+from .filters import JobFilter, date_range_q
+from .fragment_cache import fragment_cache_stats
+from .models import CustomUser, DepartmentDailyRollup, Job, Report, TitleDailyRollup, UserIdSequence, VersionConflict
+from .pagination import JOB_SORT_FIELDS, InvalidCursor, decode_cursor, encode_cursor, keyset_paginate
+from .rollups import update_rollups
+from .routers import read_only_queries
+from .search import match_expression, search
+from .sqlite import pragma_statements
+from .user_lookup import lookup_cache_info, lookup_queryset, lookup_users
+from .user_ids import USER_ID_SPACE, UserIdsExhausted, reserve_user_ids, user_id_at, user_id_usage
+from .review_inbox import review_queue
+from .work_stats import STATS_FIELDS, compute_work_stats, get_work_stats, job_counters
+from .workflow import WORKFLOW_STATE_FIELDS, build_job_workflow, first_reports_by_job, job_status_labels, refresh_job_workflow
 
-# Create your tests here.
+# "SCAN joballotment_job" (or "SCAN TABLE ..." on older SQLite) with no index
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?(\w+)$')
+CSRF_TOKEN = re.compile(rb'name="csrfmiddlewaretoken" value="\w+"')
+
+
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN QUERY PLAN for the querysets the views build. Each of them must be
+    served by an index; a plain table scan fails the test.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('worker', password='x', role='user')
+        cls.supervisor = CustomUser.objects.create_user('boss', password='x', role='supervisor')
+        cls.job = Job.objects.create(title='Printer', assigned_to=cls.user, supervisor=cls.supervisor)
+        Report.objects.create(job=cls.job, submitted_by=cls.user, content='done', report_type='user')
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertNoFullScan(self, queryset):
+        plan = self.query_plan(queryset)
+        scans = [detail for detail in plan if FULL_SCAN.match(detail)]
+        self.assertEqual(scans, [], 'full table scan in plan:\n' + '\n'.join(plan))
+
+    def test_user_jobs_by_status(self):
+        jobs = Job.objects.filter(assigned_to=self.user)
+        self.assertNoFullScan(jobs)
+        self.assertNoFullScan(jobs.filter(status='completed'))
+
+    def test_supervisor_jobs_by_status(self):
+        jobs = self.supervisor.supervised_jobs.all()
+        self.assertNoFullScan(jobs)
+        self.assertNoFullScan(jobs.filter(status='pending'))
+
+    def test_job_filter_subqueries(self):
+        for role, user, jobs in (('user', self.user, Job.objects.filter(assigned_to=self.user)), ('supervisor', self.supervisor, self.supervisor.supervised_jobs.all())):
+            for status in ('pending', 'submitted', 'verified'):
+                self.assertNoFullScan(JobFilter({'status': status, 'date_from': '2024-01-01'}, role, user).apply(jobs))
+
+    def test_user_report_of_job(self):
+        reports = Report.objects.filter(submitted_by=self.user)
+        self.assertNoFullScan(reports)
+        self.assertNoFullScan(reports.filter(job=self.job, report_type='user'))
+
+    def test_supervisor_report_queues(self):
+        jobs = self.supervisor.supervised_jobs.all()
+        user_reports = Report.objects.filter(job__in=jobs, report_type='user')
+        self.assertNoFullScan(user_reports.filter(status='pending'))
+        self.assertNoFullScan(Report.objects.filter(job__in=jobs, report_type='supervisor', submitted_by=self.supervisor))
+
+    def test_reports_awaiting_review(self):
+        self.assertNoFullScan(Report.objects.filter(report_type='user', status='pending'))
+
+    def test_claim_queue_order(self):
+        plan = self.query_plan(claimable_jobs(self.user).values('pk')[:1])
+        self.assertIn('job_claim_queue_idx', plan[0])
+        self.assertFalse([detail for detail in plan if 'TEMP B-TREE' in detail], plan)
+
+    def test_review_inbox_order(self):
+        plan = self.query_plan(review_queue(self.supervisor).order_by('submitted_at', 'pk'))
+        self.assertIn('report_review_queue_idx', plan[0])
+        self.assertFalse([detail for detail in plan if 'TEMP B-TREE' in detail], plan)
+
+    def test_report_date_range(self):
+        reports = Report.objects.filter(date_range_q('submitted_at', '2024-01-01', '2024-01-31'))
+        self.assertNoFullScan(reports)
+        self.assertNoFullScan(Job.objects.filter(id__in=reports.values('job_id')))
+
+    def test_job_date_range(self):
+        jobs = Job.objects.filter(assigned_to=self.user)
+        self.assertNoFullScan(jobs.filter(date_range_q('created_at', '2024-01-01', None)))
+        self.assertNoFullScan(Job.objects.filter(date_range_q('created_at', '2024-01-01', '2024-01-31')))
+
+    def test_first_reports_by_job(self):
+        jobs = Job.objects.filter(supervisor=self.supervisor)
+        reports = Report.objects.filter(job__in=jobs.values('pk'), report_type__in=('user', 'supervisor'))
+        self.assertNoFullScan(reports)
+        self.assertEqual(first_reports_by_job(jobs)[self.job.id]['user'].content, 'done')
+
+    def test_user_lookup_prefix(self):
+        self.assertNoFullScan(lookup_queryset('bo'))
+        self.assertNoFullScan(lookup_queryset('1', role='supervisor'))
+
+    def test_full_scan_is_detected(self):
+        plan = self.query_plan(Report.objects.filter(content='done'))
+        self.assertTrue(any(FULL_SCAN.match(detail) for detail in plan), plan)
+
+
+def legacy_workflow(job):
+    # The per-job lookups build_job_workflow() replaced
+    user_report = Report.objects.filter(job=job, report_type='user').first()
+    supervisor_report = Report.objects.filter(job=job, report_type='supervisor').first()
+
+    def label(report):
+        if not report:
+            return 'Pending'
+        return 'Completed' if report.status == 'verified' else 'Submitted'
+
+    if job.status == 'completed':
+        final = 'Approved'
+    elif supervisor_report and supervisor_report.status == 'verified':
+        final = 'Verified by Admin'
+    else:
+        final = 'Pending'
+    ready = bool(user_report and user_report.status == 'verified' and supervisor_report and supervisor_report.status == 'pending' and job.status != 'completed')
+    return label(user_report), label(supervisor_report), final, 'Ready for admin verification' if ready else ''
+
+
+class WorkflowEngineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = CustomUser.objects.create_user('worker', password='x', role='user')
+        supervisor = CustomUser.objects.create_user('boss', password='x', role='supervisor')
+        # (job status, user report statuses, supervisor report statuses)
+        cases = [
+            ('pending', [], []),
+            ('pending', ['pending'], []),
+            ('pending', ['verified', 'pending'], ['pending']),
+            ('pending', ['pending', 'verified'], ['verified']),
+            ('completed', ['verified'], ['verified']),
+            ('completed', [], []),
+        ]
+        for i, (status, user_reports, supervisor_reports) in enumerate(cases):
+            job = Job.objects.create(title=f'Job {i}', status=status, assigned_to=user, supervisor=supervisor)
+            for report_status in user_reports:
+                Report.objects.create(job=job, submitted_by=user, content='done', report_type='user', status=report_status)
+            for report_status in supervisor_reports:
+                Report.objects.create(job=job, submitted_by=supervisor, content='ok', report_type='supervisor', status=report_status)
+
+    def test_matches_per_job_lookups(self):
+        with self.assertNumQueries(2):
+            workflow = build_job_workflow(Job.objects.all())
+        for job in Job.objects.all():
+            engine = tuple(workflow[key][job.id] for key in ('job_user_statuses', 'job_supervisor_statuses', 'job_final_statuses', 'job_statuses'))
+            self.assertEqual(engine, legacy_workflow(job), job.title)
+
+    def test_backfill_fills_stored_columns(self):
+        Job.objects.update(user_report_status='pending', supervisor_report_status='pending', final_status='pending')
+        out = io.StringIO()
+        call_command('backfill_job_workflow', chunk_size=4, stdout=out)
+        self.assertIn('Scanned 6 jobs, updated 5.', out.getvalue())
+        stored = list(Job.objects.order_by('pk').values_list(*WORKFLOW_STATE_FIELDS))
+        self.assertEqual(stored, [
+            ('pending', 'pending', 'pending'),
+            ('submitted', 'pending', 'pending'),
+            ('completed', 'submitted', 'ready'),
+            ('submitted', 'completed', 'verified'),
+            ('completed', 'completed', 'approved'),
+            ('pending', 'pending', 'approved'),
+        ])
+        # Stored labels read back as the engine computes them
+        workflow = build_job_workflow(Job.objects.all())
+        for job in Job.objects.all():
+            labels = job_status_labels(job)
+            self.assertEqual((labels['user_status'], labels['supervisor_status'], labels['final_status']), (workflow['job_user_statuses'][job.id], workflow['job_supervisor_statuses'][job.id], workflow['job_final_statuses'][job.id]))
+        out = io.StringIO()
+        call_command('backfill_job_workflow', stdout=out)
+        self.assertIn('updated 0.', out.getvalue())
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        alice = CustomUser.objects.create_user('alice', password='x', role='user')
+        bob = CustomUser.objects.create_user('bob', password='x', role='user')
+        # Unassigned jobs have a NULL sort key; the others tie in pairs
+        for i, person in enumerate([None, alice, bob, None, bob, alice, None]):
+            Job.objects.create(title=f'Job {i}', assigned_to=person)
+
+    def walk(self, sort, page_size=2):
+        pks = []
+        params = {'sort': sort, 'page_size': page_size}
+        while True:
+            page = keyset_paginate(RequestFactory().get('/', params), Job.objects.all(), JOB_SORT_FIELDS, 'id')
+            self.assertLessEqual(len(page), page_size)
+            pks += [job.pk for job in page]
+            if not page.has_next:
+                return pks
+            params['cursor'] = page.next_cursor
+
+    def test_cursor_round_trip(self):
+        now = timezone.now()
+        for value in (now, 'bob', 7, None):
+            self.assertEqual(decode_cursor(encode_cursor(value, 42)), (value, 42))
+        for cursor in ('not a cursor', encode_cursor('x', 1)[:-3], 'e30'):
+            with self.assertRaises(InvalidCursor):
+                decode_cursor(cursor)
+
+    def test_pages_cover_every_row_once_in_order(self):
+        jobs = list(Job.objects.select_related('assigned_to'))
+        # NULLs first ascending, ties broken by pk
+        ascending = [job.pk for job in sorted(jobs, key=lambda job: (job.assigned_to is not None, job.assigned_to.username if job.assigned_to else '', job.pk))]
+        self.assertEqual(self.walk('assigned_to'), ascending)
+        self.assertEqual(self.walk('-assigned_to'), ascending[::-1])
+        self.assertEqual(self.walk('created_at', page_size=3), list(Job.objects.order_by('created_at', 'pk').values_list('pk', flat=True)))
+        self.assertEqual(self.walk('-id', page_size=7), sorted((job.pk for job in jobs), reverse=True))
+
+
+class UserIdAllocatorTests(TestCase):
+    def test_codes_are_a_permutation_of_the_space(self):
+        codes = {user_id_at(position) for position in range(USER_ID_SPACE)}
+        self.assertEqual(len(codes), USER_ID_SPACE)
+        self.assertEqual(min(codes), '10000')
+        self.assertEqual(max(codes), '99999')
+
+    def test_save_and_block_reservation_do_not_collide(self):
+        user = CustomUser.objects.create_user('first', password='x')
+        block = reserve_user_ids(100)
+        self.assertEqual(len(set(block)), 100)
+        self.assertNotIn(user.user_id, block)
+
+    def test_skips_codes_already_in_use(self):
+        CustomUser.objects.create(username='legacy', user_id=user_id_at(0))
+        self.assertEqual(reserve_user_ids(2), [user_id_at(1), user_id_at(2)])
+
+    def test_exhausted_space_raises(self):
+        UserIdSequence.objects.create(pk=1, position=USER_ID_SPACE - 1)
+        with self.assertRaises(UserIdsExhausted):
+            reserve_user_ids(2)
+        with self.assertLogs('joballotment.user_ids', 'WARNING') as logs:
+            self.assertEqual(len(reserve_user_ids(1)), 1)
+        self.assertEqual(logs.output, ['WARNING:joballotment.user_ids:Only 0 user IDs left to allocate.'])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class BulkImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user('admin', password='x', role='admin')
+        cls.user = CustomUser.objects.create_user('worker', password='x', role='user')
+        cls.supervisor = CustomUser.objects.create_user('boss', password='x', role='supervisor')
+
+    def csv_file(self, header, *rows):
+        return io.StringIO('\n'.join([header, *rows]) + '\n')
+
+    def test_import_users(self):
+        position = user_id_usage()['allocated']
+        result = import_users(self.csv_file(
+            'username,password,email,role,first_name,last_name,department_code,department_name,designation',
+            'alice,Tr0ub4dor&3x,alice@example.com,user,Alice,A,IT,,',
+            'bob,Tr0ub4dor&3x,not-an-email,user,Bob,B,IT,,',
+            'carol,Tr0ub4dor&3x,carol@example.com,supervisor,Carol,C,HR,,',
+            'ALICE,Tr0ub4dor&3x,alice2@example.com,user,Alice,A,IT,,',
+            'Worker,Tr0ub4dor&3x,worker@example.com,user,W,W,IT,,',
+            'dave,Tr0ub4dor&3x,dave@example.com,user,Dave,D,FIN,,',
+        ), batch_size=2)
+        self.assertEqual(result.created, 3)
+        self.assertEqual([(line, list(errors)) for line, errors in result.errors], [
+            (3, ['email']),
+            (5, ['username']),
+            (6, ['username']),
+        ])
+        self.assertEqual(result.errors[1][1]['username'], ['Duplicate username in file.'])
+        self.assertEqual(result.errors[2][1]['username'], ['A user with that username already exists.'])
+        imported = CustomUser.objects.filter(username__in=['alice', 'carol', 'dave'])
+        self.assertEqual(len({user.user_id for user in imported}), 3)
+        self.assertTrue(all(len(user.user_id) == 5 for user in imported))
+        self.assertTrue(imported.get(username='carol').check_password('Tr0ub4dor&3x'))
+        # One user_id reservation per batch, for exactly the rows inserted
+        self.assertEqual(user_id_usage()['allocated'], position + 3)
+
+    def test_import_jobs(self):
+        result = import_jobs(self.csv_file(
+            'title,description,assigned_to,supervisor,remark',
+            f'Printer,Toner,{self.user.user_id},boss,',
+            'Network,,worker,worker,',
+            ',,nobody,,',
+        ))
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.errors[0], (3, {'supervisor': ['No supervisor with user ID or username "worker".']}))
+        line, errors = result.errors[1]
+        self.assertEqual((line, sorted(errors)), (4, ['__all__', 'assigned_to', 'title']))
+        job = Job.objects.get(title='Printer')
+        self.assertEqual((job.assigned_to, job.supervisor), (self.user, self.supervisor))
+        self.assertEqual(get_work_stats(self.user).open_jobs, 1)
+
+    def test_error_report(self):
+        result = import_jobs(self.csv_file('title,description,assigned_to,supervisor,remark', 'Mail,,nobody,,'))
+        out = io.StringIO()
+        result.write_error_report(out)
+        self.assertEqual(out.getvalue().splitlines(), ['line,field,error', '2,assigned_to,"No user with user ID or username ""nobody""."'])
+
+    def test_upload_hashes_in_process(self):
+        self.client.force_login(self.admin)
+        upload = SimpleUploadedFile('users.csv', b'username,password,email,role\nerin,Tr0ub4dor&3x,erin@example.com,user\n')
+        with mock.patch('joballotment.bulk_import.ProcessPoolExecutor') as pool:
+            response = self.client.post('/dashboard/admin/section/bulk_import/', {'kind': 'users', 'file': upload})
+        pool.assert_not_called()
+        self.assertContains(response, 'Imported 1 users, 0 rows failed.')
+        self.assertTrue(CustomUser.objects.filter(username='erin').exists())
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user('admin', password='x', role='admin')
+        cls.user = CustomUser.objects.create_user('worker', password='x', role='user')
+        cls.supervisor = CustomUser.objects.create_user('boss', password='x', role='supervisor')
+        cls.done = Job.objects.create(title='Printer', assigned_to=cls.user, supervisor=cls.supervisor)
+        cls.report = Report.objects.create(job=cls.done, submitted_by=cls.user, content='done', report_type='user')
+        cls.pending = Job.objects.create(title='Router, "core"')
+
+    def rows(self, content):
+        return list(csv.reader(io.StringIO(content.decode())))
+
+    def test_streamed_csv(self):
+        self.client.force_login(self.admin)
+        response = self.client.get('/dashboard/admin/export/jobs/')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="jobs.csv"')
+        header, *rows = self.rows(b''.join(response.streaming_content))
+        self.assertEqual(header, JOB_EXPORT_HEADER)
+        rows = {int(row[0]): dict(zip(header, row)) for row in rows}
+        self.assertEqual(set(rows), {self.done.pk, self.pending.pk})
+        self.assertEqual(rows[self.done.pk]['assigned_to'], 'worker')
+        self.assertEqual(rows[self.done.pk]['supervisor_user_id'], self.supervisor.user_id)
+        self.assertEqual(rows[self.done.pk]['user_report_submitted_at'], self.report.submitted_at.isoformat())
+        self.assertEqual(rows[self.done.pk]['supervisor_report_submitted_at'], '')
+        self.assertEqual(rows[self.pending.pk]['title'], 'Router, "core"')
+        self.assertEqual(rows[self.pending.pk]['assigned_to'], '')
+
+    def test_rows_are_produced_lazily(self):
+        with self.assertNumQueries(0):
+            lines = stream_jobs_csv(Job.objects.all(), chunk_size=1)
+            self.assertEqual(next(lines), ','.join(JOB_EXPORT_HEADER) + '\r\n')
+        # Chunk boundaries do not change the output
+        self.assertEqual(list(lines), list(stream_jobs_csv(Job.objects.all()))[1:])
+
+
+class UserLookupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('jdoe', password='x', role='user', first_name='Jane', last_name='Doe', department_name='Finance')
+        cls.supervisor = CustomUser.objects.create_user('fsmith', password='x', role='supervisor', first_name='Frank')
+
+    def usernames(self, prefix, role=None):
+        return [user['username'] for user in lookup_users(prefix, role)]
+
+    def test_prefix_matches_each_field(self):
+        self.assertEqual(self.usernames('JD'), ['jdoe'])
+        self.assertEqual(self.usernames('doe'), ['jdoe'])
+        self.assertEqual(self.usernames(self.user.user_id[:3]), ['jdoe'])
+        self.assertEqual(self.usernames('f'), ['fsmith', 'jdoe'])
+        self.assertEqual(self.usernames('f', role='supervisor'), ['fsmith'])
+
+    def test_cache_is_invalidated_by_user_changes(self):
+        self.assertEqual(self.usernames('fin'), ['jdoe'])
+        self.user.department_name = 'Logistics'
+        self.user.save()
+        self.assertEqual(self.usernames('fin'), [])
+
+    def test_cache_survives_job_and_report_writes(self):
+        self.usernames('jan')
+        hits = lookup_cache_info().hits
+        job = Job.objects.create(title='Printer', assigned_to=self.user)
+        Report.objects.create(job=job, submitted_by=self.user, content='done', report_type='user')
+        self.assertEqual(self.usernames('jan'), ['jdoe'])
+        self.assertEqual(lookup_cache_info().hits, hits + 1)
+
+    @override_settings(USER_LOOKUP_CACHE_SIZE=7)
+    def test_cache_size_is_read_per_lookup(self):
+        self.usernames('jan')
+        self.assertEqual(lookup_cache_info().maxsize, 7)
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user('admin', password='x', role='admin')
+        cls.user = CustomUser.objects.create_user('worker', password='x', role='user')
+        cls.other = CustomUser.objects.create_user('other', password='x', role='user')
+        cls.supervisor = CustomUser.objects.create_user('boss', password='x', role='supervisor')
+        cls.job = Job.objects.create(title='Printer', description='Replace toner', assigned_to=cls.user, supervisor=cls.supervisor)
+        cls.report = Report.objects.create(job=cls.job, submitted_by=cls.user, content='Swapped drum on asset PR-4411', report_type='user')
+        Job.objects.create(title='Printer jam', remark='toner smudges', assigned_to=cls.other)
+
+    def hits(self, user, query):
+        return [(hit.kind, hit.job.id) for hit in search(user, query)]
+
+    def test_match_expression_quotes_terms(self):
+        self.assertEqual(match_expression('printer OR "ton'), '"printer" "OR" "ton"*')
+        self.assertEqual(match_expression('  -- '), '')
+
+    def test_triggers_keep_index_in_sync(self):
+        self.assertEqual(self.hits(self.user, 'PR-4411'), [('report', self.job.id)])
+        self.report.content = 'Cleaned rollers'
+        self.report.save()
+        self.assertEqual(self.hits(self.user, 'PR-4411'), [])
+        self.job.delete()
+        self.assertEqual(self.hits(self.admin, 'replace toner'), [])
+
+    def test_results_respect_role_visibility(self):
+        self.assertEqual(len(self.hits(self.admin, 'printer ton')), 2)
+        self.assertEqual(self.hits(self.user, 'printer ton'), [('job', self.job.id)])
+        self.assertEqual(self.hits(self.supervisor, 'toner'), [('job', self.job.id)])
+
+    def test_report_hits_follow_report_access(self):
+        # Reports by a previous assignee and by the supervisor are on the
+        # user's job, but not the user's to read
+        Report.objects.create(job=self.job, submitted_by=self.other, content='Fuser overheats', report_type='user')
+        Report.objects.create(job=self.job, submitted_by=self.supervisor, content='Fuser replaced', report_type='supervisor')
+        self.assertEqual(self.hits(self.user, 'fuser'), [])
+        self.assertEqual(self.hits(self.other, 'fuser'), [])
+        self.assertEqual(len(self.hits(self.supervisor, 'fuser')), 2)
+        self.assertEqual(len(self.hits(self.admin, 'fuser')), 2)
+        self.assertEqual(self.hits(self.user, 'PR-4411'), [('report', self.job.id)])
+
+
+class EventStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('worker', password='x', role='user')
+        cls.other = CustomUser.objects.create_user('other', password='x', role='user')
+        cls.job = Job.objects.create(title='Printer', assigned_to=cls.user)
+
+    async def test_events_reach_only_their_recipients(self):
+        mine = broadcaster.subscribe(self.user.pk, 'user')
+        admin = broadcaster.subscribe(None, 'admin')
+        others = broadcaster.subscribe(self.other.pk, 'user')
+        try:
+            broadcaster.publish({'event': 'job_allotted', 'job_id': self.job.id}, {self.user.pk})
+            await asyncio.sleep(0)
+            self.assertEqual((await mine.get())['job_id'], self.job.id)
+            self.assertEqual((await admin.get())['job_id'], self.job.id)
+            self.assertTrue(others.queue.empty())
+        finally:
+            for subscription in (mine, admin, others):
+                broadcaster.unsubscribe(subscription)
+
+    async def test_stream_sends_published_events(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        self.assertEqual((await client.get('/supervisor/events/')).status_code, 403)
+        response = await client.get('/user/events/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 5000\n\n')
+        # The subscription is registered once the stream has started
+        broadcaster.publish(job_event('report_submitted', self.job), {self.user.pk})
+        chunk = await anext(stream)
+        self.assertTrue(chunk.startswith(b'event: report_submitted\n'), chunk)
+        self.assertIn(b'"user_label": "Pending"', chunk)
+        # A client disconnect cancels the pending read and ends the subscription
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+        self.assertEqual(len(broadcaster), 0)
+
+    def test_job_create_and_delete_events(self):
+        admin = CustomUser.objects.create_user('admin', password='x', role='admin')
+        self.client.force_login(admin)
+        published = []
+        with mock.patch.object(broadcaster, 'publish', lambda event, recipients: published.append((event['event'], recipients))):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post('/job/create/', {'title': 'Scanner', 'priority': 2})
+                self.client.post(f'/job/{self.job.pk}/delete/')
+        self.assertEqual(published, [('job_created', set()), ('job_deleted', {self.user.pk})])
+        self.assertFalse(Job.objects.filter(pk=self.job.pk).exists())
+
+
+@override_settings(SECTION_CACHE_TIMEOUT=0)
+class AdminSectionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user('admin', password='x', role='admin')
+        Job.objects.create(title='Printer')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_only_requested_provider_runs(self):
+        calls = []
+
+        def provider(name):
+            def provide(request, data):
+                calls.append(name)
+                return HttpResponse(name)
+            return provide
+
+        with mock.patch.dict(ADMIN_SECTIONS, {name: provider(name) for name in ADMIN_SECTIONS}):
+            response = self.client.get('/dashboard/admin/section/users_table/')
+        self.assertEqual(response.content, b'users_table')
+        self.assertEqual(calls, ['users_table'])
+        self.assertEqual(self.client.get('/dashboard/admin/section/nope/').status_code, 404)
+
+    def test_sections_read_only_their_data(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/dashboard/admin/section/users_table/').status_code, 200)
+        self.assertFalse([query['sql'] for query in queries if 'joballotment_job' in query['sql']])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertContains(self.client.get('/dashboard/admin/section/jobs_table/'), 'Printer')
+        self.assertTrue([query['sql'] for query in queries if 'joballotment_job' in query['sql']])
+
+
+
+@override_settings(SECTION_CACHE_TIMEOUT=0)
+class DashboardQueryTests(TestCase):
+    URLS = {
+        'user': ['/user/dashboard/', '/user/section/assigned_jobs/', '/user/section/your_reports/'],
+        'supervisor': ['/supervisor/dashboard/', '/supervisor/section/jobs_to_supervise/'],
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('worker', password='x', role='user')
+        cls.supervisor = CustomUser.objects.create_user('boss', password='x', role='supervisor')
+        cls.add_jobs(2)
+
+    @classmethod
+    def add_jobs(cls, count):
+        for _ in range(count):
+            job = Job.objects.create(title='Printer', assigned_to=cls.user, supervisor=cls.supervisor)
+            Report.objects.create(job=job, submitted_by=cls.user, content='done', report_type='user', status='verified')
+            Report.objects.create(job=job, submitted_by=cls.supervisor, content='ok', report_type='supervisor')
+
+    def query_counts(self, user):
+        self.client.force_login(user)
+        counts = []
+        for url in self.URLS[user.role]:
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            counts.append(len(queries))
+        return counts
+
+    def test_queries_do_not_grow_with_jobs(self):
+        for user in [self.user, self.supervisor]:
+            with self.subTest(role=user.role):
+                self.query_counts(user)
+                before = self.query_counts(user)
+                self.add_jobs(5)
+                self.assertEqual(self.query_counts(user), before)
+
+    def test_status_labels(self):
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get('/user/section/assigned_jobs/'), 'Verified')
+        self.client.force_login(self.supervisor)
+        self.assertContains(self.client.get('/supervisor/section/jobs_to_supervise/'), 'Submitted')
+
+class FragmentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user('admin', password='x', role='admin')
+        cls.user = CustomUser.objects.create_user('worker', password='x', role='user')
+        Job.objects.create(title='Printer', assigned_to=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_jobs_table_is_cached(self):
+        self.client.force_login(self.admin)
+        url = '/dashboard/admin/section/jobs_table/'
+        first = self.client.get(url)
+        self.assertEqual(first['X-Fragment-Cache'], 'miss')
+        self.assertNotContains(first, 'csrfmiddlewaretoken')
+        self.assertContains(first, 'form="bulk-action-form"')
+        self.assertEqual(self.client.get(url)['X-Fragment-Cache'], 'hit')
+        # The forms the section's controls submit, with their token
+        dashboard = self.client.get('/dashboard/admin/')
+        self.assertContains(dashboard, 'id="bulk-action-form"')
+        self.assertContains(dashboard, 'id="auto-allot-form"')
+
+    def test_hit_miss_and_invalidation(self):
+        self.client.force_login(self.user)
+        url = '/user/section/assigned_jobs/'
+        self.assertEqual(self.client.get(url)['X-Fragment-Cache'], 'miss')
+        self.assertEqual(self.client.get(url)['X-Fragment-Cache'], 'hit')
+        # Each query string and each user has its own fragment
+        self.assertEqual(self.client.get(url + '?x=1')['X-Fragment-Cache'], 'miss')
+        other = self.client_class()
+        other.force_login(CustomUser.objects.create_user('other', password='x', role='user'))
+        self.assertEqual(other.get(url)['X-Fragment-Cache'], 'miss')
+        # Any job write starts a new generation
+        Job.objects.create(title='Scanner', assigned_to=self.user)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Fragment-Cache'], 'miss')
+        self.assertContains(response, 'Scanner')
+        self.assertEqual(self.client.get(url)['X-Fragment-Cache'], 'hit')
+        stats = fragment_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 4))
+
+    def test_generation_moves_again_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Job.objects.create(title='Scanner', assigned_to=self.user)
+            # A fragment stored now may hold rows read before the commit
+            generation = fragment_cache_stats()['generation']
+        self.assertEqual(fragment_cache_stats()['generation'], generation + 1)
+
+
+class ConditionalSectionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('worker', password='x', role='user')
+        cls.job = Job.objects.create(title='Printer', assigned_to=cls.user)
+
+    def test_unchanged_section_is_not_modified(self):
+        self.client.force_login(self.user)
+        url = '/user/section/assigned_jobs/'
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(self.client.get(url + '?x=1', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        Report.objects.create(job=self.job, submitted_by=self.user, content='done', report_type='user')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def login(self, client):
+        client.get('/')
+        client.post('/', {
+            'username': 'worker', 'password': 'x', 'role': 'user',
+            'csrfmiddlewaretoken': client.cookies['csrftoken'].value,
+        })
+
+    def csrf_token(self, response):
+        return re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', response.content.decode()).group(1)
+
+    def test_new_login_revalidates_embedded_csrf_token(self):
+        client = self.client_class(enforce_csrf_checks=True)
+        self.login(client)
+        response = client.get('/user/dashboard/')
+        etag, old_token = response['ETag'], self.csrf_token(response)
+        client.get('/logout/')
+        self.login(client)
+        # The CSRF secret rotated on login, so the cached page is stale
+        response = client.get('/user/dashboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.post('/jobs/claim/', {'csrfmiddlewaretoken': old_token}).status_code, 403)
+        self.assertEqual(client.post('/jobs/claim/', {'csrfmiddlewaretoken': self.csrf_token(response)}).status_code, 302)
+
+
+class AuthCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user('admin', password='x', role='admin')
+        cls.user = CustomUser.objects.create_user('worker', password='x', role='user', user_id='12345')
+        Job.objects.create(title='Printer', assigned_to=cls.user)
+
+    def test_section_requests_skip_session_and_user_queries(self):
+        self.client.force_login(self.user)
+        url = '/user/section/assigned_jobs/'
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        auth_queries = [
+            query['sql'] for query in queries.captured_queries
+            if 'django_session' in query['sql'] or 'FROM "joballotment_customuser"' in query['sql']
+        ]
+        self.assertEqual(auth_queries, [])
+
+    def test_role_change_invalidates_cached_user(self):
+        self.client.force_login(self.admin)
+        url = '/dashboard/admin/section/users_table/'
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.admin.role = 'user'
+        self.admin.save()
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+    def test_password_reset_ends_cached_sessions(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/user/section/assigned_jobs/').status_code, 200)
+        admin = self.client_class()
+        admin.force_login(self.admin)
+        self.assertTrue(admin.post('/ajax/user_reset_password/', {'id': '12345'}).json()['success'])
+        self.assertEqual(self.client.get('/user/section/assigned_jobs/').status_code, 302)
+
+
+class JobFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('worker', password='x', role='user')
+        cls.supervisor = CustomUser.objects.create_user('boss', password='x', role='supervisor')
+        for i in range(6):
+            job = Job.objects.create(title=f'Job {i}', assigned_to=cls.user, supervisor=cls.supervisor, status='completed' if i % 3 == 0 else 'pending')
+            if i % 2:
+                Report.objects.create(job=job, submitted_by=cls.user, content='done', report_type='user', status='verified' if i == 3 else 'pending')
+            if i < 3:
+                Report.objects.create(job=job, submitted_by=cls.supervisor, content='ok', report_type='supervisor')
+
+    def assertFilters(self, role, user, url, expected):
+        self.client.force_login(user)
+        for status, titles in expected.items():
+            response = self.client.get(f'{url}?status={status}')
+            jobs = response.context['jobs']
+            self.assertEqual([job.title for job in jobs], titles)
+            self.assertEqual({job.report_label for job in jobs}, {status.title()})
+
+    def test_user_status(self):
+        self.assertFilters('user', self.user, '/user/section/job_status/', {
+            'pending': ['Job 0', 'Job 2', 'Job 4'],
+            'submitted': ['Job 1', 'Job 5'],
+            'verified': ['Job 3'],
+        })
+
+    def test_supervisor_status_and_paging(self):
+        self.assertFilters('supervisor', self.supervisor, '/supervisor/section/supervisor_job_status/', {
+            'pending': ['Job 3', 'Job 4', 'Job 5'],
+            'submitted': ['Job 1', 'Job 2'],
+            'verified': ['Job 0'],
+        })
+        # Each page is one query of page_size + 1 rows, whatever the total;
+        # the session and user come from the cache
+        with self.assertNumQueries(4):
+            response = self.client.get('/supervisor/section/supervisor_job_status/?page_size=2')
+        self.assertEqual(len(response.context['jobs']), 2)
+        self.assertEqual(response.context['total_jobs'], 6)
+        self.assertTrue(response.context['next_page_url'])
+
+    def test_counters_follow_the_date_filter(self):
+        Job.objects.filter(title__in=['Job 0', 'Job 1']).update(created_at=timezone.now() - timedelta(days=10))
+        today = timezone.localdate().isoformat()
+        for user, url in [(self.user, '/user/section/job_status/'), (self.supervisor, '/supervisor/section/supervisor_job_status/')]:
+            with self.subTest(role=user.role):
+                self.client.force_login(user)
+                # The counters leave out the status filter, not the dates
+                context = self.client.get(f'{url}?date_from={today}&status=pending').context
+                self.assertEqual(
+                    (context['total_jobs'], context['completed_jobs'], context['pending_jobs']),
+                    (4, 1, 3),
+                )
+
+
+class AllotmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user('admin', password='x', role='admin')
+        cls.busy = CustomUser.objects.create_user('busy', password='x', role='user', department_code='IT')
+        cls.idle = CustomUser.objects.create_user('idle', password='x', role='user', department_code='HR')
+        cls.expert = CustomUser.objects.create_user('expert', password='x', role='user', department_code='HR')
+        cls.supervisor = CustomUser.objects.create_user('boss', password='x', role='supervisor', department_code='HR')
+        Job.objects.create(title='Printer', assigned_to=cls.busy)
+        Job.objects.create(title='Network', assigned_to=cls.expert, status='completed')
+
+    def test_least_loaded_with_title_bonus(self):
+        allotter = Allotter()
+        job = Job(title='Network')
+        self.assertTrue(allotter.allot(job))
+        self.assertEqual((job.assigned_to_id, job.supervisor_id), (self.expert.pk, self.supervisor.pk))
+        # expert now carries one open job; idle is cheaper for an unknown title
+        job = Job(title='Mail')
+        allotter.allot(job)
+        self.assertEqual(job.assigned_to_id, self.idle.pk)
+
+    def test_batch_and_single(self):
+        for i in range(7):
+            Job.objects.create(title='Mail')
+        self.assertEqual(auto_allot_pending(chunk_size=3), 8)
+        open_jobs = [get_work_stats(user).open_jobs for user in (self.busy, self.idle, self.expert)]
+        self.assertEqual(sum(open_jobs), 8)
+        # The supervisor is in HR, so the HR users share the new jobs
+        self.assertEqual(open_jobs[0], 1)
+        self.assertLessEqual(abs(open_jobs[1] - open_jobs[2]), DEFAULT_TITLE_BONUS)
+        self.assertFalse(Job.objects.filter(status='pending', allotted_at__isnull=True).exists())
+        job = Job.objects.create(title='Mail')
+        self.client.force_login(self.admin)
+        self.assertRedirects(self.client.post(f'/job/{job.pk}/auto_allot/'), '/dashboard/admin/', fetch_redirect_response=False)
+        job.refresh_from_db()
+        self.assertIsNotNone(job.assigned_to_id)
+        self.assertEqual(job.supervisor_id, self.supervisor.pk)
+
+    def test_batch_skips_jobs_allotted_meanwhile(self):
+        manual, auto = Job.objects.create(title='Mail'), Job.objects.create(title='Mail')
+        jobs = [job for job in unallotted_jobs().filter(pk__in=[manual.pk, auto.pk]).order_by('pk') if Allotter().allot(job)]
+        # An admin allots one of them by hand before the batch is written
+        Job.objects.filter(pk=manual.pk).update(assigned_to=self.busy, version=F('version') + 1)
+        with transaction.atomic():
+            saved = save_allotments(jobs)
+        self.assertEqual([job.pk for job in saved], [auto.pk])
+        self.assertEqual(Job.objects.get(pk=manual.pk).assigned_to_id, self.busy.pk)
+        self.assertEqual(Job.objects.get(pk=auto.pk).version, 2)
+
+    def test_single_auto_allot_conflict(self):
+        job = Job.objects.create(title='Mail')
+
+        def stale_job(*args, **kwargs):
+            found = get_object_or_404(*args, **kwargs)
+            Job.objects.filter(pk=found.pk).update(assigned_to=self.busy, version=F('version') + 1)
+            return found
+
+        self.client.force_login(self.admin)
+        with mock.patch('joballotment.views.get_object_or_404', stale_job):
+            response = self.client.post(f'/job/{job.pk}/auto_allot/')
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(response.context['conflict'])
+        self.assertEqual(Job.objects.get(pk=job.pk).assigned_to_id, self.busy.pk)
+
+
+class BulkActionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user('admin', password='x', role='admin')
+        cls.old = CustomUser.objects.create_user('old', password='x', role='user')
+        cls.new = CustomUser.objects.create_user('new', password='x', role='user')
+        cls.supervisor = CustomUser.objects.create_user('boss', password='x', role='supervisor')
+        cls.jobs = [Job.objects.create(title=f'Job {i}', assigned_to=cls.old, supervisor=cls.supervisor) for i in range(4)]
+        Report.objects.create(job=cls.jobs[0], submitted_by=cls.old, content='done', report_type='user')
+
+    def post(self, **data):
+        self.client.force_login(self.admin)
+        return self.client.post('/jobs/bulk/', data)
+
+    @override_settings(BULK_ACTION_CHUNK_SIZE=2)
+    def test_allot_in_chunks(self):
+        ids = [job.pk for job in self.jobs]
+        data = self.post(action='allot', job_ids=ids + [0], assigned_to=self.new.pk).json()
+        self.assertEqual((data['succeeded'], data['failed']), (4, 1))
+        self.assertEqual(data['results'][-1], {'job_id': 0, 'ok': False, 'error': 'Job not found'})
+        self.assertEqual(Job.objects.filter(assigned_to=self.new, allotted_at__isnull=False).count(), 4)
+        self.assertEqual((get_work_stats(self.old).open_jobs, get_work_stats(self.new).open_jobs), (0, 4))
+
+    def test_roles_are_validated(self):
+        response = self.post(action='allot', job_ids=[self.jobs[0].pk], assigned_to=self.supervisor.pk)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('assigned_to', response.json()['errors'])
+        self.assertEqual(self.post(action='allot', job_ids=[self.jobs[0].pk]).status_code, 400)
+
+    def test_verify_complete_and_delete(self):
+        data = self.post(action='verify', job_ids=[self.jobs[0].pk, self.jobs[1].pk]).json()
+        self.assertEqual([result['ok'] for result in data['results']], [True, False])
+        job = Job.objects.get(pk=self.jobs[0].pk)
+        self.assertEqual((job.status, job.final_status, job.user_report_status), ('completed', 'approved', 'completed'))
+        self.assertEqual(Report.objects.get(job=job).status, 'verified')
+        self.post(action='complete', job_ids=[self.jobs[2].pk])
+        self.assertEqual(get_work_stats(self.old).open_jobs, 2)
+        self.post(action='delete', job_ids=[job.pk for job in self.jobs])
+        self.assertFalse(Job.objects.exists())
+        for person in (self.old, self.supervisor):
+            stats = get_work_stats(person)
+            self.assertEqual({field: getattr(stats, field) for field in STATS_FIELDS}, compute_work_stats([person.pk])[person.pk])
+
+
+class ClaimTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.supervisor = CustomUser.objects.create_user('boss', password='x', role='supervisor', department_code='IT')
+        cls.hr_supervisor = CustomUser.objects.create_user('hr', password='x', role='supervisor', department_code='HR')
+        cls.user = CustomUser.objects.create_user('worker', password='x', role='user', department_code='IT')
+
+    def test_claims_in_priority_order(self):
+        old = Job.objects.create(title='Old', supervisor=self.supervisor)
+        urgent = Job.objects.create(title='Urgent', supervisor=self.supervisor, priority=4)
+        Job.objects.create(title='Other department', supervisor=self.hr_supervisor, priority=4)
+        unsupervised = Job.objects.create(title='Unsupervised')
+        Job.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=1))
+        self.client.force_login(self.user)
+        self.assertRedirects(self.client.post('/jobs/claim/'), '/user/dashboard/', fetch_redirect_response=False)
+        self.assertEqual(claim_next_job(self.user).pk, old.pk)
+        self.assertEqual(claim_next_job(self.user).pk, unsupervised.pk)
+        self.assertIsNone(claim_next_job(self.user))
+        self.assertEqual(Job.objects.get(pk=urgent.pk).assigned_to_id, self.user.pk)
+        self.assertEqual(get_work_stats(self.user).open_jobs, 3)
+
+
+class ClaimContentionTests(TransactionTestCase):
+    def test_concurrent_claims(self):
+        supervisor = CustomUser.objects.create_user('boss', password='x', role='supervisor')
+        people = [CustomUser.objects.create_user(f'worker{i}', password='x', role='user') for i in range(8)]
+        Job.objects.bulk_create(Job(title=f'Job {i}', supervisor=supervisor, priority=1 + i % 4) for i in range(200))
+        claims = {}
+        errors = []
+
+        def claim_all(person):
+            claimed = claims[person.pk] = []
+            try:
+                while (job := claim_next_job(person)) is not None:
+                    claimed.append(job.pk)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=claim_all, args=(person,)) for person in people]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        claimed = [pk for pks in claims.values() for pk in pks]
+        self.assertEqual(len(claimed), 200)
+        self.assertEqual(len(set(claimed)), 200)
+        for person in people:
+            self.assertEqual(Job.objects.filter(assigned_to=person).count(), len(claims[person.pk]))
+            self.assertEqual(get_work_stats(person).open_jobs, len(claims[person.pk]))
+
+
+class SQLitePragmaTests(TestCase):
+    def test_pragmas_applied_per_connection(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 20000)
+
+    def test_pragma_statements(self):
+        pragmas = {'journal_mode': 'WAL', 'cache_size': -2000}
+        self.assertEqual(pragma_statements(pragmas), ['PRAGMA journal_mode = WAL', 'PRAGMA cache_size = -2000'])
+        self.assertEqual(pragma_statements(pragmas, read_only=True), ['PRAGMA cache_size = -2000'])
+        with self.assertRaises(ImproperlyConfigured):
+            pragma_statements({'synchronous': 'OFF; DROP TABLE joballotment_job'})
+
+
+@override_settings(SECTION_CACHE_TIMEOUT=0)
+class ReadOnlyRouterTests(TransactionTestCase):
+    databases = {'default', 'readonly'}
+
+    def test_section_reads_use_read_only_alias(self):
+        user = CustomUser.objects.create_user('worker', password='x', role='user')
+        Job.objects.create(title='Printer', assigned_to=user)
+        self.client.force_login(user)
+        with CaptureQueriesContext(connections['default']) as writes, CaptureQueriesContext(connections['readonly']) as reads:
+            response = self.client.get('/user/section/assigned_jobs/')
+        self.assertContains(response, 'Printer')
+        self.assertTrue(any('joballotment_job' in query['sql'] for query in reads.captured_queries))
+        self.assertFalse(any('joballotment_job' in query['sql'] for query in writes.captured_queries))
+
+    def test_routing(self):
+        self.assertEqual(router.db_for_read(Job), 'default')
+        with read_only_queries():
+            self.assertEqual(router.db_for_read(Job), 'readonly')
+            self.assertEqual(router.db_for_write(Job), 'default')
+            # Reads inside a transaction must see its writes
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Job), 'default')
+            with override_settings(READ_ONLY_DATABASE=None):
+                self.assertEqual(router.db_for_read(Job), 'default')
+
+    def test_instances_read_from_read_only_alias_save_to_default(self):
+        job = Job.objects.create(title='Printer')
+        with read_only_queries():
+            job = Job.objects.get(pk=job.pk)
+        self.assertEqual(job._state.db, 'readonly')
+        job.title = 'Scanner'
+        job.save()
+        self.assertEqual(Job.objects.get(pk=job.pk).title, 'Scanner')
+
+
+class VersionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user('admin', password='x', role='admin')
+        cls.user = CustomUser.objects.create_user('worker', password='x', role='user')
+        cls.other = CustomUser.objects.create_user('other', password='x', role='user')
+        cls.supervisor = CustomUser.objects.create_user('boss', password='x', role='supervisor')
+        cls.job = Job.objects.create(title='Printer', assigned_to=cls.user, supervisor=cls.supervisor)
+        cls.report = Report.objects.create(job=cls.job, submitted_by=cls.user, content='done', report_type='user')
+
+    def test_stale_save_conflicts(self):
+        first, second = Job.objects.get(pk=self.job.pk), Job.objects.get(pk=self.job.pk)
+        first.remark = 'first'
+        with CaptureQueriesContext(connection) as queries:
+            first.save(update_fields=['remark'])
+        update = next(query['sql'] for query in queries if query['sql'].startswith('UPDATE "joballotment_job"'))
+        self.assertNotIn('"title"', update)
+        self.assertEqual(first.version, self.job.version + 1)
+        second.remark = 'second'
+        with self.assertRaises(VersionConflict), transaction.atomic():
+            second.save(update_fields=['remark'])
+        self.assertEqual(Job.objects.get(pk=self.job.pk).remark, 'first')
+
+    def test_allotment_conflict(self):
+        self.client.force_login(self.admin)
+        stale = {'assigned_to': self.other.pk, 'supervisor': self.supervisor.pk, 'version': self.job.version}
+        Job.objects.filter(pk=self.job.pk).update(remark='changed', version=F('version') + 1)
+        response = self.client.post(f'/job/{self.job.pk}/allot/', stale)
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(response.context['conflict'])
+        self.assertEqual(Job.objects.get(pk=self.job.pk).assigned_to_id, self.user.pk)
+        current = dict(stale, version=self.job.version + 1)
+        self.assertRedirects(self.client.post(f'/job/{self.job.pk}/allot/', current), '/dashboard/admin/', fetch_redirect_response=False)
+        job = Job.objects.get(pk=self.job.pk)
+        self.assertEqual((job.assigned_to_id, job.version), (self.other.pk, self.job.version + 2))
+        self.assertGreater(job.updated_at, self.job.updated_at)
+        self.assertEqual(get_work_stats(self.other).open_jobs, 1)
+
+    def test_report_verify_conflict(self):
+        self.client.force_login(self.supervisor)
+        url = f'/report/{self.report.pk}/supervisor_verify/'
+        Report.objects.filter(pk=self.report.pk).update(content='edited', version=F('version') + 1)
+        self.assertEqual(self.client.post(url, {'version': self.report.version}).status_code, 409)
+        self.assertEqual(Report.objects.get(pk=self.report.pk).status, 'pending')
+        self.client.post(url, {'version': self.report.version + 1})
+        self.assertEqual(Report.objects.get(pk=self.report.pk).status, 'verified')
+        self.assertEqual(Job.objects.get(pk=self.job.pk).user_report_status, 'completed')
+
+    def test_report_submit_after_concurrent_job_write(self):
+        job = Job.objects.create(title='Scanner', assigned_to=self.user, supervisor=self.supervisor)
+
+        def stale_job(*args, **kwargs):
+            # Another request writes the job after this one has read it
+            found = get_object_or_404(*args, **kwargs)
+            Job.objects.filter(pk=found.pk).update(remark='changed', version=F('version') + 1)
+            return found
+
+        self.client.force_login(self.user)
+        with mock.patch('joballotment.views.get_object_or_404', stale_job):
+            response = self.client.post(f'/job/{job.pk}/report/', {'content': 'done'})
+        self.assertRedirects(response, '/user/dashboard/', fetch_redirect_response=False)
+        job = Job.objects.get(pk=job.pk)
+        self.assertEqual((job.remark, job.user_report_status, job.version), ('changed', 'submitted', 2))
+
+    def test_report_workflow_keeps_open_allotment_form_valid(self):
+        opened = {'assigned_to': self.other.pk, 'supervisor': self.supervisor.pk, 'version': self.job.version}
+        # A supervisor report and its verification only touch derived columns
+        self.client.force_login(self.supervisor)
+        self.client.post(f'/job/{self.job.pk}/report/', {'content': 'ok'})
+        self.client.post(f'/report/{self.report.pk}/supervisor_verify/', {'version': self.report.version})
+        self.assertEqual(Job.objects.get(pk=self.job.pk).user_report_status, 'completed')
+        self.client.force_login(self.admin)
+        response = self.client.post(f'/job/{self.job.pk}/allot/', opened)
+        self.assertRedirects(response, '/dashboard/admin/', fetch_redirect_response=False)
+        self.assertEqual(Job.objects.get(pk=self.job.pk).assigned_to_id, self.other.pk)
+
+
+class ReviewInboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('worker', password='x', role='user')
+        cls.supervisor = CustomUser.objects.create_user('boss', password='x', role='supervisor')
+        cls.other = CustomUser.objects.create_user('other', password='x', role='supervisor')
+        now = timezone.now()
+        cls.reports = []
+        for i in range(6):
+            job = Job.objects.create(title=f'Job {i}', assigned_to=cls.user, supervisor=cls.supervisor)
+            report = Report.objects.create(job=job, submitted_by=cls.user, content='done', report_type='user')
+            # Oldest last by pk, so the inbox has to sort on submitted_at
+            Report.objects.filter(pk=report.pk).update(submitted_at=now - timedelta(hours=i))
+            cls.reports.append(report)
+        Report.objects.create(job=cls.reports[0].job, submitted_by=cls.supervisor, content='ok', report_type='supervisor')
+        foreign = Job.objects.create(title='Foreign', assigned_to=cls.user, supervisor=cls.other)
+        cls.foreign = Report.objects.create(job=foreign, submitted_by=cls.user, content='done', report_type='user')
+
+    def setUp(self):
+        self.client.force_login(self.supervisor)
+
+    @override_settings(REVIEW_INBOX_PAGE_SIZE=4)
+    def test_oldest_first_without_lazy_loads(self):
+        with self.assertNumQueries(5):
+            response = self.client.get('/supervisor/section/user_reports_to_review/')
+        page = response.context['user_reports_to_review']
+        self.assertEqual([report.pk for report in page], [report.pk for report in self.reports[::-1][:4]])
+        self.assertTrue(response.context['next_page_url'])
+
+    def test_verify_selected(self):
+        ids = [report.pk for report in self.reports[:3]] + [self.foreign.pk]
+        data = self.client.post('/reports/supervisor_verify/', {'report_ids': ids}).json()
+        self.assertEqual(sorted(data['report_ids']), ids[:3])
+        self.assertEqual(Report.objects.filter(report_type='user', status='verified').count(), 3)
+        self.assertEqual(get_work_stats(self.supervisor).awaiting_review, 3)
+        # Same workflow columns as refresh_job_workflow would write
+        for report in self.reports[:3]:
+            job = Job.objects.get(pk=report.job_id)
+            stored = [getattr(job, field) for field in WORKFLOW_STATE_FIELDS]
+            refresh_job_workflow(job)
+            self.assertEqual(stored, [getattr(job, field) for field in WORKFLOW_STATE_FIELDS])
+        self.assertEqual(Job.objects.get(pk=self.reports[0].job_id).final_status, 'ready')
+        self.assertEqual(self.client.post('/reports/supervisor_verify/', {'report_ids': 'x'}).status_code, 400)
+
+
+class WorkStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('worker', password='x', role='user')
+        cls.other = CustomUser.objects.create_user('helper', password='x', role='user')
+        cls.supervisor = CustomUser.objects.create_user('boss', password='x', role='supervisor')
+        cls.job = Job.objects.create(title='Printer', assigned_to=cls.user, supervisor=cls.supervisor)
+        Job.objects.create(title='Network', status='completed', assigned_to=cls.user)
+
+    def assertStatsCurrent(self, *people):
+        expected = compute_work_stats([person.pk for person in people])
+        for person in people:
+            stats = get_work_stats(person)
+            self.assertEqual({field: getattr(stats, field) for field in STATS_FIELDS}, expected[person.pk])
+
+    def test_stats_follow_transitions(self):
+        report = Report.objects.create(job=self.job, submitted_by=self.user, content='done', report_type='user')
+        self.assertEqual(get_work_stats(self.supervisor).awaiting_review, 1)
+        report.status = 'verified'
+        report.save()
+        self.job.status = 'completed'
+        self.job.assigned_to = self.other
+        self.job.save()
+        self.assertStatsCurrent(self.user, self.other, self.supervisor)
+        self.assertEqual(get_work_stats(self.user).completed_jobs, 1)
+        self.job.delete()
+        self.assertStatsCurrent(self.user, self.other, self.supervisor)
+
+    def test_summary_is_one_query(self):
+        get_work_stats(self.user)
+        self.client.force_login(self.user)
+        with self.assertNumQueries(1):
+            get_work_stats(self.user)
+        self.assertEqual(job_counters(Job.objects.filter(assigned_to=self.user)), {'total_jobs': 2, 'completed_jobs': 1, 'pending_jobs': 1})
+        self.assertContains(self.client.get('/user/section/dashboard_summary/'), 'Total Jobs: 2')
+
+
+class RollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user('admin', password='x', role='admin')
+        cls.user = CustomUser.objects.create_user('worker', password='x', role='user', department_code='IT')
+        cls.job = Job.objects.create(title='Printer', assigned_to=cls.user)
+        Report.objects.create(job=cls.job, submitted_by=cls.user, content='done', report_type='user')
+        cls.job.status = 'completed'
+        cls.job.save()
+        # A job from months ago that an incremental update must not recount
+        old = Job.objects.create(title='Mail', assigned_to=cls.user)
+        Job.objects.filter(pk=old.pk).update(created_at=F('created_at') - timedelta(days=100), allotted_at=F('allotted_at') - timedelta(days=100))
+
+    def test_incremental_update(self):
+        self.assertIsNone(update_rollups())
+        today = DepartmentDailyRollup.objects.get(department_code='IT', day=timezone.localdate())
+        self.assertEqual([today.created, today.allotted, today.user_reported, today.completed], [1, 1, 1, 1])
+        self.assertEqual(DepartmentDailyRollup.objects.count(), 2)
+        old_row = TitleDailyRollup.objects.get(title='Mail')
+        Job.objects.create(title='Printer')
+        self.assertEqual(update_rollups(), timezone.localdate())
+        self.assertEqual(TitleDailyRollup.objects.get(title='Printer').created, 2)
+        self.assertEqual(TitleDailyRollup.objects.get(title='Mail').pk, old_row.pk)
+        self.client.force_login(self.admin)
+        response = self.client.get('/dashboard/admin/section/analytics/?days=30')
+        self.assertEqual(response.context['totals']['created'], 2)
+        self.assertEqual(self.client.get('/dashboard/admin/section/analytics/').context['totals']['created'], 3)
+
+
+@override_settings(SECTION_CACHE_TIMEOUT=0)
+class AsyncSectionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('worker', password='x', role='user')
+        cls.supervisor = CustomUser.objects.create_user('boss', password='x', role='supervisor')
+        for title, status in (('Printer', 'pending'), ('Network', 'completed'), ('Mail', 'pending')):
+            job = Job.objects.create(title=title, status=status, assigned_to=cls.user, supervisor=cls.supervisor)
+            Report.objects.create(job=job, submitted_by=cls.user, content='done', report_type='user', status='verified' if status == 'completed' else 'pending')
+        Report.objects.create(job=job, submitted_by=cls.supervisor, content='ok', report_type='supervisor')
+
+    async def assertSameAsSync(self, person, urls):
+        client = AsyncClient()
+        await client.aforce_login(person)
+        for url in urls:
+            sync_response = await client.get(url)
+            with override_settings(ROOT_URLCONF=section_urlconf(async_views)):
+                async_response = await client.get(url)
+            self.assertEqual(async_response.status_code, 200, url)
+            # Forms carry a freshly masked CSRF token on every render
+            self.assertEqual(CSRF_TOKEN.sub(b'', async_response.content), CSRF_TOKEN.sub(b'', sync_response.content), url)
+
+    async def test_user_sections_match_sync_views(self):
+        await self.assertSameAsSync(self.user, [
+            '/user/section/assigned_jobs/',
+            '/user/section/your_reports/',
+            '/user/section/dashboard_summary/',
+            '/user/section/job_status/?status=submitted',
+        ])
+
+    async def test_supervisor_sections_match_sync_views(self):
+        sections = ['dashboard_summary', 'jobs_to_supervise', 'user_reports_to_review', 'supervisor_job_status', 'supervisor_reports']
+        await self.assertSameAsSync(self.supervisor, [f'/supervisor/section/{section}/' for section in sections])
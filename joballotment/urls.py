@@ -1,5 +1,16 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+
+def section_urlpatterns(section_views):
+    # Dashboard section routes, served by views or async_views
+    return [
+        path('dashboard/admin/section/<str:section>/', section_views.admin_section, name='admin_section'),
+        path('user/section/<str:section>/', section_views.user_section, name='user_section'),
+        path('supervisor/section/<str:section>/', section_views.supervisor_section, name='supervisor_section'),
+    ]
+
 
 urlpatterns = [
     path('', views.login_view, name='login'),
@@ -10,18 +21,28 @@ urlpatterns = [
     path('job/create/', views.job_create, name='job_create'),
     path('user/create/', views.user_create, name='user_create'),
     path('job/<int:job_id>/allot/', views.job_allotment, name='job_allotment'),
+    path('job/<int:job_id>/auto_allot/', views.job_auto_allot, name='job_auto_allot'),
+    path('jobs/auto_allot/', views.jobs_auto_allot, name='jobs_auto_allot'),
+    path('jobs/bulk/', views.jobs_bulk_action, name='jobs_bulk_action'),
+    path('jobs/claim/', views.job_claim, name='job_claim'),
     path('job/<int:job_id>/report/', views.report_submit, name='report_submit'),
     path('report/<int:report_id>/verify/', views.report_verify, name='report_verify'),
     path('report/<int:report_id>/supervisor_verify/', views.supervisor_verify_user_report, name='supervisor_verify_user_report'),
+    path('reports/supervisor_verify/', views.supervisor_verify_user_reports, name='supervisor_verify_user_reports'),
     path('job/<int:job_id>/delete/', views.job_delete, name='job_delete'),
     path('report/<int:report_id>/', views.report_detail, name='report_detail'),
 ]
 
 urlpatterns += [
-    path('dashboard/admin/section/<str:section>/', views.admin_section, name='admin_section'),
     path('dashboard/admin/legacy/', views.legacy_admin_dashboard, name='legacy_admin_dashboard'),
+    path('dashboard/admin/export/jobs/', views.export_jobs_csv, name='export_jobs_csv'),
+    path('dashboard/admin/events/', views.event_stream, {'role': 'admin'}, name='admin_events'),
+    path('user/events/', views.event_stream, {'role': 'user'}, name='user_events'),
+    path('supervisor/events/', views.event_stream, {'role': 'supervisor'}, name='supervisor_events'),
+    path('ajax/search/', views.ajax_search, name='ajax_search'),
+    path('ajax/user_lookup/', views.ajax_user_lookup, name='ajax_user_lookup'),
     path('ajax/user_search/', views.ajax_user_search, name='ajax_user_search'),
     path('ajax/user_reset_password/', views.ajax_user_reset_password, name='ajax_user_reset_password'),
-    path('user/section/<str:section>/', views.user_section, name='user_section'),
-    path('supervisor/section/<str:section>/', views.supervisor_section, name='supervisor_section'),
-] 
\ No newline at end of file
+]
+
+urlpatterns += section_urlpatterns(async_views if getattr(settings, 'ASYNC_SECTION_VIEWS', False) else views) 
\ No newline at end of file
@@ -0,0 +1,59 @@
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from .models import CustomUser, UserIdSequence
+
+logger = logging.getLogger(__name__)
+
+# user_id is a 5-digit code: 10000-99999
+USER_ID_MIN = 10000
+USER_ID_SPACE = 90000
+# position -> code is i -> (STRIDE * i + OFFSET) mod SPACE. STRIDE is coprime
+# with SPACE, so this is a permutation: codes look random but never repeat.
+STRIDE = 48271
+OFFSET = 21599
+
+
+class UserIdsExhausted(Exception):
+    pass
+
+
+def user_id_at(position):
+    return str(USER_ID_MIN + (STRIDE * position + OFFSET) % USER_ID_SPACE)
+
+
+def _advance(count):
+    # The UPDATE takes the write lock before we read, so concurrent callers
+    # always get disjoint ranges
+    with transaction.atomic():
+        if not UserIdSequence.objects.filter(pk=1).update(position=F('position') + count):
+            UserIdSequence.objects.get_or_create(pk=1)
+            UserIdSequence.objects.filter(pk=1).update(position=F('position') + count)
+        end = UserIdSequence.objects.values_list('position', flat=True).get(pk=1)
+        if end > USER_ID_SPACE:
+            raise UserIdsExhausted(f'Only {USER_ID_SPACE - (end - count)} user IDs are left.')
+    return end - count, end
+
+
+def reserve_user_ids(count):
+    """
+    Reserve ``count`` unused user_id codes and return them. Costs a constant
+    number of queries per call. Codes handed out before the allocator
+    existed are skipped.
+    """
+    reserved = []
+    while len(reserved) < count:
+        start, end = _advance(count - len(reserved))
+        candidates = [user_id_at(position) for position in range(start, end)]
+        taken = set(CustomUser.objects.filter(user_id__in=candidates).values_list('user_id', flat=True))
+        reserved.extend(code for code in candidates if code not in taken)
+    remaining = USER_ID_SPACE - end
+    if remaining < getattr(settings, 'USER_ID_LOW_WATERMARK', 5000):
+        logger.warning('Only %d user IDs left to allocate.', remaining)
+    return reserved
+
+
+def user_id_usage():
+    position = UserIdSequence.objects.filter(pk=1).values_list('position', flat=True).first() or 0
+    return {'allocated': position, 'remaining': USER_ID_SPACE - position, 'capacity': USER_ID_SPACE}
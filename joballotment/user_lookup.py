@@ -0,0 +1,86 @@
+from functools import lru_cache
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.functions import Lower
+from .fragment_cache import bump_generation, get_generation
+from .models import CustomUser
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+# Prefixes are matched as ranges: lower(field) >= prefix AND < prefix + PREFIX_END
+PREFIX_END = '\U0010ffff'
+
+# Searched lower-cased fields; each has an expression index on CustomUser
+LOOKUP_FIELDS = ['username', 'first_name', 'last_name', 'department_name']
+
+
+def user_label(user):
+    name = user.get_full_name() or user.username
+    label = f'{user.user_id} - {name}' if user.user_id else name
+    if user.department_name:
+        label += f' ({user.department_name})'
+    return label
+
+
+def _prefix_q(prefix):
+    q = Q()
+    if prefix.isdigit():
+        q |= Q(user_id__gte=prefix, user_id__lt=prefix + PREFIX_END)
+    for field in LOOKUP_FIELDS:
+        q |= Q(**{f'{field}_lower__gte': prefix, f'{field}_lower__lt': prefix + PREFIX_END})
+    return q
+
+
+def lookup_queryset(prefix, role=None, limit=DEFAULT_LIMIT):
+    """
+    Users whose user_id, username, first or last name or department starts
+    with ``prefix`` (case-insensitive). Every branch of the OR is a range on
+    an index, so this never scans the user table.
+    """
+    prefix = prefix.strip().lower()
+    users = CustomUser.objects.annotate(**{f'{field}_lower': Lower(field) for field in LOOKUP_FIELDS}).filter(_prefix_q(prefix))
+    if role:
+        users = users.filter(role=role)
+    return users.order_by('username')[:limit]
+
+
+# Bumped only when a user is saved or deleted (see signals.py), unlike the
+# fragment generation every job and report write moves
+USERS_GENERATION_KEY = 'joballotment:users:generation'
+DEFAULT_CACHE_SIZE = 1024
+
+
+def bump_users_generation():
+    bump_generation(USERS_GENERATION_KEY)
+
+
+def _lookup(prefix, role, limit, generation):
+    # ``generation`` is part of the key, which leaves the stale entries to
+    # fall out of the LRU
+    return tuple(
+        {'id': user.pk, 'user_id': user.user_id or '', 'username': user.username, 'label': user_label(user)}
+        for user in lookup_queryset(prefix, role, limit)
+    )
+
+
+@lru_cache(maxsize=None)
+def _cached_lookup(maxsize):
+    # One LRU per USER_LOOKUP_CACHE_SIZE, so the setting is read per call
+    # rather than once at import
+    return lru_cache(maxsize=maxsize)(_lookup)
+
+
+def _current_lookup():
+    return _cached_lookup(getattr(settings, 'USER_LOOKUP_CACHE_SIZE', DEFAULT_CACHE_SIZE))
+
+
+def lookup_users(prefix, role=None, limit=DEFAULT_LIMIT):
+    prefix = (prefix or '').strip().lower()
+    if not prefix:
+        return []
+    limit = min(max(limit, 1), MAX_LIMIT)
+    return [dict(user) for user in _current_lookup()(prefix, role or None, limit, get_generation(USERS_GENERATION_KEY))]
+
+
+def lookup_cache_info():
+    return _current_lookup().cache_info()
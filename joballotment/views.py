@@ -1,9 +1,26 @@
+import asyncio
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from .models import Job, Report, CustomUser
-from .forms import JobForm, CustomUserCreationForm, JobAllotmentForm, ReportForm, NewTitleForm
+from .models import Job, Report, CustomUser, VersionConflict
+from .forms import JobForm, CustomUserCreationForm, JobAllotmentForm, ReportForm, NewTitleForm, BulkJobActionForm, ReportVerifyForm
+from .workflow import build_job_workflow, refresh_job_workflow, supervisor_report_statuses, user_report_statuses
+from .filters import JobFilter
+from .admin_sections import ADMIN_SECTIONS, AdminSectionData, render_table_page
+from .pagination import JOB_SORT_FIELDS, REVIEW_SORT_FIELDS, InvalidCursor, keyset_paginate
+from .fragment_cache import cache_section
+from .conditional import conditional_section
+from .routers import read_only_view
+from .export import stream_jobs_csv
+from .search import get_page, render_search_section, search
+from .events import broadcaster, format_sse, publish_job_event
+from .user_lookup import DEFAULT_LIMIT as DEFAULT_LOOKUP_LIMIT, lookup_users
+from .work_stats import get_work_stats, job_counters, work_summary_context
+from .allotment import auto_allot_job, auto_allot_pending
+from .claims import claim_next_job
+from .bulk_actions import run_bulk_action
+from .review_inbox import review_page, verify_user_reports
 from django.views.decorators.cache import never_cache
 from django.urls import reverse
 from django.http import HttpResponseRedirect
@@ -12,8 +29,12 @@ from django.template.loader import render_to_string
 from django.http import HttpResponse, Http404
 from django.utils.dateparse import parse_date
 from django.views.decorators.http import require_GET, require_POST
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 
 def is_admin(user):
     return user.is_authenticated and user.role == 'admin'
@@ -24,6 +45,13 @@ def is_user(user):
 def is_supervisor(user):
     return user.is_authenticated and user.role == 'supervisor'
 
+def posted_version(request):
+    # Version of the row the form was rendered with, see VersionedModel
+    try:
+        return int(request.POST['version'])
+    except (KeyError, ValueError):
+        return None
+
 # Create your views here.
 
 def login_view(request):
@@ -54,7 +82,9 @@ def job_create(request):
     if request.method == 'POST':
         form = JobForm(request.POST)
         if form.is_valid():
-            form.save()
+            job = form.save()
+            # Unassigned jobs only concern the admins
+            publish_job_event('job_allotted' if job.assigned_to_id or job.supervisor_id else 'job_created', job)
             messages.success(request, 'Job created successfully!')
             return redirect('admin_dashboard')
     else:
@@ -79,15 +109,81 @@ def user_create(request):
 def job_allotment(request, job_id):
     job = get_object_or_404(Job, id=job_id)
     if request.method == 'POST':
+        # The form updates job in place; remember who loses the job
+        previous = (job.assigned_to_id, job.supervisor_id)
         form = JobAllotmentForm(request.POST, instance=job)
         if form.is_valid():
-            form.save()
+            # The form sets the version the admin saw; write only what changed,
+            # with the timestamps Job.save() sets
+            form.save(commit=False)
+            update_fields = [name for name in form.changed_data if name != 'version'] + ['allotted_at', 'updated_at']
+            try:
+                with transaction.atomic():
+                    job.save(update_fields=update_fields)
+                    publish_job_event('job_allotted', job, previous_recipients=previous)
+            except VersionConflict:
+                job = Job.objects.get(pk=job_id)
+                context = {'form': JobAllotmentForm(instance=job), 'job': job, 'conflict': True}
+                return render(request, 'joballotment/job_allotment_form.html', context, status=409)
             messages.success(request, 'Job allotted successfully!')
             return redirect('admin_dashboard')
     else:
         form = JobAllotmentForm(instance=job)
     return render(request, 'joballotment/job_allotment_form.html', {'form': form, 'job': job})
 
+@require_POST
+@login_required
+@user_passes_test(is_admin)
+def job_auto_allot(request, job_id):
+    job = get_object_or_404(Job, id=job_id)
+    try:
+        allotted = auto_allot_job(job)
+    except VersionConflict:
+        job = Job.objects.get(pk=job_id)
+        context = {'form': JobAllotmentForm(instance=job), 'job': job, 'conflict': True}
+        return render(request, 'joballotment/job_allotment_form.html', context, status=409)
+    if allotted:
+        messages.success(request, f'Job allotted to {job.assigned_to or "-"} (supervisor {job.supervisor or "-"}).')
+    else:
+        messages.error(request, 'Job is already allotted or no eligible user or supervisor is available.')
+    return redirect('admin_dashboard')
+
+@require_POST
+@login_required
+@user_passes_test(is_admin)
+def jobs_auto_allot(request):
+    count = auto_allot_pending()
+    messages.success(request, f'{count} pending jobs allotted.')
+    return redirect('admin_dashboard')
+
+@require_POST
+@login_required
+@user_passes_test(is_user)
+def job_claim(request):
+    job = claim_next_job(request.user)
+    if job is None:
+        messages.info(request, 'There are no unassigned jobs to claim.')
+    else:
+        messages.success(request, f'Job "{job.title}" claimed.')
+    return redirect('user_dashboard')
+
+@require_POST
+@login_required
+@user_passes_test(is_admin)
+def jobs_bulk_action(request):
+    form = BulkJobActionForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'success': False, 'errors': form.errors}, status=400)
+    results = run_bulk_action(**form.cleaned_data)
+    succeeded = sum(result['ok'] for result in results)
+    return JsonResponse({
+        'success': True,
+        'action': form.cleaned_data['action'],
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'results': results,
+    })
+
 @login_required
 def report_submit(request, job_id):
     job = get_object_or_404(Job, id=job_id)
@@ -101,7 +197,10 @@ def report_submit(request, job_id):
             # Supervisor report should be pending until admin verifies
             # if request.user.role == 'supervisor':
             #     report.status = 'verified'
-            report.save()
+            with transaction.atomic():
+                report.save()
+                refresh_job_workflow(job)
+                publish_job_event('report_submitted', job, report)
             messages.success(request, 'Report submitted!')
             return redirect('user_dashboard' if request.user.role == 'user' else 'supervisor_dashboard')
     else:
@@ -114,10 +213,20 @@ def report_verify(request, report_id):
     report = get_object_or_404(Report, id=report_id)
     if request.method == 'POST':
         report.status = request.POST.get('status')
-        report.save()
-        if report.status == 'verified':
-            report.job.status = 'completed'
-            report.job.save()
+        report.version = posted_version(request)
+        if report.version is None:
+            return HttpResponse('Invalid version', status=400)
+        try:
+            with transaction.atomic():
+                report.save(update_fields=['status'])
+                if report.status == 'verified':
+                    report.job.status = 'completed'
+                    report.job.save(update_fields=['status'])
+                refresh_job_workflow(report.job)
+                publish_job_event('report_verified' if report.status == 'verified' else 'report_updated', report.job, report)
+        except VersionConflict:
+            context = {'report': Report.objects.get(pk=report_id), 'conflict': True}
+            return render(request, 'joballotment/report_verify_form.html', context, status=409)
         messages.success(request, 'Report status updated!')
         return redirect('admin_dashboard')
     return render(request, 'joballotment/report_verify_form.html', {'report': report})
@@ -126,18 +235,10 @@ def report_verify(request, report_id):
 @login_required
 @user_passes_test(is_admin)
 def admin_dashboard(request):
-    jobs = Job.objects.all()
     users = CustomUser.objects.all()
-    # Date filter for reports
-    date_from = request.GET.get('date_from')
-    date_to = request.GET.get('date_to')
-    reports = Report.objects.all()
-    if date_from:
-        reports = reports.filter(submitted_at__date__gte=date_from)
-    if date_to:
-        reports = reports.filter(submitted_at__date__lte=date_to)
-    # Only include jobs that have at least one report in the filtered set
-    jobs = jobs.filter(report__in=reports).distinct() if (date_from or date_to) else jobs
+    job_filter = JobFilter(request.GET)
+    # Only jobs with a report in the date window, as in the jobs table section
+    jobs = job_filter.apply(Job.objects.all())
     searched_user_id = request.GET.get('search_user_id')
     searched_user_name = ''
     if searched_user_id:
@@ -165,112 +266,46 @@ def admin_dashboard(request):
             messages.error(request, 'User not found for password reset.')
         return HttpResponseRedirect(reverse('admin_dashboard'))
     # Build workflow status for each job
-    job_user_statuses = {}
-    job_supervisor_statuses = {}
-    job_final_statuses = {}
-    job_statuses = {}
-    job_reports = {}
-    for job in jobs:
-        user_report = Report.objects.filter(job=job, report_type='user').first()
-        supervisor_report = Report.objects.filter(job=job, report_type='supervisor').first()
-        # User status
-        if not user_report:
-            user_status = 'Pending'
-        elif user_report.status == 'verified':
-            user_status = 'Completed'
-        else:
-            user_status = 'Submitted'
-        # Supervisor status
-        if not supervisor_report:
-            supervisor_status = 'Pending'
-        elif supervisor_report.status == 'verified':
-            supervisor_status = 'Completed'
-        else:
-            supervisor_status = 'Submitted'
-        # Final status
-        if job.status == 'completed':
-            final_status = 'Approved'
-        elif supervisor_report and supervisor_report.status == 'verified' and job.status != 'completed':
-            final_status = 'Verified by Admin'
-        else:
-            final_status = 'Pending'
-        # Workflow status for enabling verify button
-        if user_report and user_report.status == 'verified' and supervisor_report and supervisor_report.status == 'pending' and job.status != 'completed':
-            job_statuses[job.id] = 'Ready for admin verification'
-        else:
-            job_statuses[job.id] = ''
-        job_user_statuses[job.id] = user_status
-        job_supervisor_statuses[job.id] = supervisor_status
-        job_final_statuses[job.id] = final_status
-        job_reports[job.id] = {
-            'user': user_report,
-            'supervisor': supervisor_report,
-        }
-    return render(request, 'joballotment/admin_dashboard.html', {
-        'jobs': jobs,
-        'reports': job_reports,
+    context = build_job_workflow(jobs.select_related('assigned_to', 'supervisor'))
+    context.update({
         'users': users,
-        'job_user_statuses': job_user_statuses,
-        'job_supervisor_statuses': job_supervisor_statuses,
-        'job_final_statuses': job_final_statuses,
-        'job_statuses': job_statuses,
         'searched_user_id': searched_user_id,
         'searched_user_name': searched_user_name,
     })
+    return render(request, 'joballotment/admin_dashboard.html', context)
 
 @login_required
+@read_only_view
+@conditional_section('user')
 def user_dashboard(request):
-    jobs = Job.objects.filter(assigned_to=request.user)
-    reports = Report.objects.filter(submitted_by=request.user)
-    total_jobs = jobs.count()
-    completed_jobs = jobs.filter(status='completed').count()
-    pending_jobs = jobs.filter(status='pending').count()
-    # Map job.id to report status for the current user
-    job_report_statuses = {}
-    for job in jobs:
-        report = reports.filter(job=job, report_type='user').first()
-        if report:
-            if report.status == 'verified':
-                job_report_statuses[job.id] = 'Verified'
-            else:
-                job_report_statuses[job.id] = 'Submitted'
-        else:
-            job_report_statuses[job.id] = 'Pending'
+    jobs = list(Job.objects.filter(assigned_to=request.user))
+    reports = list(Report.objects.filter(submitted_by=request.user).select_related('job'))
+    stats = get_work_stats(request.user)
     return render(request, 'joballotment/user_dashboard.html', {
         'jobs': jobs,
         'reports': reports,
-        'total_jobs': total_jobs,
-        'completed_jobs': completed_jobs,
-        'pending_jobs': pending_jobs,
-        'job_report_statuses': job_report_statuses,
+        'total_jobs': stats.total_jobs,
+        'completed_jobs': stats.completed_jobs,
+        'pending_jobs': stats.open_jobs,
+        'job_report_statuses': user_report_statuses(jobs, reports),
     })
 
 @login_required
+@read_only_view
+@conditional_section('supervisor')
 def supervisor_dashboard(request):
-    jobs = request.user.supervised_jobs.all()
-    user_reports = Report.objects.filter(job__in=jobs, report_type='user')
+    supervised = request.user.supervised_jobs.all()
+    jobs = list(supervised)
+    user_reports = Report.objects.filter(job__in=supervised.values('pk'), report_type='user')
     user_reports_to_review = user_reports.filter(status='pending')
-    jobs_with_verified_user_report = [r.job.id for r in user_reports.filter(status='verified')]
+    jobs_with_verified_user_report = list(user_reports.filter(status='verified').values_list('job_id', flat=True))
     # Jobs where user report is verified but supervisor report not yet submitted
-    pending_jobs_to_supervise = 0
-    for job in jobs:
-        user_report_verified = user_reports.filter(job=job, status='verified').exists()
-        supervisor_report_exists = Report.objects.filter(job=job, report_type='supervisor').exists()
-        if user_report_verified and not supervisor_report_exists:
-            pending_jobs_to_supervise += 1
-    pending_user_reports = user_reports_to_review.count()
-    # Map job.id to supervisor report status for the current supervisor
-    supervisor_reports = Report.objects.filter(job__in=jobs, report_type='supervisor', submitted_by=request.user)
-    job_supervisor_report_statuses = {}
-    for job in jobs:
-        report = supervisor_reports.filter(job=job).first()
-        if report:
-            if job.status == 'completed':
-                job_supervisor_report_statuses[job.id] = 'Verified'
-            else:
-                job_supervisor_report_statuses[job.id] = 'Submitted'
-        else:
-            job_supervisor_report_statuses[job.id] = 'Pending'
+    pending_jobs_to_supervise = supervised.filter(
+        Exists(user_reports.filter(job=OuterRef('pk'), status='verified')),
+        ~Exists(Report.objects.filter(job=OuterRef('pk'), report_type='supervisor')),
+    ).count()
+    pending_user_reports = get_work_stats(request.user).awaiting_review
+    supervisor_reports = list(Report.objects.filter(job__in=supervised.values('pk'), report_type='supervisor', submitted_by=request.user).select_related('job'))
     return render(request, 'joballotment/supervisor_dashboard.html', {
         'jobs': jobs,
         'user_reports': user_reports,
@@ -279,7 +314,7 @@ def supervisor_dashboard(request):
         'jobs_with_verified_user_report': jobs_with_verified_user_report,
         'pending_jobs_to_supervise': pending_jobs_to_supervise,
         'pending_user_reports': pending_user_reports,
-        'job_supervisor_report_statuses': job_supervisor_report_statuses,
+        'job_supervisor_report_statuses': supervisor_report_statuses(jobs, supervisor_reports),
     })
 
 @login_required
@@ -287,17 +322,40 @@ def supervisor_verify_user_report(request, report_id):
     report = get_object_or_404(Report, id=report_id, report_type='user')
     if request.method == 'POST':
         report.status = 'verified'
-        report.save()
+        report.version = posted_version(request)
+        if report.version is None:
+            return HttpResponse('Invalid version', status=400)
+        try:
+            with transaction.atomic():
+                report.save(update_fields=['status'])
+                refresh_job_workflow(report.job)
+                publish_job_event('report_verified', report.job, report)
+        except VersionConflict:
+            context = {'report': Report.objects.get(pk=report_id), 'conflict': True}
+            return render(request, 'joballotment/supervisor_verify_user_report.html', context, status=409)
         messages.success(request, 'User report verified!')
         return redirect('supervisor_dashboard')
     return render(request, 'joballotment/supervisor_verify_user_report.html', {'report': report})
 
+@require_POST
+@login_required
+@user_passes_test(is_supervisor)
+def supervisor_verify_user_reports(request):
+    form = ReportVerifyForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'success': False, 'errors': form.errors}, status=400)
+    verified = verify_user_reports(request.user, form.cleaned_data['report_ids'])
+    return JsonResponse({'success': True, 'verified': len(verified), 'report_ids': verified})
+
 @login_required
 @user_passes_test(is_admin)
 def job_delete(request, job_id):
     job = get_object_or_404(Job, id=job_id)
     if request.method == 'POST':
-        job.delete()
+        with transaction.atomic():
+            # Built before delete() clears job.id; sent once the delete commits
+            publish_job_event('job_deleted', job)
+            job.delete()
         messages.success(request, 'Job deleted successfully!')
         return redirect('admin_dashboard')
     return render(request, 'joballotment/job_confirm_delete.html', {'job': job})
@@ -318,79 +376,27 @@ def report_detail(request, report_id):
         raise PermissionDenied
 
 def get_job_user_statuses(jobs):
-    job_user_statuses = {}
-    for job in jobs:
-        user_report = Report.objects.filter(job=job, report_type='user').first()
-        if not user_report:
-            user_status = 'Pending'
-        elif user_report.status == 'verified':
-            user_status = 'Completed'
-        else:
-            user_status = 'Submitted'
-        job_user_statuses[job.id] = user_status
-    return job_user_statuses
+    return build_job_workflow(jobs)['job_user_statuses']
 
 def get_job_supervisor_statuses(jobs):
-    job_supervisor_statuses = {}
-    for job in jobs:
-        supervisor_report = Report.objects.filter(job=job, report_type='supervisor').first()
-        if not supervisor_report:
-            supervisor_status = 'Pending'
-        elif supervisor_report.status == 'verified':
-            supervisor_status = 'Completed'
-        else:
-            supervisor_status = 'Submitted'
-        job_supervisor_statuses[job.id] = supervisor_status
-    return job_supervisor_statuses
+    return build_job_workflow(jobs)['job_supervisor_statuses']
 
 def get_job_final_statuses(jobs):
-    job_final_statuses = {}
-    for job in jobs:
-        supervisor_report = Report.objects.filter(job=job, report_type='supervisor').first()
-        if job.status == 'completed':
-            final_status = 'Approved'
-        elif supervisor_report and supervisor_report.status == 'verified' and job.status != 'completed':
-            final_status = 'Verified by Admin'
-        else:
-            final_status = 'Pending'
-        job_final_statuses[job.id] = final_status
-    return job_final_statuses
+    return build_job_workflow(jobs)['job_final_statuses']
 
 @login_required
 @user_passes_test(is_admin)
+@read_only_view
+@conditional_section('admin')
+@cache_section('admin')
 def admin_section(request, section):
-    # Date filter for reports
-    date_from = request.GET.get('date_from')
-    date_to = request.GET.get('date_to')
-    jobs = Job.objects.all()
-    reports_qs = Report.objects.all()
-    if date_from:
-        reports_qs = reports_qs.filter(submitted_at__date__gte=date_from)
-    if date_to:
-        reports_qs = reports_qs.filter(submitted_at__date__lte=date_to)
-    jobs = jobs.filter(report__in=reports_qs).distinct() if (date_from or date_to) else jobs
-    searched_user_id = request.GET.get('search_user_id')
-    searched_user_name = ''
-    if searched_user_id:
-        try:
-            # Try user_id (5-digit code) first
-            searched_user = CustomUser.objects.get(user_id=searched_user_id)
-            searched_user_name = searched_user.get_full_name() or searched_user.username
-        except CustomUser.DoesNotExist:
-            try:
-                # Try username
-                searched_user = CustomUser.objects.get(username=searched_user_id)
-                searched_user_name = searched_user.get_full_name() or searched_user.username
-            except CustomUser.DoesNotExist:
-                try:
-                    # Try numeric PK
-                    if searched_user_id.isdigit():
-                        searched_user = CustomUser.objects.get(id=int(searched_user_id))
-                        searched_user_name = searched_user.get_full_name() or searched_user.username
-                    else:
-                        searched_user_name = 'User not found'
-                except CustomUser.DoesNotExist:
-                    searched_user_name = 'User not found'
+    return render_admin_section(request, section)
+
+def render_admin_section(request, section):
+    # Body of admin_section, shared with the async view in async_views.py
+    provider = ADMIN_SECTIONS.get(section)
+    if provider is None:
+        return HttpResponse('Section not found', status=404)
     if request.method == 'POST' and 'reset_password' in request.POST:
         reset_user_id = request.POST.get('reset_user_id')
         try:
@@ -404,95 +410,85 @@ def admin_section(request, section):
         except CustomUser.DoesNotExist:
             messages.error(request, 'User not found for password reset.')
         return HttpResponseRedirect(request.path)
-    # Build workflow status and reports dict
-    job_user_statuses = get_job_user_statuses(jobs)
-    job_supervisor_statuses = get_job_supervisor_statuses(jobs)
-    job_final_statuses = get_job_final_statuses(jobs)
-    job_statuses = {}
-    reports = {}
-    for job in jobs:
-        user_report = Report.objects.filter(job=job, report_type='user').first()
-        supervisor_report = Report.objects.filter(job=job, report_type='supervisor').first()
-        # Workflow status for enabling verify button
-        if user_report and user_report.status == 'verified' and supervisor_report and supervisor_report.status == 'pending' and job.status != 'completed':
-            job_statuses[job.id] = 'Ready for admin verification'
-        else:
-            job_statuses[job.id] = ''
-        reports[job.id] = {
-                'user': user_report,
-                'supervisor': supervisor_report,
+    # Each section computes only the data its template needs
+    return provider(request, AdminSectionData(request, section))
+
+@require_GET
+@login_required
+@user_passes_test(is_admin)
+def export_jobs_csv(request):
+    # Same filters as the admin jobs table
+    jobs = AdminSectionData(request, 'jobs_table').jobs
+    response = StreamingHttpResponse(stream_jobs_csv(jobs), content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="jobs.csv"'
+    return response
+
+@require_GET
+@login_required
+def ajax_search(request):
+    # Ranked full-text search over the jobs and reports the user may see
+    page, page_size = get_page(request)
+    results = search(request.user, request.GET.get('q', ''), page, page_size)
+    return JsonResponse({
+        'query': results.query,
+        'page': results.page,
+        'has_next': results.has_next,
+        'results': [
+            {
+                'kind': hit.kind,
+                'job_id': hit.job.id,
+                'report_id': hit.report_id,
+                'title': hit.job.title,
+                'status': hit.job.status,
+                'snippet': hit.snippet,
             }
-    context = {
-        'users': CustomUser.objects.all(),
-            'jobs': jobs,
-        'reports': reports,
-            'job_user_statuses': job_user_statuses,
-            'job_supervisor_statuses': job_supervisor_statuses,
-            'job_final_statuses': job_final_statuses,
-        'job_statuses': job_statuses,
-        'searched_user_id': searched_user_id,
-        'searched_user_name': searched_user_name,
-    }
-    if section == 'user_search':
-        return render(request, 'joballotment/admin_section_user_search.html', context)
-    elif section == 'create_actions':
-        return render(request, 'joballotment/admin_section_create_actions.html', context)
-    elif section == 'jobs_table':
-        return render(request, 'joballotment/admin_section_jobs_table.html', context)
-    elif section == 'reports_table':
-        return render(request, 'joballotment/admin_section_reports_table.html', context)
-    elif section == 'users_table':
-        return render(request, 'joballotment/admin_section_users_table.html', context)
-    elif section == 'change_password':
-        return render(request, 'joballotment/change_password.html', context)
-    elif section == 'create_job':
-        if request.method == 'POST':
-            form = JobForm(request.POST)
-            if form.is_valid():
-                form.save()
-                return HttpResponse('<div class="alert alert-success">Job created successfully!</div>')
-            else:
-                context['form'] = form
-                return render(request, 'joballotment/job_form.html', context)
-        else:
-            form = JobForm()
-            context['form'] = form
-            return render(request, 'joballotment/job_form.html', context)
-    elif section == 'create_user':
-        if request.method == 'POST':
-            form = CustomUserCreationForm(request.POST)
-            if form.is_valid():
-                form.save()
-                return HttpResponse('<div class="alert alert-success">User created successfully!</div>')
-            else:
-                context['form'] = form
-                return render(request, 'joballotment/user_form.html', context)
-        else:
-            form = CustomUserCreationForm()
-            context['form'] = form
-            return render(request, 'joballotment/user_form.html', context)
-    elif section == 'new_title':
-        form = NewTitleForm(request.POST or None)
-        if request.method == 'POST':
-            if form.is_valid():
-                new_title_name = form.cleaned_data['title_name'].strip()
-                new_title_code = form.cleaned_data['title_code'].strip()
-                from .forms import JOB_TITLE_CHOICES
-                codes = [t[0].lower() for t in JOB_TITLE_CHOICES]
-                if new_title_code.lower() not in codes and new_title_name:
-                    idx = next((i for i, t in enumerate(JOB_TITLE_CHOICES) if t[0] == 'Other'), len(JOB_TITLE_CHOICES))
-                    JOB_TITLE_CHOICES.insert(idx, (new_title_code, new_title_name))
-                    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
-                        return HttpResponse('<div class="alert alert-success">Title added successfully!</div>')
-                    else:
-                        messages.success(request, 'Title added successfully!')
-                        return redirect(request.path)
-                else:
-                    form.add_error('title_code', 'Title code already exists or is invalid.')
-        context['form'] = form
-        return render(request, 'joballotment/new_title.html', context)
-    else:
-        return HttpResponse('Section not found', status=404)
+            for hit in results
+        ],
+    })
+
+@require_GET
+@login_required
+async def event_stream(request, role):
+    # Server-Sent Events of job/report changes for one dashboard. Needs the
+    # ASGI server: under WSGI each connection would pin a worker thread.
+    user = await request.auser()
+    if user.role != role:
+        raise PermissionDenied
+    if not isinstance(request, ASGIRequest):
+        # 204 tells EventSource to stop reconnecting
+        return HttpResponse(status=204)
+    heartbeat = getattr(settings, 'EVENT_HEARTBEAT_SECONDS', 15)
+
+    async def stream():
+        subscription = broadcaster.subscribe(user.pk, user.role)
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ': keepalive\n\n'
+                    continue
+                yield format_sse(event)
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@require_GET
+@login_required
+@user_passes_test(is_admin)
+def ajax_user_lookup(request):
+    # Typeahead for the assigned_to / supervisor autocomplete widgets
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LOOKUP_LIMIT))
+    except ValueError:
+        limit = DEFAULT_LOOKUP_LIMIT
+    return JsonResponse({'results': lookup_users(request.GET.get('q', ''), request.GET.get('role'), limit)})
 
 @require_GET
 @csrf_exempt
@@ -501,13 +497,9 @@ def ajax_user_search(request):
     result = {'success': False, 'name': '', 'department': '', 'error': ''}
     user = None
     if query:
-        try:
-            user = CustomUser.objects.get(user_id=query)
-        except CustomUser.DoesNotExist:
-            try:
-                user = CustomUser.objects.get(username=query)
-            except CustomUser.DoesNotExist:
-                user = None
+        # One query; a user_id match wins over a username match
+        matches = CustomUser.objects.filter(Q(user_id=query) | Q(username=query))
+        user = min(matches, key=lambda match: match.user_id != query, default=None)
         if user:
             result['success'] = True
             result['name'] = user.get_full_name() or user.username
@@ -547,7 +539,6 @@ def ajax_user_reset_password(request):
 @user_passes_test(is_admin)
 def legacy_admin_dashboard(request):
     jobs = Job.objects.all()
-    reports = Report.objects.all()
     users = CustomUser.objects.all()
     searched_user_id = request.GET.get('search_user_id')
     searched_user_name = ''
@@ -573,215 +564,85 @@ def legacy_admin_dashboard(request):
         except CustomUser.DoesNotExist:
             messages.error(request, 'User not found for password reset.')
         return HttpResponseRedirect(reverse('legacy_admin_dashboard'))
-    job_user_statuses = {}
-    job_supervisor_statuses = {}
-    job_final_statuses = {}
-    job_statuses = {}
-    job_reports = {}
-    for job in jobs:
-        user_report = Report.objects.filter(job=job, report_type='user').first()
-        supervisor_report = Report.objects.filter(job=job, report_type='supervisor').first()
-        if not user_report:
-            user_status = 'Pending'
-        elif user_report.status == 'verified':
-            user_status = 'Completed'
-        else:
-            user_status = 'Submitted'
-        if not supervisor_report:
-            supervisor_status = 'Pending'
-        elif supervisor_report.status == 'verified':
-            supervisor_status = 'Completed'
-        else:
-            supervisor_status = 'Submitted'
-        if job.status == 'completed':
-            final_status = 'Approved'
-        elif supervisor_report and supervisor_report.status == 'verified' and job.status != 'completed':
-            final_status = 'Verified by Admin'
-        else:
-            final_status = 'Pending'
-        if user_report and user_report.status == 'verified' and supervisor_report and supervisor_report.status == 'pending' and job.status != 'completed':
-            job_statuses[job.id] = 'Ready for admin verification'
-        else:
-            job_statuses[job.id] = ''
-        job_user_statuses[job.id] = user_status
-        job_supervisor_statuses[job.id] = supervisor_status
-        job_final_statuses[job.id] = final_status
-        job_reports[job.id] = {
-            'user': user_report,
-            'supervisor': supervisor_report,
-        }
-    return render(request, 'joballotment/legacy_admin_dashboard.html', {
-        'jobs': jobs,
-        'reports': job_reports,
+    context = build_job_workflow(jobs.select_related('assigned_to', 'supervisor'))
+    context.update({
         'users': users,
-        'job_user_statuses': job_user_statuses,
-        'job_supervisor_statuses': job_supervisor_statuses,
-        'job_final_statuses': job_final_statuses,
-        'job_statuses': job_statuses,
         'searched_user_id': searched_user_id,
         'searched_user_name': searched_user_name,
     })
+    return render(request, 'joballotment/legacy_admin_dashboard.html', context)
 
 @login_required
+@read_only_view
+@conditional_section('user')
+@cache_section('user')
 def user_section(request, section):
     user = request.user
-    if section == 'assigned_jobs':
-        jobs = Job.objects.filter(assigned_to=user)
-        reports = Report.objects.filter(submitted_by=user)
-        job_report_statuses = {}
-        for job in jobs:
-            report = reports.filter(job=job, report_type='user').first()
-            if report:
-                if report.status == 'verified':
-                    job_report_statuses[job.id] = 'Verified'
-                else:
-                    job_report_statuses[job.id] = 'Submitted'
-            else:
-                job_report_statuses[job.id] = 'Pending'
-        context = {'jobs': jobs, 'reports': reports, 'job_report_statuses': job_report_statuses}
+    if section == 'search':
+        return render_search_section(request)
+    elif section == 'assigned_jobs':
+        jobs = list(Job.objects.filter(assigned_to=user))
+        reports = list(Report.objects.filter(submitted_by=user).select_related('job'))
+        context = {'jobs': jobs, 'reports': reports, 'job_report_statuses': user_report_statuses(jobs, reports)}
         return render(request, 'joballotment/user_section_assigned_jobs.html', context)
     elif section == 'your_reports':
-        reports = Report.objects.filter(submitted_by=user)
+        reports = Report.objects.filter(submitted_by=user).select_related('job')
         context = {'reports': reports}
         return render(request, 'joballotment/user_section_your_reports.html', context)
     elif section == 'dashboard_summary':
-        jobs = Job.objects.filter(assigned_to=user)
-        reports = Report.objects.filter(submitted_by=user)
-        total_jobs = jobs.count()
-        completed_jobs = jobs.filter(status='completed').count()
-        pending_jobs = jobs.filter(status='pending').count()
-        context = {
-            'total_jobs': total_jobs,
-            'completed_jobs': completed_jobs,
-            'pending_jobs': pending_jobs,
-            'user_id': user.user_id,
-            'department_name': user.department_name,
-            'designation': user.designation,
-            'email': user.email,
-            'report_count': reports.count(),
-        }
+        context = work_summary_context(user, get_work_stats(user))
         return render(request, 'joballotment/user_section_dashboard_summary.html', context)
     elif section == 'job_status':
         jobs = Job.objects.filter(assigned_to=user)
-        reports = Report.objects.filter(submitted_by=user)
-        job_report_statuses = {}
-        for job in jobs:
-            report = reports.filter(job=job, report_type='user').first()
-            if report:
-                if report.status == 'verified':
-                    job_report_statuses[job.id] = 'Verified'
-                else:
-                    job_report_statuses[job.id] = 'Submitted'
-            else:
-                job_report_statuses[job.id] = 'Pending'
-        # Filtering
-        filter_status = request.GET.get('status', 'all')
-        date_from = request.GET.get('date_from')
-        date_to = request.GET.get('date_to')
-        if date_from:
-            jobs = jobs.filter(created_at__date__gte=date_from)
-        if date_to:
-            jobs = jobs.filter(created_at__date__lte=date_to)
-        if filter_status == 'pending':
-            filtered_jobs = [job for job in jobs if job_report_statuses.get(job.id) == 'Pending']
-        elif filter_status == 'submitted':
-            filtered_jobs = [job for job in jobs if job_report_statuses.get(job.id) == 'Submitted']
-        else:
-            filtered_jobs = list(jobs)
-        total_jobs = jobs.count()
-        completed_jobs = jobs.filter(status='completed').count()
-        pending_jobs = jobs.filter(status='pending').count()
-        context = {
-            'jobs': filtered_jobs,
-            'job_report_statuses': job_report_statuses,
-            'total_jobs': total_jobs,
-            'completed_jobs': completed_jobs,
-            'pending_jobs': pending_jobs,
-            'filter_status': filter_status,
-            'date_from': date_from or '',
-            'date_to': date_to or '',
-        }
-        return render(request, 'joballotment/user_section_job_status.html', context)
+        job_filter = JobFilter(request.GET, 'user', user)
+        try:
+            page = keyset_paginate(request, job_filter.apply(jobs), JOB_SORT_FIELDS, 'id')
+        except InvalidCursor:
+            return HttpResponse('Invalid cursor', status=400)
+        context = {'jobs': page.object_list, **job_counters(jobs.filter(job_filter.q(status=False))), **job_filter.context()}
+        return render_table_page(request, 'joballotment/user_section_job_status.html', context, page, JOB_SORT_FIELDS)
     else:
         return HttpResponse('Section not found', status=404)
 
 @login_required
+@read_only_view
+@conditional_section('supervisor')
+@cache_section('supervisor')
 def supervisor_section(request, section):
+    if section == 'search':
+        return render_search_section(request)
     user = request.user
     jobs = user.supervised_jobs.all()
-    user_reports = Report.objects.filter(job__in=jobs, report_type='user')
-    supervisor_reports = Report.objects.filter(job__in=jobs, report_type='supervisor', submitted_by=user)
-    # For job status
-    job_supervisor_report_statuses = {}
-    for job in jobs:
-        report = supervisor_reports.filter(job=job).first()
-        if report:
-            if job.status == 'completed':
-                job_supervisor_report_statuses[job.id] = 'Verified'
-            else:
-                job_supervisor_report_statuses[job.id] = 'Submitted'
-        else:
-            job_supervisor_report_statuses[job.id] = 'Pending'
+    user_reports = Report.objects.filter(job__in=jobs.values('pk'), report_type='user')
+    supervisor_reports = Report.objects.filter(job__in=jobs.values('pk'), report_type='supervisor', submitted_by=user).select_related('job')
     if section == 'dashboard_summary':
-        total_jobs = jobs.count()
-        completed_jobs = jobs.filter(status='completed').count()
-        pending_jobs = jobs.filter(status='pending').count()
-        context = {
-            'total_jobs': total_jobs,
-            'completed_jobs': completed_jobs,
-            'pending_jobs': pending_jobs,
-            'user_id': user.user_id,
-            'department_name': user.department_name,
-            'designation': user.designation,
-            'email': user.email,
-            'report_count': supervisor_reports.count(),
-        }
+        context = work_summary_context(user, get_work_stats(user), supervisor=True)
         return render(request, 'joballotment/supervisor_section_dashboard_summary.html', context)
     elif section == 'jobs_to_supervise':
-        jobs_with_verified_user_report = [r.job.id for r in user_reports.filter(status='verified')]
+        job_list = list(jobs.select_related('assigned_to'))
+        report_list = list(supervisor_reports)
         context = {
-            'jobs': jobs,
-            'jobs_with_verified_user_report': jobs_with_verified_user_report,
-            'job_supervisor_report_statuses': job_supervisor_report_statuses,
-            'supervisor_reports': supervisor_reports,
+            'jobs': job_list,
+            'jobs_with_verified_user_report': list(user_reports.filter(status='verified').values_list('job_id', flat=True)),
+            'job_supervisor_report_statuses': supervisor_report_statuses(job_list, report_list),
+            'supervisor_reports': report_list,
         }
         return render(request, 'joballotment/supervisor_section_jobs_to_supervise.html', context)
     elif section == 'user_reports_to_review':
-        user_reports_to_review = user_reports.filter(status='pending')
-        context = {'user_reports_to_review': user_reports_to_review}
-        return render(request, 'joballotment/supervisor_section_user_reports_to_review.html', context)
+        try:
+            page = review_page(request, user)
+        except InvalidCursor:
+            return HttpResponse('Invalid cursor', status=400)
+        context = {'user_reports_to_review': page.object_list, 'awaiting_review': get_work_stats(user).awaiting_review}
+        return render_table_page(request, 'joballotment/supervisor_section_user_reports_to_review.html', context, page, REVIEW_SORT_FIELDS)
     elif section == 'supervisor_job_status':
-        # Filtering
-        filter_status = request.GET.get('status', 'all')
-        date_from = request.GET.get('date_from')
-        date_to = request.GET.get('date_to')
-        filtered_jobs = jobs
-        if date_from:
-            filtered_jobs = filtered_jobs.filter(created_at__date__gte=date_from)
-        if date_to:
-            filtered_jobs = filtered_jobs.filter(created_at__date__lte=date_to)
-        if filter_status == 'pending':
-            filtered_jobs = [job for job in filtered_jobs if job_supervisor_report_statuses.get(job.id) == 'Pending']
-        elif filter_status == 'submitted':
-            filtered_jobs = [job for job in filtered_jobs if job_supervisor_report_statuses.get(job.id) == 'Submitted']
-        elif filter_status == 'verified':
-            filtered_jobs = [job for job in filtered_jobs if job_supervisor_report_statuses.get(job.id) == 'Verified']
-        else:
-            filtered_jobs = list(filtered_jobs)
-        total_jobs = jobs.count()
-        completed_jobs = jobs.filter(status='completed').count()
-        pending_jobs = jobs.filter(status='pending').count()
-        context = {
-            'jobs': filtered_jobs,
-            'job_supervisor_report_statuses': job_supervisor_report_statuses,
-            'total_jobs': total_jobs,
-            'completed_jobs': completed_jobs,
-            'pending_jobs': pending_jobs,
-            'filter_status': filter_status,
-            'date_from': date_from or '',
-            'date_to': date_to or '',
-        }
-        return render(request, 'joballotment/supervisor_section_job_status.html', context)
+        job_filter = JobFilter(request.GET, 'supervisor', user)
+        try:
+            page = keyset_paginate(request, job_filter.apply(jobs).select_related('assigned_to'), JOB_SORT_FIELDS, 'id')
+        except InvalidCursor:
+            return HttpResponse('Invalid cursor', status=400)
+        context = {'jobs': page.object_list, **job_counters(jobs.filter(job_filter.q(status=False))), **job_filter.context()}
+        return render_table_page(request, 'joballotment/supervisor_section_job_status.html', context, page, JOB_SORT_FIELDS)
     elif section == 'supervisor_reports':
         context = {'supervisor_reports': supervisor_reports}
         return render(request, 'joballotment/supervisor_section_supervisor_reports.html', context)
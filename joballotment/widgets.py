@@ -0,0 +1,30 @@
+from django import forms
+from django.urls import reverse
+from .models import CustomUser
+from .user_lookup import user_label
+
+
+class UserAutocompleteWidget(forms.Widget):
+    """
+    Text box that looks users up with ajax_user_lookup while typing and
+    stores the chosen user's pk in a hidden input. Only the selected user is
+    read from the database when the form is rendered.
+    """
+    template_name = 'joballotment/widgets/user_autocomplete.html'
+
+    def __init__(self, role=None, attrs=None):
+        super().__init__(attrs)
+        self.role = role
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        label = ''
+        if value:
+            user = CustomUser.objects.filter(pk=value).first()
+            label = user_label(user) if user else ''
+        context['widget'].update({
+            'label': label,
+            'role': self.role or '',
+            'lookup_url': reverse('ajax_user_lookup'),
+        })
+        return context
@@ -0,0 +1,134 @@
+import threading
+from contextlib import contextmanager
+from django.db import transaction
+from django.db.models import Count, Q
+from .models import CustomUser, Job, Report, UserWorkStats
+
+STATS_FIELDS = ['open_jobs', 'completed_jobs', 'reports_submitted', 'awaiting_review']
+REBUILD_BATCH_SIZE = 1000
+
+# User pks collected by deferred_refresh() on this thread, else None
+_deferred = threading.local()
+
+
+def job_counters(jobs):
+    """Total, completed and pending jobs of ``jobs`` in one conditional aggregate."""
+    return jobs.aggregate(
+        total_jobs=Count('pk'),
+        completed_jobs=Count('pk', filter=Q(status='completed')),
+        pending_jobs=Count('pk', filter=Q(status='pending')),
+    )
+
+
+def compute_work_stats(user_ids):
+    """
+    {user_id: {field: value}} for STATS_FIELDS, counted from Job and Report
+    with four grouped queries however many users are asked for.
+    """
+    stats = {user_id: dict.fromkeys(STATS_FIELDS, 0) for user_id in user_ids}
+    open_jobs = Count('pk', filter=Q(status='pending'))
+    completed_jobs = Count('pk', filter=Q(status='completed'))
+    for role_field in ('assigned_to', 'supervisor'):
+        rows = (
+            Job.objects.filter(**{f'{role_field}__in': user_ids})
+            .values(role_field).order_by()
+            .annotate(open_jobs=open_jobs, completed_jobs=completed_jobs)
+        )
+        for row in rows:
+            stats[row[role_field]]['open_jobs'] += row['open_jobs']
+            stats[row[role_field]]['completed_jobs'] += row['completed_jobs']
+    rows = (
+        Report.objects.filter(submitted_by__in=user_ids)
+        .values('submitted_by').order_by()
+        .annotate(submitted=Count('pk'), awaiting=Count('pk', filter=Q(report_type='user', status='pending')))
+    )
+    for row in rows:
+        stats[row['submitted_by']]['reports_submitted'] += row['submitted']
+        stats[row['submitted_by']]['awaiting_review'] += row['awaiting']
+    rows = (
+        Report.objects.filter(report_type='user', status='pending', job__supervisor__in=user_ids)
+        .values('job__supervisor').order_by()
+        .annotate(awaiting=Count('pk'))
+    )
+    for row in rows:
+        stats[row['job__supervisor']]['awaiting_review'] += row['awaiting']
+    return stats
+
+
+def refresh_work_stats(user_ids):
+    """
+    Recount the stats rows of ``user_ids`` (None entries are ignored) and
+    upsert them. Call it inside the transaction that changed their jobs or
+    reports, so the counters commit or roll back with the change.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if getattr(_deferred, 'user_ids', None) is not None:
+        _deferred.user_ids |= user_ids
+        return
+    user_ids = sorted(user_ids)
+    if not user_ids:
+        return
+    stats = compute_work_stats(user_ids)
+    with transaction.atomic():
+        UserWorkStats.objects.bulk_create(
+            [UserWorkStats(user_id=user_id, **values) for user_id, values in stats.items()],
+            update_conflicts=True, unique_fields=['user'], update_fields=STATS_FIELDS,
+        )
+
+
+@contextmanager
+def deferred_refresh():
+    """
+    Collect the refresh_work_stats() calls made inside the block, e.g. by
+    the signal receivers of a queryset delete(), and recount every affected
+    user once at the end. Use it inside the writing transaction.
+    """
+    if getattr(_deferred, 'user_ids', None) is not None:
+        yield
+        return
+    _deferred.user_ids = set()
+    try:
+        yield
+        user_ids = _deferred.user_ids
+    finally:
+        _deferred.user_ids = None
+    refresh_work_stats(user_ids)
+
+
+def rebuild_work_stats(batch_size=REBUILD_BATCH_SIZE):
+    """Recount every user's stats, e.g. after bulk loads that bypass signals."""
+    user_ids = list(CustomUser.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(user_ids), batch_size):
+        refresh_work_stats(user_ids[start:start + batch_size])
+    return len(user_ids)
+
+
+def get_work_stats(user):
+    """The user's stats row: one primary-key read, counted on first use."""
+    stats = UserWorkStats.objects.filter(pk=user.pk).first()
+    if stats is None:
+        refresh_work_stats([user.pk])
+        stats = UserWorkStats.objects.get(pk=user.pk)
+    return stats
+
+
+def work_summary_context(user, stats, supervisor=False):
+    """Template context of the user/supervisor dashboard_summary sections."""
+    context = {
+        'total_jobs': stats.total_jobs,
+        'completed_jobs': stats.completed_jobs,
+        'pending_jobs': stats.open_jobs,
+        'user_id': user.user_id,
+        'department_name': user.department_name,
+        'designation': user.designation,
+        'email': user.email,
+        'report_count': stats.reports_submitted,
+    }
+    if supervisor:
+        context.update({
+            'supervisor_id': user.user_id,
+            'review_count': stats.awaiting_review,
+            'completed_supervisions': stats.completed_jobs,
+            'pending_supervisions': stats.open_jobs,
+        })
+    return context
@@ -0,0 +1,249 @@
+from django.db.models import Case, OuterRef, QuerySet, Subquery, Value, When
+from django.db.models.lookups import Exact, IsNull
+from django.utils import timezone
+from .models import Job, Report
+
+# Workflow status labels shown in the admin tables
+PENDING = 'Pending'
+SUBMITTED = 'Submitted'
+COMPLETED = 'Completed'
+APPROVED = 'Approved'
+VERIFIED_BY_ADMIN = 'Verified by Admin'
+READY_FOR_ADMIN_VERIFICATION = 'Ready for admin verification'
+
+# Denormalized columns on Job maintained by refresh_job_workflow()
+WORKFLOW_STATE_FIELDS = ['user_report_status', 'supervisor_report_status', 'final_status']
+
+
+def report_state(report):
+    # Stored state of a single user/supervisor report (Job.*_report_status)
+    if not report:
+        return 'pending'
+    if report.status == 'verified':
+        return 'completed'
+    return 'submitted'
+
+
+def report_status(report):
+    # Status of a single user/supervisor report as shown to admins
+    return {'pending': PENDING, 'submitted': SUBMITTED, 'completed': COMPLETED}[report_state(report)]
+
+
+def final_status(job, supervisor_report):
+    if job.status == 'completed':
+        return APPROVED
+    if supervisor_report and supervisor_report.status == 'verified':
+        return VERIFIED_BY_ADMIN
+    return PENDING
+
+
+def is_ready_for_admin_verification(job, user_report, supervisor_report):
+    return bool(
+        user_report and user_report.status == 'verified'
+        and supervisor_report and supervisor_report.status == 'pending'
+        and job.status != 'completed'
+    )
+
+
+def final_state(job, user_report, supervisor_report):
+    # Stored value of Job.final_status
+    if job.status == 'completed':
+        return 'approved'
+    if supervisor_report and supervisor_report.status == 'verified':
+        return 'verified'
+    if is_ready_for_admin_verification(job, user_report, supervisor_report):
+        return 'ready'
+    return 'pending'
+
+
+def apply_workflow_state(job, user_report, supervisor_report):
+    """
+    Set the denormalized workflow columns on ``job`` from its reports.
+    Returns True if any of them changed.
+    """
+    state = {
+        'user_report_status': report_state(user_report),
+        'supervisor_report_status': report_state(supervisor_report),
+        'final_status': final_state(job, user_report, supervisor_report),
+    }
+    changed = False
+    for field, value in state.items():
+        if getattr(job, field) != value:
+            setattr(job, field, value)
+            changed = True
+    return changed
+
+
+def job_status_labels(job):
+    """
+    Status labels of ``job`` as the dashboards show them, read from the
+    stored workflow columns: the admin table's user/supervisor/final status,
+    the user's report status and the supervisor's report status.
+    """
+    state_labels = {'pending': PENDING, 'submitted': SUBMITTED, 'completed': COMPLETED}
+    user_label = {'pending': PENDING, 'submitted': SUBMITTED, 'completed': 'Verified'}[job.user_report_status]
+    if job.supervisor_report_status == 'pending':
+        supervisor_label = PENDING
+    else:
+        supervisor_label = 'Verified' if job.status == 'completed' else SUBMITTED
+    return {
+        'user_status': state_labels[job.user_report_status],
+        'supervisor_status': state_labels[job.supervisor_report_status],
+        'final_status': {'approved': APPROVED, 'verified': VERIFIED_BY_ADMIN}.get(job.final_status, PENDING),
+        # Pending jobs an admin closed show as Completed, as in the templates
+        'user_label': COMPLETED if user_label == PENDING and job.status == 'completed' else user_label,
+        'supervisor_label': COMPLETED if supervisor_label == PENDING and job.status == 'completed' else supervisor_label,
+    }
+
+
+def first_report_status(report_type):
+    # Status of each job's first ``report_type`` report, NULL without one
+    return Subquery(
+        Report.objects.filter(job=OuterRef('pk'), report_type=report_type).order_by('pk').values('status')[:1]
+    )
+
+
+def report_state_expression(report_type):
+    """
+    report_state() of each job's first ``report_type`` report as an SQL
+    expression, for writing Job.*_report_status with queryset.update().
+    """
+    status = first_report_status(report_type)
+    return Case(
+        When(IsNull(status, True), then=Value('pending')),
+        When(Exact(status, 'verified'), then=Value('completed')),
+        default=Value('submitted'),
+    )
+
+
+def final_state_expression():
+    # final_state() as an SQL expression, see report_state_expression()
+    user_status = first_report_status('user')
+    supervisor_status = first_report_status('supervisor')
+    return Case(
+        When(status='completed', then=Value('approved')),
+        When(Exact(supervisor_status, 'verified'), then=Value('verified')),
+        When(Exact(user_status, 'verified'), then=Case(
+            When(Exact(supervisor_status, 'pending'), then=Value('ready')),
+            default=Value('pending'),
+        )),
+        default=Value('pending'),
+    )
+
+
+def workflow_state_expressions():
+    """
+    {field: expression} for every WORKFLOW_STATE_FIELDS column, so
+    ``jobs.update(**workflow_state_expressions())`` does what
+    refresh_job_workflow() does for each job, in one statement.
+    """
+    return {
+        'user_report_status': report_state_expression('user'),
+        'supervisor_report_status': report_state_expression('supervisor'),
+        'final_status': final_state_expression(),
+    }
+
+
+def refresh_job_workflow(job):
+    """
+    Recompute and save the workflow columns of a single job, and reload them
+    into ``job``. Call this inside the transaction that wrote the job's
+    reports. The columns are derived, so they are written with update()
+    from the current rows rather than by a versioned save() of ``job``,
+    which would conflict with any write since ``job`` was read. ``version``
+    is left alone, as in backfill_job_workflow: no editable field changes,
+    so forms open on the job stay valid.
+    """
+    Job.objects.filter(pk=job.pk).update(**workflow_state_expressions(), updated_at=timezone.now())
+    job.refresh_from_db(fields=WORKFLOW_STATE_FIELDS + ['status', 'updated_at'])
+
+
+def first_reports_by_job(jobs):
+    """
+    Return {job_id: {'user': Report|None, 'supervisor': Report|None}} for the
+    given jobs, picking the earliest report of each type (same as ``.first()``).
+    Runs a single query when ``jobs`` is a queryset.
+    """
+    if isinstance(jobs, QuerySet):
+        reports = Report.objects.filter(job__in=jobs.values('pk'))
+        job_ids = None
+    else:
+        job_ids = [job.id for job in jobs]
+        reports = Report.objects.filter(job_id__in=job_ids)
+    reports = reports.filter(report_type__in=('user', 'supervisor')).order_by('-pk')
+    result = {} if job_ids is None else {job_id: {'user': None, 'supervisor': None} for job_id in job_ids}
+    # Walk newest first so the earliest report of each type wins
+    for report in reports:
+        result.setdefault(report.job_id, {'user': None, 'supervisor': None})[report.report_type] = report
+    return result
+
+
+def build_job_workflow(jobs):
+    """
+    Compute the user, supervisor and final status of every job, plus the
+    "ready for admin verification" flag and the user/supervisor reports,
+    in a constant number of queries.
+
+    Returns a dict whose keys match the admin template context:
+    ``jobs`` (evaluated list), ``reports``, ``job_user_statuses``,
+    ``job_supervisor_statuses``, ``job_final_statuses`` and ``job_statuses``.
+    """
+    job_list = list(jobs)
+    reports_by_job = first_reports_by_job(jobs if isinstance(jobs, QuerySet) else job_list)
+    reports = {}
+    job_user_statuses = {}
+    job_supervisor_statuses = {}
+    job_final_statuses = {}
+    job_statuses = {}
+    for job in job_list:
+        job_reports = reports_by_job.get(job.id) or {'user': None, 'supervisor': None}
+        user_report = job_reports['user']
+        supervisor_report = job_reports['supervisor']
+        reports[job.id] = job_reports
+        job_user_statuses[job.id] = report_status(user_report)
+        job_supervisor_statuses[job.id] = report_status(supervisor_report)
+        job_final_statuses[job.id] = final_status(job, supervisor_report)
+        if is_ready_for_admin_verification(job, user_report, supervisor_report):
+            job_statuses[job.id] = READY_FOR_ADMIN_VERIFICATION
+        else:
+            job_statuses[job.id] = ''
+    return {
+        'jobs': job_list,
+        'reports': reports,
+        'job_user_statuses': job_user_statuses,
+        'job_supervisor_statuses': job_supervisor_statuses,
+        'job_final_statuses': job_final_statuses,
+        'job_statuses': job_statuses,
+    }
+
+
+def user_report_statuses(jobs, reports):
+    """
+    {job_id: 'Pending'|'Submitted'|'Verified'} for the user dashboard, from
+    the user's first 'user' report of each job. ``reports`` are the user's
+    own reports, already fetched, so this runs no queries.
+    """
+    first = {}
+    for report in sorted(reports, key=lambda report: report.pk):
+        if report.report_type == 'user':
+            first.setdefault(report.job_id, report)
+    statuses = {}
+    for job in jobs:
+        report = first.get(job.id)
+        if report is None:
+            statuses[job.id] = PENDING
+        else:
+            statuses[job.id] = 'Verified' if report.status == 'verified' else SUBMITTED
+    return statuses
+
+
+def supervisor_report_statuses(jobs, supervisor_reports):
+    # Same for the supervisor dashboard, from the supervisor's own reports
+    reported = {report.job_id for report in supervisor_reports}
+    statuses = {}
+    for job in jobs:
+        if job.id not in reported:
+            statuses[job.id] = PENDING
+        else:
+            statuses[job.id] = 'Verified' if job.status == 'completed' else SUBMITTED
+    return statuses